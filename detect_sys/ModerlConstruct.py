@@ -1,29 +1,164 @@
-import pandas as pd 
-import os 
+import pandas as pd
+import numpy as np
+import os
+import io
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from timeutil import parse_time_ns
 
 fl_path = '//10.18.4.40/Users/LEPass/Desktop/共有フォルダ/予兆検知/detect_sys/output'
-files = sorted(os.listdir(fl_path))
+out_path = './output'
+NS_PER_DAY = 86_400 * 1_000_000_000
 
+'''
+    Keep the rows whose value is strictly between the lower and upper quantile of their day.
+    Both quantiles come from one grouped pass; time is parsed once.
+'''
 def prepQuantile(df, upper_th, lower_th):
-    pre_df = df.copy()
-    pre_df['time_d'] = pd.to_datetime(pre_df['time'])
-    pre_df['time_d'] = pd.to_datetime(pre_df['time']).dt.floor('D')
+    if df.empty:
+        return df
+    day = parse_time_ns(df['time']) // NS_PER_DAY
+    q = df['value'].groupby(day).quantile([lower_th, upper_th]).unstack()
+    q_lower = q[lower_th].reindex(day).to_numpy()
+    q_upper = q[upper_th].reindex(day).to_numpy()
 
-    q_upper = pre_df.groupby('time_d')['value'].transform(lambda s: s.quantile(upper_th))
-    q_lower = pre_df.groupby('time_d')['value'].transform(lambda s: s.quantile(lower_th))
+    mask = (df['value'].to_numpy() < q_upper) & (df['value'].to_numpy() > q_lower)
+    return df.loc[mask]
 
-    mask = (pre_df['value'] < q_upper) & (pre_df['value'] > q_lower)
-    return pre_df.loc[mask].drop(columns=['time_d'])
+'''
+    Incremental state of one pre*.csv (kept in pre_state.json next to the results):
+     src_size     :bytes of the source CSV already used
+     last_day     :last day (YYYY-MM-DD) written, the only day that can still receive pairs
+     last_src_off :byte offset in the source where last_day starts
+     last_pre_off :byte offset in pre*.csv where last_day starts
+     pre_size     :size of pre*.csv after the last run
+     src_finger   :hash of the head and tail of the src_size bytes used
+    A run re-reads the source from last_day on, rewrites only that tail of pre*.csv and appends
+    the new days. Anything unexpected (source shrunk or rewritten, pre*.csv edited, pairs for an
+    older day, unsorted days) falls back to a full rebuild of that file.
+'''
+def src_finger(src, size):
+    h = hashlib.sha1()
+    with open(src, 'rb') as f:
+        h.update(f.read(min(size, 4096)))
+        f.seek(max(0, size - 64))
+        h.update(f.read(min(size, 64)))
+    return h.hexdigest()[:16]
 
-for f_name in files:
+def read_rows(src, start):
+    with open(src, 'rb') as f:
+        f.seek(start)
+        data = f.read()
+    if start == 0:
+        nl = data.find(b'\n') + 1  # Skip the header.
+        data, start = data[nl:], nl
+    offs = start + np.concatenate([[0], np.cumsum([len(l) for l in data.splitlines(keepends=True)])])[:-1]
+    df = pd.read_csv(io.BytesIO(data), encoding='cp932', sep=',', header=None, names=['X_TIME', 'Y_TIME', 'DURATION_MS'])
+    df = df.rename(columns={'X_TIME':'time', 'DURATION_MS':'value'})[['time', 'value']]
+    return df, offs.astype(np.int64)
 
-    f_paht = os.path.join(fl_path, f_name)
+def build(src, dst, upper_th, lower_th, st):
+    size = os.path.getsize(src)
+    if (st is not None and st['src_size'] == size and os.path.exists(dst) and os.path.getsize(dst) == st['pre_size']
+            and src_finger(src, size) == st.get('src_finger')):
+        return st  # No new pairs.
 
-    if '.csv' in f_name:
+    incremental = (
+        st is not None and size > st['src_size']
+        and os.path.exists(dst) and os.path.getsize(dst) == st['pre_size']
+        and src_finger(src, st['src_size']) == st.get('src_finger')
+    )
+    start = st['last_src_off'] if incremental else 0
+    df, offs = read_rows(src, start)
+    days = df['time'].str.slice(0, 10).to_numpy()
+    if incremental and (len(days) == 0 or days[0] != st['last_day'] or (days[:-1] > days[1:]).any()):
+        incremental = False
+        df, offs = read_rows(src, 0)
+        days = df['time'].str.slice(0, 10).to_numpy()
+    if not incremental and len(days) and (days[:-1] > days[1:]).any():
+        # Unsorted source: plain full rebuild without day offsets.
+        prepQuantile(df, upper_th, lower_th).to_csv(dst, index=False, encoding='cp932')
+        return None
 
-        df = pd.read_csv(f_paht, encoding='cp932', sep=',') 
-        df = df.rename(columns={'X_TIME':'time', 'DURATION_MS':'value'})
-        df = prepQuantile(df[['time', 'value']] ,0.99, 0.01)
+    pre = prepQuantile(df, upper_th, lower_th)
+    pre_days = days[pre.index.to_numpy()]
+    text = pre.to_csv(index=False, header=not incremental).encode('cp932')
+    lines = text.splitlines(keepends=True)
+    header = b'' if incremental else lines.pop(0)
+    buf = text[len(header):]
+    line_lens = [len(l) for l in lines]
 
-        df.to_csv('./output/pre' + f_name, index=False , encoding='cp932')
-        
\ No newline at end of file
+    pos = st['last_pre_off'] if incremental else 0
+    mode = 'r+b' if incremental else 'wb'
+    with open(dst, mode) as f:
+        f.seek(pos)
+        f.truncate()
+        f.write(header + buf)
+    base = pos + len(header)
+
+    last_day = days[-1] if len(days) else ''
+    last_src_off = int(offs[np.searchsorted(days, last_day)]) if len(days) else start
+    k = int(np.searchsorted(pre_days, last_day)) if len(pre_days) else 0
+    last_pre_off = base + int(sum(line_lens[:k]))
+    return {
+        'src_size': size, 'last_day': last_day, 'last_src_off': last_src_off,
+        'last_pre_off': last_pre_off, 'pre_size': os.path.getsize(dst), 'src_finger': src_finger(src, size),
+    }
+
+def work(args):
+    f_name, src_dir, dst_dir, upper_th, lower_th, st = args
+    return f_name, build(os.path.join(src_dir, f_name), os.path.join(dst_dir, 'pre' + f_name), upper_th, lower_th, st)
+
+'''
+    Per-name pair CSVs of the output folder, picked by their X_TIME,Y_TIME,DURATION_MS header
+    (output.csv, the pre*.csv results and other files are skipped; a name may start with "pre").
+'''
+def pair_files(src_dir):
+    files = []
+    for f_name in sorted(os.listdir(src_dir)):
+        if not f_name.lower().endswith('.csv'):
+            continue
+        with open(os.path.join(src_dir, f_name), 'rb') as f:
+            if f.readline().strip() == b'X_TIME,Y_TIME,DURATION_MS':
+                files.append(f_name)
+    return files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='daily quantile trimming of the per-name pair CSVs')
+    parser.add_argument('--src', default=fl_path, help='detect_sys output folder')
+    parser.add_argument('--dst', default=out_path, help='folder of the pre*.csv results')
+    parser.add_argument('--upper', type=float, default=0.99)
+    parser.add_argument('--lower', type=float, default=0.01)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--full', action='store_true', help='rebuild every pre*.csv')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.dst, exist_ok=True)
+    state_path = os.path.join(args.dst, 'pre_state.json')
+    state = {}
+    if os.path.exists(state_path) and not args.full:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    if state.get('_params') != [args.upper, args.lower]:
+        state = {}  # Other thresholds: everything is rebuilt.
+
+    jobs = [(f, args.src, args.dst, args.upper, args.lower, state.get(f)) for f in pair_files(args.src)]
+    if args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as ex:
+            results = list(ex.map(work, jobs))
+    else:
+        results = [work(j) for j in jobs]
+
+    new_state = {'_params': [args.upper, args.lower]}
+    for f_name, st in results:
+        if st is not None:
+            new_state[f_name] = st
+    tmp = state_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(new_state, f, ensure_ascii=False)
+    os.replace(tmp, state_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+## Standard library
+import math                                         # For the chunk length.
+import sqlite3                                      # For the baseline store.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pandas as pd                                 # For the alert rows.
+
+'''
+    Streaming anomaly scoring of DURATION_MS against a per-name baseline.
+    The baseline is an exponentially weighted mean and variance (EWMA / EWMV, weight alpha for the
+    newest pair). Each pair is scored against the baseline *before* it is folded in:
+        z = (duration - mean) / sqrt(var)
+    and flagged when |z| > z_threshold once the name has seen `warmup` pairs.
+    Only (count, mean, var) is kept per name, so scoring never re-reads history. The recursion is
+    linear, so a whole batch of one name is evaluated with numpy (see _ewm) instead of pair by pair.
+    The Engine runs flush() inside the state-store transaction of each checkpoint (the baseline
+    database is attached there), so the baselines always match the processed files.
+'''
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS baseline('
+    'name TEXT PRIMARY KEY, count INTEGER, mean REAL, var REAL) WITHOUT ROWID'
+)
+STD_EPS = 1e-6
+ALERT_COLUMNS = ['Name', 'X_TIME', 'Y_TIME', 'DURATION_MS', 'BASE_MEAN', 'BASE_STD', 'Z']
+
+'''
+    s[k] = decay * s[k-1] + u[k], s[-1] = s0, for all k at once.
+    Closed form s[k] = decay^(k+1) * (s0 + sum_{j<=k} u[j] / decay^(j+1)), evaluated in chunks
+    short enough that decay^-L stays far from overflow.
+'''
+def _ewm(s0, u, decay):
+    out = np.empty(len(u), dtype=np.float64)
+    step = max(1, int(200 / -math.log(decay)))
+    for a in range(0, len(u), step):
+        seg = u[a:a + step]
+        p = decay ** np.arange(1, len(seg) + 1, dtype=np.float64)
+        out[a:a + step] = p * (s0 + np.cumsum(seg / p))
+        s0 = out[a + len(seg) - 1]
+    return out
+
+class Baselines:
+    def __init__(self, path, alpha=0.02, z_threshold=4.0, warmup=50):
+        if not 0 < alpha < 1:
+            raise ValueError(f'anomaly alpha must be in (0, 1):{alpha}')
+        self.path = Path(path)
+        self.alpha, self.z, self.warmup = float(alpha), float(z_threshold), int(warmup)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._read()
+
+    def _read(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                conn.execute(SCHEMA)
+            self.state = {r[0]: (r[1], r[2], r[3]) for r in conn.execute('SELECT name, count, mean, var FROM baseline')}
+        finally:
+            conn.close()
+        self._dirty = set()
+
+    '''
+        Score the pairs of one name (in time order) and advance its baseline.
+        Return (base_mean, base_std, z, flagged), one entry per pair.
+    '''
+    def score_name(self, name, dur_ms):
+        x = np.asarray(dur_ms, dtype=np.float64)
+        n0, m0, v0 = self.state.get(str(name), (0, 0.0, 0.0))
+        if n0 == 0:
+            m0 = x[0]
+        a, b = self.alpha, 1.0 - self.alpha
+        mean = _ewm(m0, a * x, b)
+        m_prev = np.concatenate([[m0], mean[:-1]])
+        diff = x - m_prev
+        var = _ewm(v0, b * a * diff * diff, b)
+        v_prev = np.concatenate([[v0], var[:-1]])
+        std = np.sqrt(np.maximum(v_prev, 0.0))
+        # A constant history has no spread to score against (rounding of the closed form leaves ~1e-7 there).
+        spread = std > STD_EPS * np.maximum(np.abs(m_prev), 1.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where(spread, diff / std, 0.0)
+        seen = n0 + np.arange(len(x))
+        flagged = (seen >= self.warmup) & (np.abs(z) > self.z)
+        self.state[str(name)] = (n0 + len(x), float(mean[-1]), float(var[-1]))
+        self._dirty.add(str(name))
+        return m_prev, std, z, flagged
+
+    '''
+        Score a batch {name: (x_ns, y_ns, dur_ms)}. Return the flagged pairs as (DataFrame of
+        ALERT_COLUMNS with int64 ns times, sorted by X), or None if nothing was flagged.
+    '''
+    def score(self, pairs):
+        parts = []
+        for name, (x_ns, y_ns, dur_ms) in pairs.items():
+            if len(dur_ms) == 0:
+                continue
+            mean, std, z, flagged = self.score_name(name, dur_ms)
+            if flagged.any():
+                parts.append(pd.DataFrame({
+                    'Name': name, 'X_TIME': x_ns[flagged], 'Y_TIME': y_ns[flagged],
+                    'DURATION_MS': np.asarray(dur_ms)[flagged], 'BASE_MEAN': mean[flagged],
+                    'BASE_STD': std[flagged], 'Z': z[flagged],
+                }))
+        if not parts:
+            return None
+        return pd.concat(parts, ignore_index=True).sort_values('X_TIME', kind='stable', ignore_index=True)
+
+    def flush(self, conn, schema='main'):
+        conn.executemany(
+            f'INSERT OR REPLACE INTO {schema}.baseline(name, count, mean, var) VALUES(?, ?, ?, ?)',
+            [(n,) + self.state[n] for n in self._dirty],
+        )
+
+    '''
+        The names stay dirty until the transaction that flushed them is committed.
+        rollback() drops the scoring of an abandoned checkpoint: the baselines are read back from
+        the database, where they still match the processed files.
+    '''
+    def committed(self):
+        self._dirty.clear()
+
+    def rollback(self):
+        self._read()
@@ -0,0 +1,374 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import sys                                          #
+import time                                         # For timing.
+import logging                                      #
+import argparse                                     # For command line options.
+from collections import deque, defaultdict          # For the window of submitted days / per-day files.
+from concurrent.futures import ProcessPoolExecutor  # For scanning days on all cores.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pandas as pd                                 # For copying the outputs before the range.
+from engine import Engine, Config, PairsBatch, sanitize, iter_files  # The pipeline the generation is written with.
+from generation import Generation                   # For the generation paths and the swap.
+from state_store import day_of                      # For the day partition of a file.
+from signal_reader import SignalReader, read_signal_csv  # For reading the signal CSV.
+from edge import detect_edges                       # For vectorized rising-edge detection.
+from pairing import pair_name                       # For batch X/Y pairing.
+from timeutil import parse_time_ns                  # For the cutoff of the copied rows.
+
+'''
+    Parallel backfill: reprocess a range of day folders into a new output generation.
+    python backfill.py [--from YYYYMMDD] [--to YYYYMMDD] [--workers N] [--config config.toml]
+    Use it after changing debounce_n, the duration limits, the pairing strategy or the cross
+    table. Stop the resident run first.
+     1. Each day is scanned by a worker: read, edges, name expansion and pairing, starting from
+        an empty open-X queue and a carry seeded from the last row(s) of the previous day folder.
+     2. Days are merged in order. A name that still has open X from earlier days is re-paired
+        from its raw event times, file by file, exactly as a serial run would. If the carry the
+        previous day ended with differs from the seed (a signal missing from the seed files),
+        the day is scanned again here with the true carry. The result equals a serial run over
+        the same files.
+     3. Each merged day is committed (outputs, state, statistics, baselines) into <path>.gen
+        paths (see generation.py), which are swapped in at the end. The old generation is kept
+        as <path>.old-<stamp>.
+    With --from, the outputs of the earlier days are copied into the generation first (see
+    copy_before): their per-name CSV rows / parquet pairs, alerts and evicted X, and the duration
+    statistics and anomaly baselines rebuilt from those pairs, so readers of the live paths still
+    see the whole history. Files of earlier days keep their processed mark; their open X are
+    dropped. The snapshot/open X are those at the end of the range; later days are picked up by
+    the next normal run.
+'''
+SEED_FILES = 16                                     # Files of the previous day read for the seed (newest first).
+CHUNK_ROWS = 1_000_000                              # Rows per chunk when copying the earlier outputs.
+
+## Worker settings (set once per worker process by _init)
+_CTX = {}
+
+def _init(base, cross, encoding, header_row, debounce_n, fast_reader, strategy, dur_min, dur_max):
+    _CTX.update(
+        base=Path(base), cross=cross, signals=list(cross.signals), encoding=encoding, header_row=header_row,
+        debounce_n=debounce_n, strategy=strategy, dur_min=dur_min, dur_max=dur_max,
+    )
+    _CTX['reader'] = SignalReader(cross.signals, encoding, header_row) if fast_reader else None
+
+def _read(rel):
+    path = str(_CTX['base'] / rel)
+    if _CTX['reader'] is not None:
+        return _CTX['reader'].read(path)
+    return read_signal_csv(path, _CTX['signals'], _CTX['encoding'], _CTX['header_row'])
+
+'''
+    Carry at the start of a day: the last value of each signal in the previous day's files.
+    Signals not found in the last SEED_FILES files start at 0 (the merge checks the seed).
+'''
+def seed_carry(prev_rels):
+    n = len(_CTX['signals'])
+    carry = np.zeros(n, dtype=np.uint8)
+    todo = np.ones(n, dtype=bool)
+    for rel in list(reversed(prev_rels))[:SEED_FILES]:
+        sig = _read(rel)
+        if sig is None:
+            continue
+        _, mat, present, _ = sig
+        hit = todo & present
+        carry[hit] = mat[-1][hit]
+        todo &= ~present
+        if not todo.any():
+            break
+    return carry
+
+'''
+    Worker: scan the files of one day in order.
+    Return the day's carry in/out, the snapshot row, and per name id the raw X/Y edge times with
+    their file index, plus the pairs and open X of pairing from an empty queue.
+'''
+def scan_day(rels, prev_rels, seed=None):
+    c = _CTX
+    cross = c['cross']
+    carry = seed_carry(prev_rels) if seed is None else np.asarray(seed, dtype=np.uint8)
+    seed = carry.copy()
+    ev = defaultdict(lambda: ([], [], [], []))      # nid -> (x_t, x_file, y_t, y_file)
+    pr = defaultdict(lambda: ([], [], []))          # nid -> (x_paired, y_paired, dur_ms)
+    open_x = {}
+    last_row, rows = None, 0
+    for i, rel in enumerate(rels):
+        sig = _read(rel)
+        if sig is None:
+            continue
+        ts, mat, present, lr = sig
+        rows += len(ts)
+        rising, _, carry = detect_edges(mat, carry, c['debounce_n'], present)
+        last_row = (lr, carry.copy())
+        x_nid, x_t = cross.expand(ts, rising, 'x')
+        y_nid, y_t = cross.expand(ts, rising, 'y')
+        ids = np.union1d(x_nid, y_nid)
+        x_lo, x_hi = np.searchsorted(x_nid, ids, 'left'), np.searchsorted(x_nid, ids, 'right')
+        y_lo, y_hi = np.searchsorted(y_nid, ids, 'left'), np.searchsorted(y_nid, ids, 'right')
+        for k, nid in enumerate(ids.tolist()):
+            xs, ys = x_t[x_lo[k]:x_hi[k]], y_t[y_lo[k]:y_hi[k]]
+            e = ev[nid]
+            e[0].append(xs); e[1].append(np.full(len(xs), i, dtype=np.int32))
+            e[2].append(ys); e[3].append(np.full(len(ys), i, dtype=np.int32))
+            xp, yp, dur, open_x[nid] = pair_name(
+                open_x.get(nid, np.empty(0, dtype=np.int64)), xs, ys, c['strategy'], c['dur_min'], c['dur_max']
+            )
+            if len(dur):
+                p = pr[nid]
+                p[0].append(xp); p[1].append(yp); p[2].append(dur)
+
+    cat = lambda parts, dtype: np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+    names = {}
+    for nid, (xt, xf, yt, yf) in ev.items():
+        xp, yp, dur = pr[nid] if nid in pr else ([], [], [])
+        names[nid] = {
+            'x': cat(xt, np.int64), 'xf': cat(xf, np.int32), 'y': cat(yt, np.int64), 'yf': cat(yf, np.int32),
+            'xp': cat(xp, np.int64), 'yp': cat(yp, np.int64), 'dur': cat(dur, np.int64), 'open': open_x[nid],
+        }
+    return {'seed': seed, 'carry': carry, 'last_row': last_row, 'rows': rows, 'names': names}
+
+'''
+    Fold one scanned day into the generation engine (serial order) and return its batch.
+'''
+def merge_day(engine, rels, res):
+    c = engine.config
+    batch = PairsBatch(list(rels))
+    for nid, d in sorted(res['names'].items()):
+        name = engine.cross.names[nid]
+        carried = engine.open_x[name]
+        engine.metrics.add('events', len(d['x']) + len(d['y']))
+        if len(carried) == 0:
+            xp, yp, dur, engine.open_x[name] = d['xp'], d['yp'], d['dur'], d['open']
+            if len(dur):
+                batch._add(name, xp, yp, dur)
+            continue
+        # Open X from earlier days change this name's pairing: redo it file by file.
+        for f in np.union1d(d['xf'], d['yf']).tolist():
+            xs = d['x'][np.searchsorted(d['xf'], f, 'left'):np.searchsorted(d['xf'], f, 'right')]
+            ys = d['y'][np.searchsorted(d['yf'], f, 'left'):np.searchsorted(d['yf'], f, 'right')]
+            xp, yp, dur, engine.open_x[name] = pair_name(engine.open_x[name], xs, ys, c.pair_strategy, c.dur_min, c.dur_max)
+            if len(dur):
+                batch._add(name, xp, yp, dur)
+    engine.metrics.add('pairs', sum(len(v[2]) for v in batch.pairs.values()))
+    engine.metrics.add('files', len(rels))
+    engine.metrics.add('rows', res['rows'])
+    if res['last_row'] is not None:
+        last_row, engine.prev_row = res['last_row']  #Missing columns take the carry after that file.
+        engine.keep_snapshot(last_row.copy())
+    engine.prev_row = res['carry']
+    return batch
+
+## Outputs before the range
+'''
+    First TIME of the first readable file of the range. Files are processed in time order, so every
+    pair of an earlier file has its Y_TIME before it, and every pair of the range at or after it.
+'''
+def range_start_ns(rels):
+    for rel in rels:
+        sig = _read(rel)
+        if sig is not None and len(sig[0]):
+            return int(sig[0][0])
+    return None
+
+def _is_pair_csv(path):
+    with open(path, 'rb') as f:
+        return f.readline().startswith(b'X_TIME,')
+
+'''
+    Rows of a CSV of the live run whose `col` is before cutoff, as string frames in file order
+    (the text is copied unchanged). Read in chunks of CHUNK_ROWS.
+'''
+def _rows_before(path, col, cutoff, encoding):
+    for df in pd.read_csv(path, encoding=encoding, dtype=str, keep_default_na=False, chunksize=CHUNK_ROWS):
+        keep = parse_time_ns(df[col]) < cutoff
+        if keep.any():
+            yield df[keep]
+
+def _append(path, df, encoding):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, mode='a', index=False, header=not os.path.exists(path), encoding=encoding)
+
+'''
+    Copy the pairs the live generation made before `cutoff` (Y_TIME) into the new one, in their
+    original order per name: per-name CSVs and parquet as configured, and the same pairs folded
+    into the duration statistics and anomaly baselines. Alerts and evicted X before the cutoff are
+    copied too. The source is the per-name CSVs, or the parquet pairs when the CSVs are off.
+    Return the number of pairs copied.
+'''
+def copy_before(live, engine, cutoff):
+    c = engine.config
+    real = {sanitize(n): n for n in engine.cross.names}     # CSV / partition name -> name
+    to_csv = engine.pair_store is None or c.pq_csv
+    n = 0
+
+    def add(name, x, y, dur):
+        if engine.pair_store is not None:
+            engine.pair_store.write(name, x, y, dur)
+        if engine.stats is not None:
+            engine.stats.add(name, x, dur)
+        if engine.anomaly is not None and len(dur):
+            engine.anomaly.score_name(name, dur)
+
+    if live.parquet_dir is None or live.pq_csv:
+        src = Path(live.output_dir)
+        for p in sorted(src.glob('*.csv')) if src.is_dir() else []:
+            if not _is_pair_csv(p):
+                continue
+            for df in _rows_before(p, 'Y_TIME', cutoff, c.encoding):
+                add(real.get(p.stem, p.stem), parse_time_ns(df['X_TIME']), parse_time_ns(df['Y_TIME']),
+                    df['DURATION_MS'].astype(np.int64).to_numpy())
+                if to_csv:
+                    _append(Path(c.output_dir) / p.name, df, c.encoding)
+                n += len(df)
+    elif Path(live.parquet_dir).is_dir():
+        from pair_store import read_pairs
+        for nd in sorted(Path(live.parquet_dir).glob('name=*')):
+            df = read_pairs(live.parquet_dir, [real.get(nd.name[5:], nd.name[5:])])
+            for name, g in df.groupby('Name', sort=False):
+                x = g['X_TIME'].to_numpy().view(np.int64)
+                y = g['Y_TIME'].to_numpy().view(np.int64)
+                keep = y < cutoff
+                if not keep.any():
+                    continue
+                dur = g['DURATION_MS'].to_numpy(dtype=np.int64)[keep]
+                add(name, x[keep], y[keep], dur)
+                if to_csv:
+                    from timeutil import format_ns
+                    _append(Path(c.output_dir) / f'{sanitize(name)}.csv', pd.DataFrame({
+                        'X_TIME': format_ns(x[keep]), 'Y_TIME': format_ns(y[keep]), 'DURATION_MS': dur,
+                    }), c.encoding)
+                n += int(keep.sum())
+
+    for attr, col in (('alerts_path', 'Y_TIME'), ('evicted_path', 'CLOCK')):
+        src, dst = getattr(live, attr), getattr(c, attr)
+        if src is not None and dst is not None and os.path.exists(src):
+            for df in _rows_before(src, col, cutoff, c.encoding):
+                _append(dst, df, c.encoding)
+
+    engine.already.update([], engine._flush_hook)   # Statistics and baselines in one transaction.
+    if engine.stats is not None:
+        engine.stats.committed()
+    if engine.anomaly is not None:
+        engine.anomaly.committed()
+    return n
+
+'''
+    Files under base_dir grouped by day (YYYYMMDD), each day in mtime order.
+    Files without a date in their path cannot be placed in the day order: they are not backfilled
+    and are reported, so they can be moved into a day folder (the next normal run picks them up).
+'''
+def files_by_day(config):
+    base = Path(config.base_dir)
+    days = defaultdict(list)
+    for f in iter_files(base, config.csv_glob):
+        rel = f.relative_to(base).as_posix()
+        days[day_of(rel)].append((os.path.getmtime(f), rel))
+    undated = [r for _, r in sorted(days.pop('', []))]
+    if undated:
+        logging.warning(f'backfill:{len(undated)} files without a date in their path are not backfilled:'
+                        f"{', '.join(undated[:5])}{' ...' if len(undated) > 5 else ''}")
+    return {d: [r for _, r in sorted(v)] for d, v in sorted(days.items())}
+
+'''
+    Scan jobs [(day, rels, prev_rels)] and yield (day, result) in order.
+    At most `window` days are in flight, so memory stays bounded on a long range.
+'''
+def iter_days(jobs, workers, ctx, window=None):
+    if workers <= 1:
+        _init(*ctx)
+        for d, rels, prev_rels in jobs:
+            yield d, scan_day(rels, prev_rels)
+        return
+    window = window or workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=ctx) as ex:
+        it = iter(jobs)
+        q = deque()
+        for d, rels, prev_rels in it:
+            q.append((d, ex.submit(scan_day, rels, prev_rels)))
+            if len(q) >= window:
+                break
+        while q:
+            d, fut = q.popleft()
+            for nd, rels, prev_rels in it:
+                q.append((nd, ex.submit(scan_day, rels, prev_rels)))
+                break
+            yield d, fut.result()
+
+'''
+    Backfill the days start..end (YYYYMMDD, None:open) of `config` and swap the result in.
+    Return the processed days {day: [rel, ...]}.
+'''
+def backfill(config, start=None, end=None, workers=0):
+    live = Engine(config)
+    live._load()                                    # Finishes an interrupted checkpoint/swap of the live paths.
+    before = [r for d in sorted(live.already.days()) if start is not None and d < start for r in live.already.processed_in(d)]
+    live.close()
+
+    all_days = files_by_day(config)
+    order = list(all_days)
+    days = {d: v for d, v in all_days.items() if (start is None or d >= start) and (end is None or d <= end)}
+    if not days:
+        raise ValueError(f'backfill:no day folders in range {start}..{end}')
+    if config.recent_days > 0:
+        logging.warning('backfill:recent_days is ignored, the range decides the days')
+    jobs = []
+    for d, rels in days.items():
+        k = order.index(d)
+        jobs.append((d, rels, all_days[order[k - 1]] if k > 0 else []))
+
+    gen = Generation(config)
+    gen.prepare()
+    engine = Engine(gen.config)
+    engine._load()
+    engine.already.update(before)                   # Days before the range stay done.
+    c = engine.config
+    ctx = (str(c.base_dir), engine.cross, c.encoding, c.header_row, c.debounce_n, c.fast_reader,
+           c.pair_strategy, c.dur_min, c.dur_max)
+    workers = workers or os.cpu_count() or 1
+    logging.info(f'backfill:{len(days)} days {min(days)}..{max(days)}, {sum(len(v) for v in days.values())} files, {workers} workers')
+
+    t0 = time.perf_counter()
+    first, rescans = True, 0
+    try:
+        if before:
+            _init(*ctx)
+            cutoff = range_start_ns(days[min(days)])
+            if cutoff is not None:
+                logging.info(f'backfill:{copy_before(config, engine, cutoff)} pairs before {min(days)} copied into the generation')
+        for d, res in iter_days(jobs, workers, ctx):
+            if not first and not np.array_equal(res['seed'], engine.prev_row):
+                _init(*ctx)
+                res = scan_day(days[d], [], engine.prev_row)  #Seed was wrong: redo with the true carry.
+                rescans += 1
+            first = False
+            engine.commit(merge_day(engine, days[d], res))
+            logging.info(f'backfill:{d} files:{len(days[d])} rows:{res["rows"]}')
+        engine.metrics.set('backfill_rescans', rescans)
+        engine.metrics.write()
+    finally:
+        engine.close()
+    backups = gen.swap()
+    logging.info(f'backfill:done in {time.perf_counter() - t0:.1f}s, rescanned days:{rescans}')
+    for b in backups:
+        logging.info(f'backfill:previous generation kept at {b}')
+    return days
+
+def main(argv=None):
+    from main import setup_logging
+    parser = argparse.ArgumentParser(description='detect_sys parallel backfill')
+    parser.add_argument('--from', dest='start', default=None, help='first day YYYYMMDD (default: oldest)')
+    parser.add_argument('--to', dest='end', default=None, help='last day YYYYMMDD (default: newest)')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes (default: all cores)')
+    parser.add_argument('--config', default=None, help='config.toml (default: next to main.py)')
+    args = parser.parse_args(argv)
+
+    config = Config.load(args.config)
+    setup_logging(config.run_base / 'logs', level=logging.INFO)
+    try:
+        backfill(config, args.start, args.end, args.workers)
+    except (ValueError, FileNotFoundError) as e:
+        logging.error(str(e))
+        raise
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,98 @@
+## Standard library
+import sys                                          #
+import time                                         # For timing.
+import argparse                                     # For command line options.
+import tempfile                                     # For the synthetic sample file.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pandas as pd                                 # For data analysis.
+from engine import Config, iter_files               # Same settings as main.py.
+from signal_reader import SignalReader, read_signal_csv     # The two readers to compare.
+from cross_table import CrossMap                    # Signals of the cross table.
+
+'''
+    Benchmark of the signal-CSV readers: pandas path (read_signal_csv) vs SignalReader.
+    python bench_reader.py [files or folders ...] [--repeat N] [--rows R] [--limit K] [--config config.toml]
+    Without paths, files under BASE_DIR are used; if there are none, a synthetic file is written.
+'''
+
+'''
+    Signals of the cross table, in the same order as main.py.
+'''
+def load_signals(config):
+    return CrossMap.load(config.cross_xlsx, config.cross_cache).signals
+
+'''
+    Write one synthetic equipment CSV (2 preamble lines, header, TIME + 0/1 flags).
+'''
+def write_sample(path, signals, rows, encoding):
+    rng = np.random.default_rng(0)
+    t0 = np.datetime64('2026-03-05T13:00:00.000')
+    vals = (rng.random((rows, len(signals))) < 0.3).astype(np.uint8)
+    lines = ['PREAMBLE', 'PREAMBLE', ','.join(['TIME'] + list(signals))]
+    for i in range(rows):
+        t = pd.Timestamp(t0 + np.timedelta64(i * 10, 'ms')).strftime('%Y/%m/%d %H:%M:%S.%f')[:-3]
+        lines.append(t + ',' + ','.join('01'[v] for v in vals[i]))
+    Path(path).write_bytes(('\r\n'.join(lines) + '\r\n').encode(encoding))
+
+def collect(paths, limit, globs):
+    files = []
+    for p in paths:
+        p = Path(p)
+        files += sorted(iter_files(p, globs)) if p.is_dir() else [p]
+    return [str(f) for f in files[:limit]]
+
+'''
+    Time fn over all files `repeat` times and return seconds per file (best run).
+'''
+def timeit(fn, files, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for f in files:
+            fn(f)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(files)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='signal CSV reader benchmark')
+    parser.add_argument('paths', nargs='*', help='CSV files or folders (default: BASE_DIR)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=1000, help='rows of the synthetic file')
+    parser.add_argument('--limit', type=int, default=200, help='max files to read')
+    parser.add_argument('--config', default=None, help='config.toml (default: next to main.py)')
+    args = parser.parse_args(argv)
+
+    config = Config.load(args.config)
+    enc, hdr_row, base_dir = config.encoding, config.header_row, config.base_dir
+    signals = load_signals(config)
+    files = collect(args.paths or ([base_dir] if base_dir is not None and Path(base_dir).exists() else []), args.limit, config.csv_glob)
+    tmp = None
+    if not files:
+        tmp = tempfile.TemporaryDirectory()
+        files = [str(Path(tmp.name) / 'INPUT_M_SAMPLE.CSV')]
+        write_sample(files[0], signals, args.rows, enc)
+
+    reader = SignalReader(signals, enc, hdr_row)
+    # Same result check before timing.
+    for f in files:
+        a = read_signal_csv(f, signals, enc, hdr_row)
+        b = reader.read(f)
+        if a is None or b is None:
+            if (a is None) != (b is None):
+                raise SystemExit(f'result mismatch: {f}')
+            continue
+        if not all(np.array_equal(x, y) for x, y in zip(a[:3], b[:3])):
+            raise SystemExit(f'result mismatch: {f}')
+
+    t_pd = timeit(lambda f: read_signal_csv(f, signals, enc, hdr_row), files, args.repeat)
+    t_fast = timeit(reader.read, files, args.repeat)
+    print(f'files:{len(files)} signals:{len(signals)} fallbacks:{reader.fallbacks}')
+    print(f'pandas : {t_pd * 1000:8.2f} ms/file')
+    print(f'fast   : {t_fast * 1000:8.2f} ms/file')
+    print(f'speedup: {t_pd / t_fast:8.1f}x')
+    if tmp is not None:
+        tmp.cleanup()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,183 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import sys                                          #
+import json                                         # For the result file.
+import time                                         # For timing.
+import shutil                                       # For copying the application.
+import argparse                                     # For command line options.
+import tempfile                                     # For the default work folder.
+import subprocess                                   # For running main.py as in production.
+from pathlib import Path                            # For filesystem path and operations.
+from gen_logs import LogModel, generate             # For the synthetic backlog.
+from engine import Engine, Config, load_toml        # For the stage breakdown.
+
+'''
+    Throughput benchmark of the whole pipeline on a synthetic backlog.
+    python bench_suite.py [--scenarios 1d,30d,1y] [--files-per-day K] [--workers W] [--json out.json]
+    For each scenario a fresh work folder gets the generated logs, a copy of the application and a
+    config.toml, then main.py is run once on the whole backlog (cold) and once more with nothing new
+    (rescan). Reported: files/sec, rows/sec and peak memory of the cold run, the rescan time, and
+    ms/file of each stage measured in-process (Engine metrics) on a sample of the files.
+    The equipment writes 8640 files a day; --files-per-day scales a long backlog down to fit a disk.
+'''
+SCENARIOS = {'1d': 1, '30d': 30, '1y': 365}
+APP_FILES = '*.py'
+STAGES = ['discover', 'read', 'prefetch_wait', 'parse_wait', 'edges', 'pair', 'output', 'state']   # Metrics stages reported
+
+'''
+    Peak resident memory (MB) of this process and its finished children, or None if unknown.
+'''
+def peak_mb():
+    try:
+        import resource
+        self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        scale = 1 / (1024 * 1024) if sys.platform == 'darwin' else 1 / 1024  # bytes on macOS, KB elsewhere
+        return max(self_kb, child_kb) * scale
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)  # Windows
+    except (ImportError, AttributeError):
+        return None
+
+'''
+    Child side: run main.py as __main__ and write the peak memory to BENCH_PEAK_FILE.
+'''
+def _run_main():
+    import runpy
+    try:
+        runpy.run_path('main.py', run_name='__main__')
+    except SystemExit:
+        pass
+    finally:
+        Path(os.environ['BENCH_PEAK_FILE']).write_text(json.dumps({'peak_mb': peak_mb()}))
+
+def write_config(app, data, workers, reader):
+    (app / 'config.toml').write_text('\n'.join([
+        '[io]', 'encoding = "cp932"', 'header_row = 2', f'reader = "{reader}"',
+        '[paths]', f'base_dir = {json.dumps(str(data))}', 'glob_csv = "*.CSV"',
+        '[parallel]', f'workers = {int(workers)}', 'min_files = 32', '',
+    ]), encoding='utf-8')
+
+def run_app(app):
+    peak_file = app / 'peak.json'
+    env = dict(os.environ, BENCH_PEAK_FILE=str(peak_file))
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', 'import bench_suite; bench_suite._run_main()'],
+        cwd=app, env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+    sec = time.perf_counter() - t0
+    return sec, json.loads(peak_file.read_text())['peak_mb']
+
+'''
+    Time each stage of the pipeline in-process on the first `sample` files: the Engine of the
+    scenario's config.toml (same reader, workers, debounce, pairing and windows as the cold run),
+    with its outputs and state in `scratch`, timed by its own Metrics.
+    discover is the time for the whole backlog, the other stages are per file.
+'''
+def stage_times(app, scratch, sample):
+    config = Config(load_toml(app / 'config.toml'), scratch)
+    config.cross_xlsx = app / 'table' / 'd_tube_assembly.xlsx'
+    config.metrics_enable, config.metrics_dir, config.metrics_prom = True, None, None
+    engine = Engine(config)
+    try:
+        files = engine.find_pending()[:sample]
+        engine.process(files)
+        snap = engine.metrics.snapshot()
+    finally:
+        engine.close()
+
+    n = max(len(files), 1)
+    per_file = {k: (v['sec'] if k == 'discover' else v['sec'] / n) * 1000 for k, v in snap['stages'].items()}
+    counts = snap['counts']
+    return {'sample_files': len(files), 'sample_rows': counts.get('rows', 0), 'sample_pairs': counts.get('pairs', 0),
+            'stage_ms': per_file}
+
+def run_scenario(label, days, args, root):
+    work = root / label
+    if work.exists():
+        shutil.rmtree(work)
+    t0 = time.perf_counter()
+    model = LogModel(args.names, args.signals, args.seed)
+    files, rows = generate(work, model, args.start, days, args.rate, 10, args.files_per_day)
+    gen_sec = time.perf_counter() - t0
+
+    app = work / 'app'
+    (app / 'table').mkdir(parents=True)
+    for f in Path(__file__).resolve().parent.glob(APP_FILES):
+        shutil.copy2(f, app / f.name)
+    shutil.copy2(work / 'table' / 'd_tube_assembly.xlsx', app / 'table' / 'd_tube_assembly.xlsx')
+    write_config(app, (work / 'data').resolve(), args.workers, args.reader)
+
+    cold_sec, peak = run_app(app)
+    rescan_sec, _ = run_app(app)
+    res = {
+        'scenario': label, 'days': days, 'files': files, 'rows': rows,
+        'gen_sec': gen_sec, 'cold_sec': cold_sec, 'rescan_sec': rescan_sec,
+        'files_per_sec': files / cold_sec, 'rows_per_sec': rows / cold_sec, 'peak_mb': peak,
+    }
+    res.update(stage_times(app, work / 'stages', args.stage_sample))
+    if not args.keep:
+        shutil.rmtree(work)
+    return res
+
+def report(results):
+    print(f"{'scenario':>8} {'files':>8} {'rows':>11} {'files/s':>9} {'rows/s':>11} {'peak MB':>8} {'cold s':>8} {'rescan s':>9}")
+    for r in results:
+        peak = f"{r['peak_mb']:8.1f}" if r['peak_mb'] is not None else f"{'-':>8}"
+        print(f"{r['scenario']:>8} {r['files']:>8} {r['rows']:>11} {r['files_per_sec']:9.1f} {r['rows_per_sec']:11.0f} "
+              f"{peak} {r['cold_sec']:8.2f} {r['rescan_sec']:9.2f}")
+    print()
+    print(f"{'scenario':>8} " + ' '.join(f'{s[:9]:>9}' for s in STAGES) + '   (discover: s for the backlog, others: ms/file)')
+    for r in results:
+        st = r['stage_ms']
+        print(f"{r['scenario']:>8} {st.get('discover', 0.0) / 1000:9.3f} " + ' '.join(f'{st.get(s, 0.0):9.3f}' for s in STAGES[1:]))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='detect_sys throughput benchmark')
+    parser.add_argument('--scenarios', default='1d,30d,1y', help=f'comma separated, from {list(SCENARIOS)}')
+    parser.add_argument('--files-per-day', type=int, default=144, help='files per day folder (production: 8640)')
+    parser.add_argument('--rate', type=float, default=10.0, help='rows per second')
+    parser.add_argument('--names', type=int, default=76)
+    parser.add_argument('--signals', type=int, default=160)
+    parser.add_argument('--start', default='20260101')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=0, help='[parallel] workers for main.py')
+    parser.add_argument('--reader', default='fast', choices=['fast', 'pandas'])
+    parser.add_argument('--stage-sample', type=int, default=500, help='files used for the stage breakdown')
+    parser.add_argument('--work', default=None, help='work folder (default: a temp folder)')
+    parser.add_argument('--keep', action='store_true', help='keep the generated files')
+    parser.add_argument('--json', default=None, help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    labels = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    for s in labels:
+        if s not in SCENARIOS:
+            raise SystemExit(f'unknown scenario:{s} (choose from {list(SCENARIOS)})')
+
+    tmp = None
+    if args.work is None:
+        tmp = tempfile.TemporaryDirectory(prefix='detect_bench_')
+        root = Path(tmp.name)
+    else:
+        root = Path(args.work)
+        root.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    try:
+        for s in labels:
+            results.append(run_scenario(s, SCENARIOS[s], args, root))
+            print(f"[{s}] files:{results[-1]['files']} cold:{results[-1]['cold_sec']:.1f}s", flush=True)
+    finally:
+        if tmp is not None and not args.keep:
+            tmp.cleanup()
+
+    report(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
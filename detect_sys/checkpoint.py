@@ -0,0 +1,96 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import json                                         # For the journal file.
+import logging                                      #
+from pathlib import Path                            # For filesystem path and operations.
+
+'''
+    Journal that makes one checkpoint (pairs + output.csv + previous snapshot + processed state)
+    all-or-nothing.
+     1. begin()  : record the size of every per-name CSV about to be appended, the first parquet
+                   stamp, and the tmp -> final replacements of output.csv and the snapshot.
+     2. the caller appends the pairs and writes output.csv / the snapshot to their tmp names.
+     3. the caller adds the files to the state store (one SQLite transaction = the commit point).
+     4. finish() : move the tmp files into place and delete the journal.
+    After a crash, recover() looks at the state store: if the journal's files are there the
+    checkpoint is rolled forward (step 4), otherwise it is rolled back (CSVs truncated to their
+    recorded size, new parquet files and tmp files removed). Either way the snapshot, output.csv
+    and the state describe the same set of files.
+'''
+class Checkpoint:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._j = None
+
+    def _write(self, j):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(j, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    '''
+        files   :processed files of this checkpoint (relative to base_dir)
+        appends :per-name CSV paths that will be appended
+        replace :[(tmp, final)] written before the commit, moved into place after it
+        remove  :paths to delete after the commit
+        pq_since:first parquet stamp of this checkpoint (None:no parquet output)
+    '''
+    def begin(self, files, appends, replace=(), remove=(), pq_since=None):
+        sizes = {str(p): (os.path.getsize(p) if os.path.exists(p) else -1) for p in appends}
+        self._j = {
+            'files': list(files), 'sizes': sizes, 'pq_since': pq_since,
+            'replace': [[str(a), str(b)] for a, b in replace], 'remove': [str(p) for p in remove],
+        }
+        self._write(self._j)
+
+    def finish(self):
+        if self._j is None:
+            return
+        self._roll_forward(self._j)
+        self._j = None
+
+    def _roll_forward(self, j):
+        for tmp, final in j['replace']:
+            if os.path.exists(tmp):
+                os.replace(tmp, final)
+        for p in j['remove']:
+            if os.path.exists(p):
+                os.remove(p)
+        self.path.unlink(missing_ok=True)
+
+    def _roll_back(self, j, pair_store):
+        for p, size in j['sizes'].items():
+            if size < 0:
+                Path(p).unlink(missing_ok=True)
+            elif os.path.exists(p) and os.path.getsize(p) > size:
+                with open(p, 'r+b') as f:
+                    f.truncate(size)
+        if j.get('pq_since') is not None and pair_store is not None:
+            pair_store.rollback(j['pq_since'])
+        for tmp, _ in j['replace']:
+            Path(tmp).unlink(missing_ok=True)
+        self.path.unlink(missing_ok=True)
+
+    '''
+        Finish or undo a checkpoint left by a crash. Call before loading the snapshot and output.csv.
+    '''
+    def recover(self, already, pair_store=None):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                j = json.load(f)
+        except (OSError, ValueError):
+            logging.warning(f'checkpoint:unreadable journal {self.path}, removed')
+            self.path.unlink(missing_ok=True)
+            return
+        files = j.get('files') or []
+        if files and all(r in already for r in files):
+            logging.warning(f'checkpoint:completing an interrupted checkpoint ({len(files)} files)')
+            self._roll_forward(j)
+        else:
+            logging.warning(f'checkpoint:rolling back an interrupted checkpoint ({len(files)} files)')
+            self._roll_back(j, pair_store)
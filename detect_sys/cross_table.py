@@ -0,0 +1,146 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import json                                         # For the names in the cache.
+import hashlib                                      # For the content hash of the xlsx.
+import logging                                      #
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+from timeutil import NAT_NS                         # Missing TIME.
+
+'''
+    Compiled cross table (d_tube_assembly.xlsx: name / x / y).
+    Each row maps signal x to the X side and signal y to the Y side of its name. Compiled form:
+     signals        :sorted signal names (column order of the edge matrix)
+     names          :name of each name id
+     x_ptr, x_idx   :CSR map signal index -> name ids on the X side (x_idx[x_ptr[j]:x_ptr[j+1]])
+     y_ptr, y_idx   :same for the Y side
+    expand() turns a rising-edge matrix into (name id, time) events with array ops only.
+    The compiled arrays are cached next to the table. The cache is used while the xlsx path and
+    mtime match, or, after a touch/copy, while the content hash still matches, so openpyxl is
+    only loaded when the table really changed.
+'''
+CACHE_VERSION = 1
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _plain(v):
+    return v.item() if isinstance(v, np.generic) else v
+
+'''
+    CSR arrays from (signal index, name id) entries, kept in table row order within a signal.
+'''
+def _csr(sig, nid, n_signals):
+    sig = np.asarray(sig, dtype=np.int64)
+    nid = np.asarray(nid, dtype=np.int64)
+    order = np.argsort(sig, kind='stable')
+    ptr = np.zeros(n_signals + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sig, minlength=n_signals), out=ptr[1:])
+    return ptr, nid[order]
+
+class CrossMap:
+    def __init__(self, signals, names, x_ptr, x_idx, y_ptr, y_idx):
+        self.signals = list(signals)
+        self.names = list(names)
+        self.x_ptr, self.x_idx = x_ptr, x_idx
+        self.y_ptr, self.y_idx = y_ptr, y_idx
+
+    '''
+        Compile a DataFrame with the columns name, x, y.
+    '''
+    @classmethod
+    def from_frame(cls, cross):
+        for col in ['name', 'x', 'y']:
+            if col not in cross.columns:
+                raise ValueError('CROSS_XLSX does not contain the columns [name], [x] and [y]')
+        names_raw = [_plain(v) for v in cross['name'].tolist()]
+        xs = cross['x'].astype(str).tolist()
+        ys = cross['y'].astype(str).tolist()
+        signals = sorted(set(xs) | set(ys))
+        sig_id = {s: j for j, s in enumerate(signals)}
+        name_id = {}
+        for nm in names_raw:
+            name_id.setdefault(nm, len(name_id))
+        nid = [name_id[nm] for nm in names_raw]
+        x_ptr, x_idx = _csr([sig_id[s] for s in xs], nid, len(signals))
+        y_ptr, y_idx = _csr([sig_id[s] for s in ys], nid, len(signals))
+        return cls(signals, list(name_id), x_ptr, x_idx, y_ptr, y_idx)
+
+    def save(self, path, key):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = json.dumps({'version': CACHE_VERSION, 'key': key, 'signals': self.signals, 'names': self.names}, ensure_ascii=False)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(f, meta=np.array(meta), x_ptr=self.x_ptr, x_idx=self.x_idx, y_ptr=self.y_ptr, y_idx=self.y_idx)
+        os.replace(tmp, path)
+
+    '''
+        Return (meta, CrossMap) from a cache file, or (None, None) if it can't be read.
+    '''
+    @classmethod
+    def _read_cache(cls, path):
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                meta = json.loads(str(z['meta']))
+                if meta.get('version') != CACHE_VERSION:
+                    return None, None
+                return meta, cls(meta['signals'], meta['names'], z['x_ptr'], z['x_idx'], z['y_ptr'], z['y_idx'])
+        except (OSError, ValueError, KeyError, EOFError):  #EOFError:empty file
+            return None, None
+
+    '''
+        Load the compiled map of `xlsx`, from `cache` when it is still valid (cache:None disables it).
+    '''
+    @classmethod
+    def load(cls, xlsx, cache=None):
+        xlsx = Path(xlsx)
+        st = os.stat(xlsx)
+        key = {'path': str(xlsx.resolve()), 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+        if cache is not None and os.path.exists(cache):
+            meta, cm = cls._read_cache(cache)
+            if cm is not None:
+                old = meta['key']
+                same_file = old.get('path') == key['path'] and old.get('size') == key['size']
+                if same_file and old.get('mtime_ns') == key['mtime_ns']:
+                    return cm
+                if same_file and old.get('sha256') == file_hash(xlsx):
+                    cls._save_cache(cm, cache, dict(key, sha256=old['sha256'])) #Touched but unchanged: refresh the mtime.
+                    return cm
+
+        import pandas as pd
+        cm = cls.from_frame(pd.read_excel(xlsx, engine='openpyxl'))
+        if cache is not None:
+            cls._save_cache(cm, cache, dict(key, sha256=file_hash(xlsx)))
+        return cm
+
+    @staticmethod
+    def _save_cache(cm, cache, key):
+        try:
+            cm.save(cache, key)
+        except OSError:
+            logging.warning(f'cross table cache not written:{cache}')
+
+    '''
+        Events of one side from a rising-edge matrix (rows, signals) and its times.
+        Return (name_ids, times) sorted by name id, then time. Rows without a TIME are dropped.
+    '''
+    def expand(self, ts, rising, side):
+        ptr, idx = (self.x_ptr, self.x_idx) if side == 'x' else (self.y_ptr, self.y_idx)
+        r, j = np.nonzero(rising)
+        t = ts[r]
+        keep = t != NAT_NS
+        j, t = j[keep], t[keep]
+        cnt = ptr[j + 1] - ptr[j]
+        total = int(cnt.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        start = np.repeat(ptr[j] - (np.cumsum(cnt) - cnt), cnt) + np.arange(total)
+        nid = idx[start]
+        times = np.repeat(t, cnt)
+        order = np.lexsort((times, nid))
+        return nid[order], times[order]
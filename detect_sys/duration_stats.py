@@ -0,0 +1,228 @@
+## Standard library
+import math                                         # For the sketch bucket width.
+import sqlite3                                      # For the statistics store.
+from collections import defaultdict                 # For the pending deltas.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pandas as pd                                 # For query results.
+
+'''
+    Online DURATION_MS statistics per (name, day of X_TIME).
+    Each day keeps count, mean, M2 (for the variance), min, max and a quantile sketch. All of them
+    merge exactly (Chan's formula for mean/M2, bucket sums for the sketch), so any range of days is
+    answered from the stored rows without reading the pair CSVs.
+    The sketch is a log-bucket histogram (DDSketch): every quantile is within ALPHA relative error
+    of a true sample value, and merging is a plain sum of bucket counts, so the result does not
+    depend on the order pairs arrive in.
+'''
+ALPHA = 0.01
+_GAMMA = (1 + ALPHA) / (1 - ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+'''
+    Bucket-count quantile sketch. keys:int64 bucket index (sorted), counts:int64.
+    Values <= 0 go to a separate zero bucket.
+'''
+class Sketch:
+    __slots__ = ('keys', 'counts', 'zero')
+
+    def __init__(self, keys=None, counts=None, zero=0):
+        self.keys = np.empty(0, dtype=np.int64) if keys is None else np.asarray(keys, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.zero = int(zero)
+
+    @classmethod
+    def of(cls, values):
+        v = np.asarray(values, dtype=np.float64)
+        pos = v[v > 0]
+        keys, counts = np.unique(np.ceil(np.log(pos) / _LOG_GAMMA).astype(np.int64), return_counts=True)
+        return cls(keys, counts, int((v <= 0).sum()))
+
+    def merge(self, other):
+        keys = np.concatenate([self.keys, other.keys])
+        counts = np.concatenate([self.counts, other.counts])
+        uk, inv = np.unique(keys, return_inverse=True)
+        return Sketch(uk, np.bincount(inv, weights=counts, minlength=len(uk)).astype(np.int64), self.zero + other.zero)
+
+    def count(self):
+        return self.zero + int(self.counts.sum())
+
+    '''
+        Quantiles for q in [0, 1] (array-like). NaN for an empty sketch.
+    '''
+    def quantiles(self, q):
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        n = self.count()
+        if n == 0:
+            return np.full(len(q), np.nan)
+        rank = q * (n - 1)
+        cum = self.zero + np.cumsum(self.counts)
+        i = np.searchsorted(cum, rank, side='right')
+        vals = 2 * _GAMMA ** self.keys[np.minimum(i, len(self.keys) - 1)].astype(np.float64) / (_GAMMA + 1) if len(self.keys) else np.zeros(len(q))
+        return np.where(rank < self.zero, 0.0, vals)
+
+    def to_bytes(self):
+        return np.concatenate([[self.zero, len(self.keys)], self.keys, self.counts]).astype('<i8').tobytes()
+
+    @classmethod
+    def from_bytes(cls, b):
+        a = np.frombuffer(b, dtype='<i8')
+        n = int(a[1])
+        return cls(a[2:2 + n].copy(), a[2 + n:2 + 2 * n].copy(), int(a[0]))
+
+'''
+    Moments and sketch of one (name, day).
+'''
+class DayStats:
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max', 'sketch')
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, vmin=None, vmax=None, sketch=None):
+        self.count, self.mean, self.m2 = int(count), float(mean), float(m2)
+        self.min, self.max = vmin, vmax
+        self.sketch = sketch if sketch is not None else Sketch()
+
+    @classmethod
+    def of(cls, values):
+        v = np.asarray(values, dtype=np.float64)
+        if len(v) == 0:
+            return cls()
+        mean = float(v.mean())
+        return cls(len(v), mean, float(((v - mean) ** 2).sum()), int(v.min()), int(v.max()), Sketch.of(v))
+
+    def merge(self, o):
+        if o.count == 0:
+            return self
+        if self.count == 0:
+            return o
+        n = self.count + o.count
+        d = o.mean - self.mean
+        return DayStats(
+            n, self.mean + d * o.count / n, self.m2 + o.m2 + d * d * self.count * o.count / n,
+            min(self.min, o.min), max(self.max, o.max), self.sketch.merge(o.sketch),
+        )
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else float('nan')
+
+    '''
+        Quantiles clamped to the exact min/max.
+    '''
+    def quantiles(self, q):
+        if self.count == 0:
+            return np.full(len(np.atleast_1d(q)), np.nan)
+        return np.clip(self.sketch.quantiles(q), self.min, self.max)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS day_stats('
+    'name TEXT NOT NULL, day TEXT NOT NULL, count INTEGER, mean REAL, m2 REAL, min INTEGER, max INTEGER, '
+    'sketch BLOB, PRIMARY KEY(name, day)) WITHOUT ROWID'
+)
+
+def _row_stats(r):
+    return DayStats(r[0], r[1], r[2], r[3], r[4], Sketch.from_bytes(r[5]))
+
+'''
+    Writer: add() accumulates deltas in memory; flush(conn, schema) merges them into the stored
+    rows. The Engine runs flush inside the state-store transaction of each checkpoint (the stats
+    database is attached there), so the statistics never count a file twice or miss one.
+'''
+class DurationStats:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                conn.execute(SCHEMA)
+        finally:
+            conn.close()
+        self._delta = defaultdict(DayStats)  # (name, day) -> DayStats
+
+    '''
+        Add the pairs of one name. The day is the local date of X_TIME.
+    '''
+    def add(self, name, x_ns, dur_ms):
+        if len(dur_ms) == 0:
+            return
+        day = np.floor_divide(np.asarray(x_ns, dtype=np.int64), NS_PER_DAY)
+        dur_ms = np.asarray(dur_ms)
+        for d in np.unique(day):
+            key = (str(name), np.datetime64(int(d), 'D').astype(str).replace('-', ''))
+            self._delta[key] = self._delta[key].merge(DayStats.of(dur_ms[day == d]))
+
+    '''
+        The deltas stay until the transaction that flushed them is known to be committed:
+        committed() drops them once it is, discard() when the checkpoint is abandoned (its files
+        are processed again, so keeping them would count those pairs twice).
+    '''
+    def committed(self):
+        self._delta.clear()
+
+    def discard(self):
+        self._delta.clear()
+
+    def flush(self, conn, schema='main'):
+        for (name, day), st in self._delta.items():
+            r = conn.execute(
+                f'SELECT count, mean, m2, min, max, sketch FROM {schema}.day_stats WHERE name=? AND day=?', (name, day)
+            ).fetchone()
+            if r is not None:
+                st = _row_stats(r).merge(st)
+            conn.execute(
+                f'INSERT OR REPLACE INTO {schema}.day_stats(name, day, count, mean, m2, min, max, sketch) '
+                'VALUES(?, ?, ?, ?, ?, ?, ?, ?)',
+                (name, day, st.count, st.mean, st.m2, st.min, st.max, st.sketch.to_bytes()),
+            )
+
+'''
+    Read side. Days are YYYYMMDD strings (inclusive range), names a name or a list (None:all).
+'''
+def _select(path, names, start_day, end_day):
+    sql = 'SELECT name, day, count, mean, m2, min, max, sketch FROM day_stats WHERE 1=1'
+    args = []
+    if names is not None:
+        names = [names] if isinstance(names, str) else list(names)
+        sql += f" AND name IN ({','.join('?' * len(names))})"
+        args += [str(n) for n in names]
+    if start_day is not None:
+        sql += ' AND day >= ?'
+        args.append(str(start_day))
+    if end_day is not None:
+        sql += ' AND day <= ?'
+        args.append(str(end_day))
+    conn = sqlite3.connect(Path(path))
+    try:
+        return conn.execute(sql + ' ORDER BY name, day', args).fetchall()
+    finally:
+        conn.close()
+
+def _frame(rows, q):
+    cols = ['count', 'mean', 'std', 'min', 'max'] + [f'q{x:g}' for x in q]
+    return pd.DataFrame(rows, columns=cols) if rows else pd.DataFrame(columns=cols)
+
+'''
+    Daily statistics and quantile bands: one row per (name, day).
+'''
+def daily_stats(path, names=None, start_day=None, end_day=None, q=(0.01, 0.5, 0.99)):
+    keys, rows = [], []
+    for r in _select(path, names, start_day, end_day):
+        st = _row_stats(r[2:])
+        keys.append((r[0], r[1]))
+        rows.append([st.count, st.mean, st.std(), st.min, st.max] + list(st.quantiles(q)))
+    df = _frame(rows, q)
+    df.insert(0, 'name', [k[0] for k in keys])
+    df.insert(1, 'day', [k[1] for k in keys])
+    return df
+
+'''
+    Statistics of each name merged over a range of days: one row per name.
+'''
+def merged_stats(path, names=None, start_day=None, end_day=None, q=(0.01, 0.5, 0.99)):
+    acc = {}
+    for r in _select(path, names, start_day, end_day):
+        acc[r[0]] = acc.get(r[0], DayStats()).merge(_row_stats(r[2:]))
+    rows = [[st.count, st.mean, st.std(), st.min, st.max] + list(st.quantiles(q)) for st in acc.values()]
+    df = _frame(rows, q)
+    df.insert(0, 'name', list(acc))
+    return df
@@ -0,0 +1,79 @@
+## Standard library
+import numpy as np                                  # For vectorized edge detection.
+
+'''
+    Vectorized rising-edge engine.
+    All signals of one file are handled as a single 2-D uint8 matrix
+    (rows = samples, columns = signals) instead of one pandas Series per signal.
+'''
+
+'''
+    Build the "previous-in-file" matrix by prepending the carry row and dropping the last row.
+    [Example] (one column)
+     prev_row     =    0
+     mat          =   [0, 0, 0, 1, 1, 1, 0, 0, 0]
+     prev_in_file =   [0, 0, 0, 0, 1, 1, 1, 0, 0]
+'''
+def shift_down(mat: np.ndarray, prev_row: np.ndarray) -> np.ndarray:
+    out = np.empty_like(mat)
+    if len(mat) == 0:
+        return out
+    out[0] = prev_row
+    out[1:] = mat[:-1]
+    return out
+
+'''
+    Debounce mask: True where the last `debounce_n` samples (this row included) sum to `debounce_n`.
+    Same as s.rolling(debounce_n, min_periods=debounce_n).sum()==debounce_n, i.e. the window
+    never reaches into the previous file and the first debounce_n-1 rows are False.
+    np.cumsum():A running sum lets every window of every column be taken with one subtraction.
+'''
+def debounce_mask(mat: np.ndarray, debounce_n: int) -> np.ndarray:
+    n_rows, n_sig = mat.shape
+    mask = np.zeros((n_rows, n_sig), dtype=bool)
+    if debounce_n <= 1:
+        mask[:] = True
+        return mask
+    if n_rows < debounce_n:
+        return mask
+    cs = np.zeros((n_rows + 1, n_sig), dtype=np.int64)
+    np.cumsum(mat, axis=0, dtype=np.int64, out=cs[1:])
+    mask[debounce_n - 1:] = (cs[debounce_n:] - cs[:-debounce_n]) == debounce_n
+    return mask
+
+'''
+    Detect rising edges (0 -> 1) for every signal in one pass.
+    mat      :uint8 matrix (n_rows, n_signals). Missing values must already be 0.
+    prev_row :uint8 vector (n_signals,) carried from the previous file's last row.
+    present  :bool vector (n_signals,). Columns that are not in the file never rise
+              and keep their carry value. None means every column is present.
+    head     :rows of the same file just before `mat` when a file is processed in chunks
+              (the last debounce_n-1 are enough). Only the debounce window looks at them.
+    Return (rising, stable, next_prev_row).
+'''
+def detect_edges(mat: np.ndarray, prev_row: np.ndarray, debounce_n: int = 1,
+                 present: np.ndarray | None = None, head: np.ndarray | None = None):
+    mat = np.asarray(mat, dtype=np.uint8)
+    prev_row = np.asarray(prev_row, dtype=np.uint8)
+    if mat.ndim != 2 or mat.shape[1] != prev_row.shape[0]:
+        raise ValueError(f'signal matrix {mat.shape} does not match carry row {prev_row.shape}')
+
+    if head is not None and debounce_n > 1 and len(head):
+        head = np.asarray(head, dtype=np.uint8)[-(debounce_n - 1):]
+        stable = debounce_mask(np.concatenate([head, mat]), debounce_n)[len(head):]
+    else:
+        stable = debounce_mask(mat, debounce_n)
+    rising = (shift_down(mat, prev_row) == 0) & (mat == 1)
+    if debounce_n > 1:
+        rising &= stable
+
+    next_prev = prev_row.copy()
+    if len(mat):
+        if present is None:
+            next_prev[:] = mat[-1]
+        else:
+            next_prev[present] = mat[-1, present]
+
+    if present is not None:
+        rising[:, ~present] = False
+    return rising, stable, next_prev
@@ -0,0 +1,919 @@
+## Standard library
+from pathlib import Path                            # For filesystem path and operations.
+import sys                                          #
+import logging                                      #
+import os                                           # For OS-dependent features.
+import re                                           # For regular expression.
+import time                                         # For the write guard.
+import importlib                                    # For numpy/pandas on first use.
+import tomllib                                      # For working with TOML.
+from datetime import datetime, timedelta            # For the current date/time and time differences.
+from collections import defaultdict                 # For automatically initializing missing dictionary keys.
+
+'''
+    detect_sys engine: the whole pipeline as a library.
+     engine = Engine(Config.load('config.toml'))
+     batch  = engine.process(files)      # -> PairsBatch, outputs and state written
+     batch  = engine.run_once()          # pending files under base_dir
+    Importing this module only loads the standard library. numpy/pandas, the cross table, the
+    state store and the carry are loaded on first use and then kept warm, so one process can run
+    many batches (resident mode, a worker, a notebook) without paying the startup again.
+'''
+
+## Heavy modules, imported on first use
+'''
+    np / pd stand for numpy / pandas and import them on the first attribute access.
+    The pipeline modules are imported inside the methods that use them.
+'''
+class _LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._mod = None
+
+    def __getattr__(self, attr):
+        if self._mod is None:
+            self._mod = importlib.import_module(self._name)
+        return getattr(self._mod, attr)
+
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
+
+## Read Setting(TOML)
+'''
+    # If the toml library is None or the path does nnot exist, return None.
+    # Otherwise, load TOML file.
+'''
+def load_toml(path):
+    try:
+        if tomllib is None or not os.path.exists(path):
+            return {}
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    except Exception:
+        return {}
+
+'''
+    IF cfg is not a dictonary or any key is missing, return default.
+    Otherwise, return the value for the given key path.
+'''
+def cfg(dic: dict, keys, default=None):
+    cur = dic
+    for k in keys:
+        if not isinstance(cur, dict) or k not in cur:
+            return default
+        cur = cur[k]
+    return cur
+
+'''
+    Return the application's base directory.
+    Convert a path to an aboslute path using a base directory.
+'''
+def app_base_dir() -> Path:
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).parent
+    return Path(__file__).resolve().parent
+
+def as_abs(p, base: Path ) -> Path | None:
+    if p is None or str(p).strip() == '':
+        return None
+    p = Path(p)
+    return p if p.is_absolute() else base / p
+
+'''
+    Settings of one pipeline (one config.toml).
+    Relative paths are resolved against `base` (the folder of the config file).
+    Attributes can be changed after loading, before the Engine first runs.
+'''
+class Config:
+    def __init__(self, dic=None, base=None):
+        CFG = dic or {}
+        READ_BASE = RUN_BASE = Path(base) if base is not None else app_base_dir()
+        self.run_base = RUN_BASE
+
+        self.encoding    = cfg(CFG, ('io', 'encoding'), 'CP932')                            #Encoding
+        self.header_row  = cfg(CFG, ('io', 'header_row'), 2)                                #Header_row_count
+        self.fast_reader = str(cfg(CFG, ('io', 'reader'), 'fast')).lower() == 'fast'        #CSV_reader(fast/pandas)
+        self.chunk_min_mb = float(cfg(CFG, ('io', 'chunk_min_mb'), 32))                     #Read_files_from_N_MB_in_chunks(0:OFF)
+        self.chunk_rows  = int(cfg(CFG, ('io', 'chunk_rows'), 100_000))                     #Rows_per_chunk
+        self.prefetch_files = int(cfg(CFG, ('io', 'prefetch_files'), 8))                    #Read_ahead_N_files(0:OFF)
+        self.prefetch_threads = int(cfg(CFG, ('io', 'prefetch_threads'), 4))                #Read_ahead_threads
+        self.prefetch_mb = float(cfg(CFG, ('io', 'prefetch_mb'), 256))                      #Read_ahead_byte_cap(MB)
+
+        self.csv_glob    = patterns(cfg(CFG, ('paths', 'glob_csv'), '*.csv'))                                    #Target_files(a pattern or a list)
+        self.base_dir    = as_abs(cfg(CFG, ('paths', 'base_dir'), 'data'), READ_BASE)                            #Original_Data_directory
+        self.prev_path   = as_abs(cfg(CFG, ('paths', 'prev_path'), 'table/d_tube_assembly.csv'), RUN_BASE)       #Previous_Data_file
+        self.cross_xlsx  = as_abs(cfg(CFG, ('paths', 'cross_xlsx'), 'table/d_tube_assembly.xlsx'), READ_BASE)    #Cross_Table_file
+        self.cross_cache = as_abs(cfg(CFG, ('paths', 'cross_cache'), 'table/cross_cache.npz'), RUN_BASE)         #Compiled_cross_table(empty:OFF)
+        self.out_events  = as_abs(cfg(CFG, ('paths', 'out_events'), 'output/output.csv'), RUN_BASE)              #Unmatch_file(legacy CSV)
+        self.open_x_path = as_abs(cfg(CFG, ('paths', 'open_x_path'), ''), RUN_BASE)                              #Unmatch_store(opt-in,empty:out_events_CSV)
+        self.output_dir  = as_abs(cfg(CFG, ('paths', 'output_dir'), 'output'), RUN_BASE)                         #Ouput_directory
+        self.state_path  = as_abs(cfg(CFG, ('paths', 'state_path'), 'state.json'), RUN_BASE)                     #Legacy_processed_file(migrated)
+        self.state_db    = as_abs(cfg(CFG, ('paths', 'state_db'), 'state.db'), RUN_BASE)                         #Already_processed_store
+        self.manifest_path = as_abs(cfg(CFG, ('paths', 'manifest_path'), 'manifest.json'), RUN_BASE)            #Directory_manifest(empty:OFF)
+        self.parquet_dir = as_abs(cfg(CFG, ('paths', 'parquet_dir'), ''), RUN_BASE)                              #Parquet_output_directory(empty:OFF)
+        self.index_dir   = as_abs(cfg(CFG, ('paths', 'index_dir'), 'index'), RUN_BASE)                           #Pair_CSV_time_index(empty:not_saved)
+        self.checkpoint_path = as_abs(cfg(CFG, ('paths', 'checkpoint_path'), 'checkpoint.json'), RUN_BASE)      #Checkpoint_journal
+
+        self.debounce_n  = int(cfg(CFG, ('logic', 'debounce_n'), 1))                        #Switch_debouncing(1:OFF, 3>=:ON)
+        self.dur_min     = int(cfg(CFG, ('logic', 'duration_min_ms'), 0))                   #Duration_minimum_seconds(0:OFF)
+        self.dur_max     = int(cfg(CFG, ('logic', 'duration_max_ms'), 0))                   #Duration_maximum_seconds(0:OFF)
+        self.write_guard = bool(cfg(CFG, ('logic', 'write_guard_enable'), False))           #Write_protection
+        self.write_wait  = int(cfg(CFG, ('logic', 'write_guard_wait_ms'), 300))             #Write_protection_seconds
+        self.write_guard_age = float(cfg(CFG, ('logic', 'write_guard_max_age_sec'), 0))     #Guard_only_files_modified_within_N_seconds(0:all)
+        self.recent_days = int(cfg(CFG, ('logic', 'recent_days'), 0))                       #Last_N_days(0:all)
+        self.state_keep_days = int(cfg(CFG, ('logic', 'state_retention_days'), 0))        #Archive_state_older_than_N_days(0:OFF)
+        self.pair_strategy = str(cfg(CFG, ('logic', 'pair_strategy'), 'fifo')).lower()     #Pairing(fifo/lifo/nearest)
+
+        self.watch_enable   = bool(cfg(CFG, ('watch', 'enable'), False))                    #Resident_mode
+        self.watch_interval = float(cfg(CFG, ('watch', 'poll_interval_sec'), 2.0))          #Polling_interval_seconds
+        self.watch_days     = int(cfg(CFG, ('watch', 'poll_days'), 2))                      #Newest_day_folders_to_poll
+        self.watch_notify   = bool(cfg(CFG, ('watch', 'use_notify'), True))                 #Use_OS_notification(watchdog)
+
+        self.par_workers    = int(cfg(CFG, ('parallel', 'workers'), 0))                     #Worker_processes(0,1:serial)
+        self.par_min_files  = int(cfg(CFG, ('parallel', 'min_files'), 32))                  #Use_workers_from_N_pending_files
+
+        self.metrics_enable = bool(cfg(CFG, ('metrics', 'enable'), False))                  #Per-stage_timing_and_counts
+        self.metrics_dir    = as_abs(cfg(CFG, ('metrics', 'json_dir'), 'logs/metrics'), RUN_BASE)  #Metrics_JSON_per_run(empty:OFF)
+        self.metrics_prom   = as_abs(cfg(CFG, ('metrics', 'prom_path'), ''), RUN_BASE)             #Prometheus_textfile(empty:OFF)
+        self.metrics_keep   = int(cfg(CFG, ('metrics', 'keep_files'), 500))                  #Keep_the_newest_N_metrics_JSON(0:all)
+
+        self.ckpt_files     = int(cfg(CFG, ('checkpoint', 'every_files'), 500))            #Checkpoint_every_N_files(0:OFF)
+        self.ckpt_sec       = float(cfg(CFG, ('checkpoint', 'every_sec'), 60.0))            #Checkpoint_every_T_seconds(0:OFF)
+
+        self.pq_compact     = int(cfg(CFG, ('parquet', 'compact_min_files'), 16))          #Compact_a_day_folder_from_N_files
+        self.pq_csv         = bool(cfg(CFG, ('parquet', 'keep_csv'), True))                 #Keep_writing_per-name_CSV
+
+        self.anomaly_enable = bool(cfg(CFG, ('anomaly', 'enable'), False))                  #Inline_anomaly_scoring
+        self.anomaly_alpha  = float(cfg(CFG, ('anomaly', 'alpha'), 0.02))                   #EWMA_weight_of_the_newest_pair
+        self.anomaly_z      = float(cfg(CFG, ('anomaly', 'z_threshold'), 4.0))              #Flag_when_|z|_exceeds
+        self.anomaly_warmup = int(cfg(CFG, ('anomaly', 'warmup'), 50))                      #Pairs_per_name_before_flagging
+        self.alerts_path    = as_abs(cfg(CFG, ('anomaly', 'alerts_path'), 'output/alerts.csv'), RUN_BASE)        #Alerts_file
+        self.baseline_db    = as_abs(cfg(CFG, ('anomaly', 'baseline_db'), 'output/anomaly_baseline.db'), RUN_BASE)  #Per-name_baselines
+
+        self.open_max_hours = float(cfg(CFG, ('open_x', 'max_age_hours'), 0))                #Evict_unmatched_X_older_than_N_hours(0:OFF)
+        self.open_max_count = int(cfg(CFG, ('open_x', 'max_count'), 0))                      #Keep_at_most_N_unmatched_X_per_name(0:OFF)
+        self.evicted_path   = as_abs(cfg(CFG, ('open_x', 'evicted_path'), 'output/open_x_evicted.csv'), RUN_BASE)  #Audit_file_of_evicted_X
+
+        if self.output_dir is None:
+            self.output_dir = RUN_BASE / 'output'
+        stats_db = cfg(CFG, ('paths', 'stats_db'), None)
+        self.stats_db = self.output_dir / 'duration_stats.db' if stats_db is None else as_abs(stats_db, RUN_BASE)  #Duration_statistics(empty:OFF)
+        if self.prev_path is None:
+            self.prev_path = RUN_BASE / 'table' / 'd_tube_assembly.csv'
+
+    '''
+        Load a config.toml. path:None means config.toml next to the application.
+    '''
+    @classmethod
+    def load(cls, path=None):
+        path = Path(path) if path is not None else app_base_dir() / 'config.toml'
+        return cls(load_toml(path), path.resolve().parent)
+
+## utils
+'''
+    Compare the sile size before and after waitng wait_ms.
+    Return true if the file size doesn't change during wait_ms.
+'''
+def stable(path, wait_ms):
+    return bool(stable_files([path], wait_ms))
+
+def _stat_sig(path):
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+'''
+    Write guard for many files at once: stat all of them, sleep wait_ms once, stat again.
+    Return the files (in the given order) whose size and mtime did not change.
+    max_age_sec > 0: a file last modified longer ago than that is accepted after the first stat
+    (its day folder is closed); only the recent ones share the wait.
+'''
+def stable_files(paths, wait_ms, max_age_sec=0):
+    first = {p: _stat_sig(p) for p in paths}
+    now_ns = time.time_ns()
+    recent = {p for p, sig in first.items() if sig is not None and (max_age_sec <= 0 or now_ns - sig[1] < max_age_sec * 1e9)}
+    if recent:
+        time.sleep(wait_ms/1000)
+    moved = {p for p in recent if _stat_sig(p) != first[p]}
+    return [p for p in paths if first[p] is not None and p not in moved]
+
+'''
+    glob_csv is one pattern or a list of them (e.g. an archive replay: ["*.sga", "*.CSV"]).
+    patterns() returns the list; iter_files() yields each file under base that matches one, once.
+'''
+def patterns(glob):
+    return [glob] if isinstance(glob, str) else [str(g) for g in glob]
+
+def iter_files(base, globs):
+    seen = set()
+    for g in globs:
+        for f in Path(base).rglob(g):
+            if f not in seen:
+                seen.add(f)
+                yield f
+
+'''
+    Sanitize a filename.
+    re.sub():Replace parts of a string that match a regular expression.
+    .strip():Remove leading and trailing spaces. If the result is empty, use "noname" instead.
+'''
+def sanitize(s):
+    return re.sub(r'[\\/:*?"<>|]', '_', str(s).strip() or 'noname')
+
+'''
+    This checks whether rel contains an 8-digit date and whether that date is within recent_days.
+    re.findall():Finds all string and returns them as a list.
+    datetime.strptime():Parses a date/time string according to a specified format and returns a datetime object.
+'''
+def is_recent(rel, recent_days):
+    digits = re.findall(r'\d{8}',rel)
+    if not digits:
+        return False
+    d = digits[0]
+    try:
+        dt = datetime.strptime(d, '%Y%m%d')
+        return dt >= (datetime.now() - timedelta(days=recent_days))
+    except:
+        return False
+
+'''
+    Keep a folder unless its name has an 8-digit date outside recent_days.
+    Used to prune day folders before they are listed.
+'''
+def is_recent_dir(name, recent_days):
+    return not re.search(r'\d{8}', name) or is_recent(name, recent_days)
+
+'''
+    Result of one batch: the pairs of each name as int64 arrays and the files that are done.
+     pairs :name -> (x_ns, y_ns, dur_ms)  epoch nanoseconds / milliseconds
+     files :processed files, relative to base_dir
+'''
+class PairsBatch:
+    def __init__(self, files=None):
+        self.files = list(files or [])
+        self._chunks = defaultdict(list)  #name -> list[(x_ns, y_ns, dur_ms) arrays], joined on first access
+        self._pairs = None
+
+    def _add(self, name, x_ns, y_ns, dur_ms):
+        self._chunks[name].append((x_ns, y_ns, dur_ms))
+        self._pairs = None
+
+    def extend(self, other):
+        self.files += other.files
+        for name, chunks in other._chunks.items():
+            self._chunks[name] += chunks
+        self._pairs = None
+
+    @property
+    def pairs(self):
+        if self._pairs is None:
+            self._pairs = {
+                name: tuple(np.concatenate(c) for c in zip(*chunks))
+                for name, chunks in self._chunks.items() if chunks
+            }
+        return self._pairs
+
+    def names(self):
+        return list(self.pairs)
+
+    def __len__(self):
+        return sum(len(p[2]) for p in self.pairs.values())
+
+    '''
+        Pairs as a DataFrame (Name, X_TIME, Y_TIME, DURATION_MS). name:None means every name.
+    '''
+    def frame(self, name=None):
+        names = self.names() if name is None else [name]
+        parts = []
+        for nm in names:
+            if nm not in self.pairs:
+                continue
+            x_ns, y_ns, dur_ms = self.pairs[nm]
+            parts.append(pd.DataFrame({
+                'Name': nm, 'X_TIME': x_ns.view('datetime64[ns]'),
+                'Y_TIME': y_ns.view('datetime64[ns]'), 'DURATION_MS': dur_ms,
+            }))
+        if not parts:
+            return pd.DataFrame({'Name': pd.Series(dtype=object), 'X_TIME': pd.Series(dtype='datetime64[ns]'),
+                                 'Y_TIME': pd.Series(dtype='datetime64[ns]'), 'DURATION_MS': pd.Series(dtype='int64')})
+        return pd.concat(parts, ignore_index=True)
+
+'''
+    One pipeline with warm state.
+    Signal map, reader, state store, carry(prev_row) and open_x are loaded on the first call
+    and kept between batches. Not thread-safe: use one Engine per thread.
+'''
+class Engine:
+    def __init__(self, config=None):
+        self.config = config if config is not None else Config.load()
+        self._ready = False
+        self.parse_pool = None  #paths -> parse_edges() results in order, from a pool shared with other lines (see lines.py)
+
+    ## warm state
+    def _load(self):
+        if self._ready:
+            return
+        from pairing import STRATEGIES
+        from manifest import DirManifest
+        from state_store import StateStore
+        from signal_reader import SignalReader
+        from pair_store import PairStore
+        from metrics import Metrics
+        from checkpoint import Checkpoint
+        from duration_stats import DurationStats
+        from anomaly import Baselines
+        import generation
+        c = self.config
+        if c.pair_strategy not in STRATEGIES:
+            raise ValueError(f'pair_strategy must be one of {STRATEGIES}:{c.pair_strategy}')
+        self.base = Path(c.base_dir)
+        if not self.base.exists():
+            raise FileNotFoundError(f'Not exist base folder:{self.base}')
+        generation.recover(c) #Before anything reads the live paths.
+        c.output_dir.mkdir(parents=True, exist_ok=True)
+        c.prev_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._load_cross()
+        #The fast reader resolves each distinct header once and parses the 0/1 body without pandas.
+        self.reader = SignalReader(self.signals, c.encoding, c.header_row) if c.fast_reader else None
+        '''
+            Open the processed-file store. A legacy state.json is imported once.
+            `r in already` loads only the day partition of r.
+        '''
+        self.already = StateStore(c.state_db, c.state_path, c.state_keep_days)
+        self.manifest = DirManifest(c.manifest_path) if c.manifest_path is not None else None
+        self.metrics = Metrics(c.metrics_enable, c.metrics_dir, c.metrics_prom, c.metrics_keep)
+        self.pair_store = PairStore(c.parquet_dir, c.pq_compact) if c.parquet_dir is not None else None
+        self.stats = DurationStats(c.stats_db) if c.stats_db is not None else None
+        if self.stats is not None:
+            self.already.attach(c.stats_db, 'stats') #Statistics are committed with the state.
+        self.anomaly = None
+        if c.anomaly_enable and c.baseline_db is not None and c.alerts_path is not None:
+            self.anomaly = Baselines(c.baseline_db, c.anomaly_alpha, c.anomaly_z, c.anomaly_warmup)
+            self.already.attach(c.baseline_db, 'anomaly') #Baselines are committed with the state.
+        self.journal = Checkpoint(c.checkpoint_path) if c.checkpoint_path is not None else None
+        if self.journal is not None:
+            self.journal.recover(self.already, self.pair_store) #Before the snapshot and output.csv are read.
+        self._last_row = None #Last row of the last file, written at the next checkpoint.
+        self.prev_row = self._load_prev_row()
+        self.open_x = self.load_open_x()
+        self._ready = True
+
+    ## load cross table
+    '''
+        Compiled map of cross_xlsx: signal index -> name ids of the X and Y sides.
+        The xlsx is only opened when it changed since the cache was written.
+    '''
+    def _load_cross(self):
+        from cross_table import CrossMap
+        self.cross = CrossMap.load(self.config.cross_xlsx, self.config.cross_cache)
+        self.signals = self.cross.signals
+
+    ## load prev snapshot
+    '''
+        If the previous file exists and is not empty, read it and get the last row.
+        Initialize the previous state for each signal.
+        prev_row is aligned with `signals` and is the carry row for detect_edges().
+    '''
+    def _load_prev_row(self):
+        c = self.config
+        if os.path.exists(c.prev_path) and os.path.getsize(c.prev_path) > 0:
+            prev_df = pd.read_csv(c.prev_path, encoding=c.encoding)
+            prev_last = prev_df.iloc[-1]
+        else:
+            prev_last = pd.Series(dtype='object')
+
+        prev_vals = {}
+        for sig in self.signals:
+            if sig in prev_last.index:
+                try:
+                    prev_vals[sig] = int(prev_last[sig])
+                except:
+                    prev_vals[sig] = 0
+            else:
+                prev_vals[sig] = 0
+        return np.array([prev_vals[sig] for sig in self.signals], dtype=np.int64).astype(np.uint8)
+
+    ## load open-X(unmatch state)
+    '''
+        open_x holds the unmatched X times of each name as a sorted int64 array (epoch nanoseconds).
+        They come from output.csv, or from the binary store when open_x_path is set (opt-in, see
+        open_x_store.py). Switching it on reads output.csv once; the next checkpoint writes the
+        store and removes the CSV, so readers of output.csv must move to the store first.
+        TIME_NS is the exact integer time. Files written before it existed are parsed from TIME.
+    '''
+    def load_open_x(self):
+        from timeutil import parse_time_ns, NAT_NS
+        import open_x_store
+        c = self.config
+        open_x  = defaultdict(lambda: np.empty(0, dtype=np.int64))
+        self.clock = 0 #Newest event time seen (reference of the max-age eviction).
+        if c.open_x_path is not None and os.path.exists(c.open_x_path):
+            stored, self.clock = open_x_store.load(c.open_x_path)
+            open_x.update(stored)
+        elif c.out_events is not None and os.path.exists(c.out_events) and os.path.getsize(c.out_events) > 0:
+            ex = pd.read_csv(c.out_events, encoding=c.encoding)
+            if not ex.empty:
+                if 'TIME_NS' in ex.columns:
+                    ns = ex['TIME_NS'].fillna(NAT_NS).to_numpy(dtype=np.int64)
+                else:
+                    ns = parse_time_ns(ex['TIME'])
+                keep = ns != NAT_NS #Drop missing times.
+                names = ex['Name'].to_numpy()[keep]
+                ns = ns[keep]
+                for nm in pd.unique(names):
+                    open_x[nm] = np.sort(ns[names == nm]) #Sort by TIME.
+        return open_x
+
+    '''
+        Return the unprocessed files as paths rel(ative) to base_dir(POSIX-style strings), oldest mtime first.
+        files_all:Candidate files. None means scan the whole base folder
+                  (through the manifest if enabled, which skips done and unchanged day folders).
+        .as_posix():Convert \\(back slash) to /(slash).
+    '''
+    def find_pending(self, files_all=None):
+        self._load()
+        with self.metrics.stage('discover'):
+            pending_rel = self._find_pending(files_all)
+        self.metrics.set('backlog', len(pending_rel))
+        return pending_rel
+
+    def _find_pending(self, files_all):
+        c = self.config
+        base = self.base
+        mtimes = {}
+        if files_all is None and self.manifest is not None:
+            keep_dir = (lambda name: is_recent_dir(name, c.recent_days)) if c.recent_days > 0 else None
+            mtimes = dict(self.manifest.scan(base, c.csv_glob, self.already, keep_dir))
+            files_rel = list(mtimes)
+        else:
+            if files_all is None:
+                files_all = iter_files(base, c.csv_glob)
+            files_rel = [Path(f).relative_to(base).as_posix() for f in files_all]
+
+        # Select only within recent_days(0:OFF)
+        if c.recent_days > 0:
+            files_rel = [r for r in files_rel if is_recent(r, c.recent_days)]
+
+        # Select only unprocessed data
+        pending_rel = [r for r in dict.fromkeys(files_rel) if r not in self.already]
+        return sorted(pending_rel, key=lambda r:mtimes[r] if r in mtimes else os.path.getmtime(base / r))
+
+    ### streaming process
+    '''
+        Collect the rising-edge times of each Name on the X and Y sides and pair them.
+        A signal is expanded to all Names mapped from it (CrossMap.expand, sorted by name and time).
+        Pair per name with the configured strategy(FIFO queue / LIFO stack / nearest X).
+        Apply thresholds if set. Unmatched X stay in open_x for the next file.
+    '''
+    def pair_rising(self, ts, rising, batch):
+        from pairing import pair_name
+        c = self.config
+        open_x = self.open_x
+        x_nid, x_t = self.cross.expand(ts, rising, 'x')
+        y_nid, y_t = self.cross.expand(ts, rising, 'y')
+        ids = np.union1d(x_nid, y_nid)
+        x_lo, x_hi = np.searchsorted(x_nid, ids, 'left'), np.searchsorted(x_nid, ids, 'right')
+        y_lo, y_hi = np.searchsorted(y_nid, ids, 'left'), np.searchsorted(y_nid, ids, 'right')
+
+        for k, nid in enumerate(ids.tolist()):
+            name = self.cross.names[nid]
+            xs = x_t[x_lo[k]:x_hi[k]]
+            ys = y_t[y_lo[k]:y_hi[k]]
+            x_paired, y_paired, dur_ms, open_x[name] = pair_name(
+                open_x[name], xs, ys, c.pair_strategy, c.dur_min, c.dur_max
+            )
+            self.metrics.add('events', len(xs) + len(ys))
+            if len(dur_ms):
+                batch._add(name, x_paired, y_paired, dur_ms)
+                self.metrics.add('pairs', len(dur_ms))
+
+    '''
+        Remember the last row for the previous snapshot(for the next file's boundary condition).
+        Columns missing from the file take the carry. Written at the next checkpoint.
+    '''
+    def keep_snapshot(self, last_row):
+        for j, sig in enumerate(self.signals):
+            if sig not in last_row.columns:
+                last_row[sig] = int(self.prev_row[j])
+        self._last_row = last_row[['TIME'] + self.signals]
+
+    '''
+        Process one file: detect rising edges, pair X/Y into the batch and keep the previous snapshot.
+        data:the file's bytes from the prefetcher.
+    '''
+    def process_file(self, f_abs, batch, data=None):
+        from signal_reader import read_signal_csv
+        from edge import detect_edges
+        c = self.config
+        if data is None and self.is_large(f_abs):
+            self.process_file_chunked(f_abs, batch)
+            return
+
+        with self.metrics.stage('read'):
+            if self.reader is not None:
+                sig = self.reader.read(f_abs, data)
+            else:
+                sig = read_signal_csv(f_abs, self.signals, c.encoding, c.header_row, data)
+        self.metrics.add('files')
+        if sig is None:
+            return
+        ts, mat, present, last_row = sig
+        self.metrics.add('rows', len(ts))
+
+        #Detect every rising edge of every signal in one pass. Columns missing from this file keep their carry.
+        with self.metrics.stage('edges'):
+            rising, _, self.prev_row = detect_edges(mat, self.prev_row, c.debounce_n, present)
+        with self.metrics.stage('pair'):
+            self.pair_rising(ts, rising, batch)
+        self.keep_snapshot(last_row)
+
+    def is_large(self, f_abs):
+        c = self.config
+        return c.chunk_min_mb > 0 and os.path.getsize(f_abs) >= c.chunk_min_mb * 1024 * 1024
+
+    '''
+        process_file() for a large file (e.g. an hour or a day dumped at once after an outage):
+        read `chunk_rows` rows at a time, so memory is bounded by the chunk, not the file.
+        Same pairs as the whole-file path:
+         - the carry runs from chunk to chunk, and the last debounce_n-1 rows of the previous
+           chunk are passed as `head` so debounce windows span the chunk boundary;
+         - rows at the last timestamp of a chunk are paired with the next chunk, so X before Y
+           at the same time still holds across the boundary.
+    '''
+    def process_file_chunked(self, f_abs, batch):
+        from signal_reader import iter_signal_csv
+        from edge import detect_edges
+        c = self.config
+        if self.reader is not None:
+            chunks = self.reader.iter_chunks(f_abs, c.chunk_rows)
+        else:
+            chunks = iter_signal_csv(f_abs, self.signals, c.encoding, c.header_row, c.chunk_rows)
+        self.metrics.add('files')
+        self.metrics.add('chunked_files')
+        head = None
+        hold_ts, hold_rising = None, None
+        last_row = None
+        while True:
+            with self.metrics.stage('read'):
+                sig = next(chunks, None)
+            if sig is None:
+                break
+            ts, mat, present, last_row = sig
+            self.metrics.add('rows', len(ts))
+            with self.metrics.stage('edges'):
+                rising, _, self.prev_row = detect_edges(mat, self.prev_row, c.debounce_n, present, head)
+            if c.debounce_n > 1:
+                head = mat[-(c.debounce_n - 1):] if head is None else np.concatenate([head, mat])[-(c.debounce_n - 1):]
+            if hold_ts is not None:
+                ts, rising = np.concatenate([hold_ts, ts]), np.concatenate([hold_rising, rising])
+            diff = np.flatnonzero(ts != ts[-1])
+            k = diff[-1] + 1 if len(diff) else 0
+            hold_ts, hold_rising = ts[k:], rising[k:]
+            if k:
+                with self.metrics.stage('pair'):
+                    self.pair_rising(ts[:k], rising[:k], batch)
+        if hold_ts is not None and len(hold_ts):
+            with self.metrics.stage('pair'):
+                self.pair_rising(hold_ts, hold_rising, batch)
+        if last_row is not None:
+            self.keep_snapshot(last_row)
+
+    '''
+        Serial mode: yield each file that is done. The batch is read from self._part on every
+        file, so process() can swap it at a checkpoint.
+        With [io] prefetch_files, the next files are read on threads while this one is processed
+        (see prefetch.py). Large files are still read here in chunks.
+        'prefetch_wait' is the time spent waiting for bytes.
+    '''
+    def process_files_serial(self, pending_rel):
+        from prefetch import Prefetcher
+        c = self.config
+        if c.prefetch_files <= 0 or len(pending_rel) < 2:
+            for i, f_rel in enumerate(pending_rel, start=1):
+                #print (f'[{i}/{len(pending_rel)}] Processing: {f_rel}')
+                self.process_file(str(self.base / f_rel), self._part)
+                yield f_rel
+            return
+
+        pf = Prefetcher(
+            [str(self.base / r) for r in pending_rel], c.prefetch_threads, c.prefetch_files, c.prefetch_mb * 1024 * 1024,
+            skip=self.is_large,
+        )
+        fetched = iter(pf)
+        try:
+            for f_rel in pending_rel:
+                with self.metrics.stage('prefetch_wait'):
+                    f_abs, data = next(fetched)
+                self.process_file(f_abs, self._part, data)
+                yield f_rel
+        finally:
+            fetched.close()
+            self.metrics.add('prefetch_files', pf.files)
+            self.metrics.add('prefetch_hidden_sec', round(pf.hidden_sec, 3))
+            logging.info(f'prefetch:{pf.files} files {pf.bytes / 2**20:.1f} MB, read {pf.read_sec:.2f}s, '
+                         f'waited {pf.wait_sec:.2f}s, hidden {pf.hidden_sec:.2f}s')
+
+    '''
+        Parallel mode: workers parse and edge-detect the files with a provisional carry,
+        then each result is stitched, paired and snapshotted here in file order.
+        The 'parse_wait' stage is the time spent waiting for the workers.
+        Large files (chunk_min_mb) are not sent to the workers but read here in chunks.
+        With parse_pool set, the files go to that shared pool instead of a pool of this Engine.
+    '''
+    def process_files_parallel(self, pending_rel):
+        from parallel import iter_parsed, stitch
+        c = self.config
+        large = {r for r in pending_rel if self.is_large(str(self.base / r))}  #Read here in chunks, in order.
+        paths = [str(self.base / r) for r in pending_rel if r not in large]
+        if self.parse_pool is not None:
+            results = self.parse_pool(paths)
+        else:
+            results = iter_parsed(paths, c.par_workers, self.signals, c.encoding, c.header_row, c.debounce_n, c.fast_reader)
+        for f_rel in pending_rel:
+            if f_rel in large:
+                self.process_file_chunked(str(self.base / f_rel), self._part)
+                yield f_rel
+                continue
+            with self.metrics.stage('parse_wait'):
+                res = next(results)
+            self.metrics.add('files')
+            if res is not None:
+                self.metrics.add('rows', len(res['ts']))
+                with self.metrics.stage('edges'):
+                    self.prev_row = stitch(res, self.prev_row, c.debounce_n)
+                with self.metrics.stage('pair'):
+                    self.pair_rising(res['ts'], res['rising'], self._part)
+                self.keep_snapshot(res['last_row'])
+            yield f_rel
+
+    '''
+        Process files (relative to base_dir, in the given order) and return their pairs.
+        commit:True checkpoints every [checkpoint] every_files files / every_sec seconds and at
+               the end (see commit()). A crash resumes from the last checkpoint.
+        commit:False only keeps the carry and open_x in memory.
+        guard :apply the write guard (None:[logic] write_guard_enable). The resident modes always
+               pass True, since they see files as soon as they are created.
+    '''
+    def process(self, files, commit=True, guard=None):
+        self._load()
+        c = self.config
+        pending_rel = [Path(f).relative_to(self.base).as_posix() if Path(f).is_absolute() else str(f) for f in files]
+        if c.write_guard if guard is None else guard:
+            pending_rel = self.guard(pending_rel)
+        total = PairsBatch()
+        self._part = PairsBatch()
+        if self.parse_pool is not None or (c.par_workers > 1 and len(pending_rel) >= c.par_min_files):
+            done = self.process_files_parallel(pending_rel)
+        else:
+            done = self.process_files_serial(pending_rel)
+
+        t_ckpt = time.monotonic()
+        for f_rel in done:
+            self._part.files.append(f_rel)
+            if commit and ((c.ckpt_files > 0 and len(self._part.files) >= c.ckpt_files)
+                           or (c.ckpt_sec > 0 and time.monotonic() - t_ckpt >= c.ckpt_sec)):
+                self.commit(self._part)
+                total.extend(self._part)
+                self._part = PairsBatch()
+                t_ckpt = time.monotonic()
+        if commit:
+            self.commit(self._part)
+        total.extend(self._part)
+        self._part = None
+        return total
+
+    '''
+        Drop the files that are still being written (one batched wait, see stable_files).
+        They stay pending and are picked up by the next run or watch round.
+    '''
+    def guard(self, pending_rel):
+        c = self.config
+        with self.metrics.stage('write_guard'):
+            ok = set(stable_files([str(self.base / r) for r in pending_rel], c.write_wait, c.write_guard_age))
+        kept = [r for r in pending_rel if str(self.base / r) in ok]
+        self.metrics.add('guard_held', len(pending_rel) - len(kept))
+        return kept
+
+    '''
+        Checkpoint: write the pairs of a batch, the unmatched X, the previous snapshot and the
+        processed-file state as one unit (see checkpoint.py).
+    '''
+    def commit(self, batch):
+        if not batch.files:
+            return
+        evicted = self.evict_open_x(batch)
+        try:
+            alerts = None
+            if self.anomaly is not None:
+                with self.metrics.stage('anomaly'):
+                    alerts = self.anomaly.score(batch.pairs)
+                self.metrics.add('alerts', 0 if alerts is None else len(alerts))
+            with self.metrics.stage('output'):
+                self.write_outputs(batch, alerts, evicted)
+            with self.metrics.stage('state'):
+                if self.stats is not None:
+                    for name, (x_ns, _, dur_ms) in batch.pairs.items():
+                        self.stats.add(name, x_ns, dur_ms)
+                self.already.update(batch.files, self._flush_hook) #Commit point.
+        except Exception:
+            self._abandon()
+            raise
+        with self.metrics.stage('state'):
+            if self.stats is not None:
+                self.stats.committed()
+            if self.anomaly is not None:
+                self.anomaly.committed()
+            if self.journal is not None:
+                self.journal.finish()
+            if self.manifest is not None:
+                self.manifest.commit(self.already)
+        if self.pair_store is not None:
+            with self.metrics.stage('output'):
+                self.pair_store.compact() #Only day folders that reached compact_min_files.
+        self.metrics.add('checkpoints')
+        self.metrics.set('open_x', sum(len(t) for t in self.open_x.values()))
+
+    '''
+        A checkpoint that did not commit: drop what was kept for it in memory.
+        Its files are not recorded, so they are processed again.
+    '''
+    def _abandon(self):
+        if self.stats is not None:
+            self.stats.discard()
+        if self.anomaly is not None:
+            self.anomaly.rollback()
+
+    '''
+        Advance the clock to the newest event of the batch and apply the [open_x] eviction rules.
+        Return the evicted entries (see open_x_store.evict) or None.
+    '''
+    def evict_open_x(self, batch):
+        import open_x_store
+        c = self.config
+        newest = [t.max() for t in self.open_x.values() if len(t)]
+        newest += [y_ns.max() for _, y_ns, _ in batch.pairs.values() if len(y_ns)]
+        self.clock = max([self.clock] + [int(t) for t in newest])
+        if c.open_max_hours <= 0 and c.open_max_count <= 0:
+            return None
+        evicted = open_x_store.evict(self.open_x, self.clock, int(c.open_max_hours * 3600 * 1e9), c.open_max_count)
+        self.metrics.add('open_x_evicted', 0 if evicted is None else len(evicted[0]))
+        return evicted
+
+    '''
+        Writes of the attached databases, run inside the state-store transaction.
+    '''
+    def _flush_hook(self, conn):
+        if self.stats is not None:
+            self.stats.flush(conn, 'stats')
+        if self.anomaly is not None:
+            self.anomaly.flush(conn, 'anomaly')
+
+    '''
+        alerts:flagged pairs of this checkpoint (see anomaly.py), appended to alerts_path.
+        evicted:open X dropped by the [open_x] rules, appended to evicted_path.
+    '''
+    def write_outputs(self, batch, alerts=None, evicted=None):
+        from timeutil import format_ns
+        from anomaly import ALERT_COLUMNS
+        import open_x_store
+        c = self.config
+        journal = self.journal
+        csv_names = {} if (self.pair_store is not None and not c.pq_csv) else {
+            name: os.path.join(c.output_dir, f'{sanitize(name)}.csv') for name in batch.pairs
+        }
+        binary = c.open_x_path is not None
+        has_open = any(len(t) for t in self.open_x.values())
+        evicted = evicted if c.evicted_path is not None else None
+        # Without a journal, the open-X file and the snapshot are written in place as before.
+        open_path = c.open_x_path if binary else c.out_events
+        out_tmp = Path(str(open_path) + '.ckpt') if journal is not None else Path(open_path)
+        snap_tmp = Path(str(c.prev_path) + '.ckpt') if journal is not None else Path(c.prev_path)
+        if journal is not None:
+            replace = [(out_tmp, open_path)] if (has_open or binary) else []
+            if self._last_row is not None:
+                replace.append((snap_tmp, c.prev_path))
+            appends = list(csv_names.values()) + ([c.alerts_path] if alerts is not None else [])
+            appends += [c.evicted_path] if evicted is not None else []
+            journal.begin(
+                batch.files, appends, replace,
+                remove=[c.out_events] if c.out_events is not None and (binary or not has_open) else [],
+                pq_since=self.pair_store.mark() if self.pair_store is not None else None,
+            )
+
+        ## Write on CSV files each Name
+        for name, (x_ns, y_ns, dur_ms) in batch.pairs.items():
+            if self.pair_store is not None:
+                self.pair_store.write(name, x_ns, y_ns, dur_ms)
+            if name in csv_names:
+                fname = csv_names[name]
+                dfw = pd.DataFrame({'X_TIME': format_ns(x_ns), 'Y_TIME': format_ns(y_ns), 'DURATION_MS': dur_ms})
+                header = not os.path.exists(fname)  #Write header only when creating a new file.
+                dfw.to_csv(fname, mode='a', index=False, header=header, encoding=c.encoding)
+
+        ## Append the flagged pairs
+        if alerts is not None:
+            alerts = alerts.assign(X_TIME=format_ns(alerts['X_TIME'].to_numpy()), Y_TIME=format_ns(alerts['Y_TIME'].to_numpy()))
+            c.alerts_path.parent.mkdir(parents=True, exist_ok=True)
+            header = not os.path.exists(c.alerts_path)
+            alerts[ALERT_COLUMNS].to_csv(c.alerts_path, mode='a', index=False, header=header, encoding=c.encoding, float_format='%.3f')
+            logging.warning(f'anomaly:{len(alerts)} pairs flagged -> {c.alerts_path}')
+
+        ## Audit of the evicted X
+        if evicted is not None:
+            names, ns, reasons = evicted
+            c.evicted_path.parent.mkdir(parents=True, exist_ok=True)
+            header = not os.path.exists(c.evicted_path)
+            pd.DataFrame({
+                'Name': names, 'TIME': format_ns(ns), 'TIME_NS': ns, 'REASON': reasons,
+                'CLOCK': format_ns(np.full(len(ns), self.clock, dtype=np.int64)),
+            })[open_x_store.EVICT_COLUMNS].to_csv(c.evicted_path, mode='a', index=False, header=header, encoding=c.encoding)
+            logging.warning(f'open_x:{len(ns)} unmatched X evicted -> {c.evicted_path}')
+
+        ## Write the open-X store (or the legacy output.csv) only ummatch pair X
+        if binary:
+            open_x_store.save(out_tmp, self.open_x, self.clock)
+            if journal is None and c.out_events is not None and os.path.exists(c.out_events):
+                os.remove(c.out_events) #Migrated to the binary store.
+        elif has_open:
+            names = [nm for nm, times in self.open_x.items() for _ in range(len(times))]
+            ns = np.concatenate([times for times in self.open_x.values() if len(times)])
+            rem_df = pd.DataFrame({'Name': names, 'TIME_NS': ns})
+            rem_df.sort_values(by=['Name', 'TIME_NS'], inplace=True, kind='stable')
+            rem_df.insert(1, 'TIME', format_ns(rem_df['TIME_NS'].to_numpy()))
+            rem_df.insert(2, 'IO', 'X')
+            rem_df.to_csv(out_tmp, index=False, encoding=c.encoding)
+        elif journal is None and os.path.exists(c.out_events):
+            os.remove(c.out_events)
+
+        ## Previous snapshot
+        if self._last_row is not None:
+            self._last_row.to_csv(snap_tmp, encoding=c.encoding, index=False)
+
+    '''
+        One-shot run: process every pending file under base_dir.
+        Return the PairsBatch (empty if there was nothing new).
+    '''
+    def run_once(self):
+        pending_rel = self.find_pending()
+        if not pending_rel:
+            if self.manifest is not None:
+                self.manifest.save()
+            self.metrics.write()
+            logging.info("not New files, Exit.")
+            return PairsBatch()
+        batch = self.process(pending_rel)
+        self.metrics.write()
+        logging.info(f'totalfile:{len(pending_rel)}')
+        self.metrics.reset()
+        return batch
+
+    '''
+        Resident mode: keep the signal map, the edge carry and open_x in memory,
+        and process each CSV as it lands in base_dir.
+        New files are reported as soon as they are created, so the write guard always applies here.
+        Files it holds back, or of a batch that failed, are retried on the next round.
+    '''
+    def run_watch(self):
+        from watcher import DirWatcher
+        self._load()
+        c = self.config
+        base = self.base
+        watcher = DirWatcher(base, c.csv_glob, c.watch_interval, c.watch_days, c.watch_notify).start()
+        waiting = self.find_pending() #Catch up on what landed while the process was down.
+        try:
+            while True:
+                if waiting:
+                    try:
+                        batch = self.process(waiting, guard=True)
+                        if batch.files:
+                            logging.info(f'totalfile:{len(batch.files)}')
+                            self.metrics.write()
+                    except Exception:
+                        logging.exception('watch:failed to process, reload the last checkpoint and retry on next round')
+                        self.reload()
+                    waiting = [r for r in waiting if r not in self.already]
+                    self.metrics.reset()
+                new = watcher.wait()
+                if new:
+                    waiting = self.find_pending([base / r for r in waiting] + new)
+        except KeyboardInterrupt:
+            logging.info('watch:stopped')
+        finally:
+            watcher.stop()
+
+    '''
+        Drop the warm state after a failed batch: the carry, open_x, the snapshot and the baselines
+        may already be past the last checkpoint. _load() recovers the journal and reads them back,
+        so the retry starts from exactly what was committed.
+    '''
+    def reload(self):
+        self.close()
+        self._load()
+
+    def close(self):
+        if self._ready:
+            self.already.close()
+            self._ready = False
@@ -0,0 +1,169 @@
+## Standard library
+import sys                                          #
+import argparse                                     # For command line options.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pandas as pd                                 # For data analysis.
+from timeutil import format_ns                      # For TIME strings.
+
+'''
+    Synthetic equipment logs for benchmarks and tests, without the production share.
+    python gen_logs.py OUT_DIR [--days D] [--start YYYYMMDD] [--names N] [--signals S]
+                               [--rate R] [--file-sec F] [--files-per-day K]
+    Writes:
+     OUT_DIR/data/INPUT_MYYYYMMDD/INPUT_M_YYYYMMDD_HHMMSS_NNNNNNNN.CSV  (CP932, 2 preamble lines + header)
+     OUT_DIR/table/d_tube_assembly.xlsx                                (cross table name/x/y)
+    Each name is one actuator: the X command turns on at the start of its cycle, the Y end switch
+    follows after the stroke time (a few hundred ms, jittered per cycle) and both drop before the
+    next cycle. A few cycles miss the end switch, and some Y switches chatter once.
+    Every value is a pure function of (seed, signal, time), so any file can be written on its own
+    and a 1-year backlog can be generated in chunks or in parallel.
+'''
+NS_PER_SEC = 1_000_000_000
+NS_PER_MS = 1_000_000
+
+## Actuator names used to build readable signal names (half-width kana, as on the equipment).
+PARTS = ['ｴﾊﾞ位置決め部押え', 'ｼｬﾄﾙ部ﾁｬｯｸ', 'ねじ締め部BKT基準旋回', 'ﾁｭｰﾌﾞ挿入部ｸﾗﾝﾌﾟ', '搬送部ﾘﾌﾀ']
+MOVES = [('前進', '前進端'), ('後退', '後退端'), ('上昇', '上昇端'), ('下降', '下降端')]
+
+'''
+    splitmix64 on uint64 arrays: a stateless hash, so the same (signal, cycle) always gives the same draw.
+'''
+def _mix(v):
+    with np.errstate(over='ignore'):  # Wrap-around is intended.
+        v = np.asarray(v, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        v = (v ^ (v >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        v = (v ^ (v >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return v ^ (v >> np.uint64(31))
+
+def _uniform(seed, k, cycle, salt):
+    h = _mix(_mix(np.uint64(seed) * np.uint64(1_000_003) + np.uint64(salt)) ^ (np.uint64(k) << np.uint64(40)) ^ cycle.astype(np.uint64))
+    return (h >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+'''
+    Cross table and per-name cycle parameters.
+    n_signals larger than 2 * n_names adds unmapped columns, as the real files carry.
+'''
+class LogModel:
+    def __init__(self, n_names=76, n_signals=160, seed=0):
+        rng = np.random.default_rng(seed)
+        self.seed = int(seed)
+        self.names = [f'data{k + 1:03d}' for k in range(n_names)]
+        self.x = []
+        self.y = []
+        for k in range(n_names):
+            part = PARTS[k % len(PARTS)] + str(k // len(PARTS) + 1)
+            mx, my = MOVES[k % len(MOVES)]
+            self.x.append(f'{part} {mx}')
+            self.y.append(f'{part} {my}')
+        n_extra = max(n_signals - 2 * n_names, 0)
+        self.extra = [f'予備信号{k + 1:03d}' for k in range(n_extra)]
+        self.columns = self.x + self.y + self.extra
+
+        self.cycle_ns = (rng.uniform(15, 40, n_names) * NS_PER_SEC).astype(np.int64)  # machine cycle per actuator
+        self.offset_ns = (rng.uniform(0, 1, n_names) * self.cycle_ns).astype(np.int64)
+        self.stroke_ns = (rng.uniform(150, 1500, n_names) * NS_PER_MS).astype(np.int64)  # mean X->Y time
+        self.hold_ns = (rng.uniform(2, 6, n_names) * NS_PER_SEC).astype(np.int64)        # X/Y on time
+        self.extra_period_ns = (rng.uniform(5, 120, n_extra) * NS_PER_SEC).astype(np.int64)
+
+    def cross_table(self):
+        return pd.DataFrame({'name': self.names, 'x': self.x, 'y': self.y})
+
+    '''
+        0/1 matrix (rows, columns) of the signal values at the int64 times `t_ns`.
+    '''
+    def values(self, t_ns):
+        t = np.asarray(t_ns, dtype=np.int64)[:, None]
+        rel = t - self.offset_ns
+        cycle = np.floor_divide(rel, self.cycle_ns)
+        phase = rel - cycle * self.cycle_ns
+        k = np.arange(len(self.names))
+
+        # Stroke time jitter: about +-10 % (sum of two uniforms), slow drift over the year.
+        jit = _uniform(self.seed, k, cycle, 1) + _uniform(self.seed, k, cycle, 2) - 1.0
+        drift = 1.0 + 0.05 * np.sin(t / (86_400 * NS_PER_SEC * 30.0))
+        y_on = (self.stroke_ns * drift * (1.0 + 0.1 * jit)).astype(np.int64)
+        miss = _uniform(self.seed, k, cycle, 3) < 0.002            # end switch never reached
+        chatter = _uniform(self.seed, k, cycle, 4) < 0.01          # Y bounces once just after it turns on
+
+        x = (phase < self.hold_ns) & (cycle >= 0)
+        y = (phase >= y_on) & (phase < y_on + self.hold_ns) & ~miss & (cycle >= 0)
+        y &= ~(chatter & (phase >= y_on + 20 * NS_PER_MS) & (phase < y_on + 40 * NS_PER_MS))
+
+        e = np.floor_divide(t, self.extra_period_ns) % 2 == 1 if len(self.extra) else np.zeros((len(t), 0), bool)
+        return np.concatenate([x, y, e], axis=1).astype(np.uint8)
+
+'''
+    Encode one file as CP932 bytes: 2 preamble lines, the header, then "TIME,0,1,...".
+'''
+def encode_file(model, t_ns, header_bytes):
+    vals = model.values(t_ns)
+    times = np.char.replace(format_ns(t_ns), '-', '/').astype('S23')
+    n, m = vals.shape
+    body = np.full((n, 23 + 2 * m + 2), ord(','), dtype=np.uint8)
+    body[:, :23] = times.view(np.uint8).reshape(n, 23)
+    body[:, 24:23 + 2 * m:2] = vals + ord('0')
+    body[:, -2] = ord('\r')
+    body[:, -1] = ord('\n')
+    return header_bytes + body.tobytes()
+
+def header_bytes(model, when):
+    lines = [f'装置ログ,INPUT_M', f'出力日時,{when}', ','.join(['TIME'] + model.columns)]
+    return ('\r\n'.join(lines) + '\r\n').encode('cp932')
+
+'''
+    Write `days` day folders of logs starting at `start` (YYYYMMDD).
+     rate         :rows per second
+     file_sec     :seconds covered by one file (the equipment writes one every 10 s)
+     files_per_day:write only the first K files of each day (None:all), to scale long backlogs down
+    Return (files, rows) written.
+'''
+def generate(out_dir, model, start='20260101', days=1, rate=10.0, file_sec=10, files_per_day=None, seq0=0):
+    out_dir = Path(out_dir)
+    data = out_dir / 'data'
+    table = out_dir / 'table'
+    table.mkdir(parents=True, exist_ok=True)
+    model.cross_table().to_excel(table / 'd_tube_assembly.xlsx', index=False, engine='openpyxl')
+
+    rows = max(int(round(rate * file_sec)), 1)
+    step = file_sec * NS_PER_SEC // rows
+    per_day = 86_400 // file_sec
+    if files_per_day is not None:
+        per_day = min(per_day, int(files_per_day))
+    day0 = pd.Timestamp(start).as_unit('ns').value
+    seq = seq0
+    n_files = 0
+    for d in range(days):
+        t_day = day0 + d * 86_400 * NS_PER_SEC
+        folder = data / f"INPUT_M{pd.Timestamp(t_day).strftime('%Y%m%d')}"
+        folder.mkdir(parents=True, exist_ok=True)
+        for i in range(per_day):
+            t0 = t_day + i * file_sec * NS_PER_SEC
+            t_ns = t0 + np.arange(rows, dtype=np.int64) * step
+            stamp = pd.Timestamp(t0).strftime('%Y%m%d_%H%M%S')
+            data_bytes = encode_file(model, t_ns, header_bytes(model, pd.Timestamp(t0).strftime('%Y/%m/%d %H:%M:%S')))
+            path = folder / f'INPUT_M_{stamp}_{seq:08d}.CSV'
+            path.write_bytes(data_bytes)
+            seq += 1
+            n_files += 1
+    return n_files, n_files * rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='synthetic equipment log generator')
+    parser.add_argument('out_dir')
+    parser.add_argument('--days', type=int, default=1)
+    parser.add_argument('--start', default='20260101', help='first day (YYYYMMDD)')
+    parser.add_argument('--names', type=int, default=76, help='rows of the cross table')
+    parser.add_argument('--signals', type=int, default=160, help='signal columns per file')
+    parser.add_argument('--rate', type=float, default=10.0, help='rows per second')
+    parser.add_argument('--file-sec', type=int, default=10, help='seconds per file')
+    parser.add_argument('--files-per-day', type=int, default=None, help='only the first K files of each day')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    model = LogModel(args.names, args.signals, args.seed)
+    files, rows = generate(args.out_dir, model, args.start, args.days, args.rate, args.file_sec, args.files_per_day)
+    print(f'files:{files} rows:{rows} signals:{len(model.columns)} -> {args.out_dir}')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
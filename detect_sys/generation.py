@@ -0,0 +1,141 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import copy                                         # For the generation config.
+import json                                         # For the swap journal.
+import shutil                                       # For clearing an old generation.
+import logging                                      #
+from pathlib import Path                            # For filesystem path and operations.
+from datetime import datetime                       # For the backup suffix.
+
+'''
+    Output generation of a backfill.
+    Everything a run writes (per-name CSVs, output.csv, the previous snapshot, the state store,
+    statistics, baselines, alerts, parquet) is built under sibling paths named <path>.gen, then
+    swapped in with renames:  <path> -> <path>.old-<stamp>,  <path>.gen -> <path>.
+    Renames stay on the same volume, so each one is atomic. The list of renames is journaled
+    first; if the process dies in the middle, the next Engine start finishes the swap (recover),
+    so the live paths always end up as one complete generation.
+    The directory manifest and the state archive belong to the old state and are only moved away.
+'''
+GEN_SUFFIX = '.gen'
+SWAP_NAME = 'backfill_swap.json'
+
+## Config attributes written by a run. Directories first: files inside them move with them.
+OUTPUT_DIRS = ('output_dir', 'parquet_dir')
+OUTPUT_FILES = ('out_events', 'open_x_path', 'prev_path', 'state_db', 'stats_db', 'alerts_path', 'baseline_db', 'evicted_path')
+
+def _inside(p, d):
+    try:
+        Path(p).relative_to(d)
+        return True
+    except ValueError:
+        return False
+
+def _sibling(p, suffix):
+    p = Path(p)
+    return p.with_name(p.name + suffix)
+
+def _remove(p):
+    if p.is_dir():
+        shutil.rmtree(p)
+    elif p.exists():
+        p.unlink()
+
+'''
+    Swap journal of a config: next to the checkpoint journal.
+'''
+def swap_path(config):
+    ckpt = config.checkpoint_path if config.checkpoint_path is not None else config.run_base / 'checkpoint.json'
+    return Path(ckpt).with_name(SWAP_NAME)
+
+class Generation:
+    def __init__(self, config, stamp=None):
+        self.live = config
+        self.stamp = stamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.items = []     # [(gen or None, live)] top-level paths to swap
+        gen = copy.copy(config)
+
+        dirs = [getattr(config, a) for a in OUTPUT_DIRS if getattr(config, a) is not None]
+        for a in OUTPUT_DIRS + OUTPUT_FILES:
+            p = getattr(config, a)
+            if p is None:
+                continue
+            parent = next((d for d in dirs if d != p and _inside(p, d)), None)
+            if parent is None:
+                setattr(gen, a, _sibling(p, GEN_SUFFIX))
+                self.items.append((_sibling(p, GEN_SUFFIX), Path(p)))
+            else:
+                setattr(gen, a, _sibling(parent, GEN_SUFFIX) / Path(p).relative_to(parent))
+
+        # Old state only: moved away, nothing replaces them.
+        state_db = Path(config.state_db)
+        self.items.append((None, state_db.with_name(state_db.stem + '_archive' + state_db.suffix)))
+        if config.manifest_path is not None:
+            self.items.append((None, Path(config.manifest_path)))
+
+        gen.checkpoint_path = _sibling(swap_path(config).with_name('checkpoint.json'), GEN_SUFFIX)
+        gen.state_path = None           # No legacy import into a new generation.
+        gen.manifest_path = None
+        gen.state_keep_days = 0         # The live run archives after the swap.
+        self.config = gen
+
+    '''
+        Clear what is left of an earlier, unfinished backfill.
+    '''
+    def prepare(self):
+        for g, _ in self.items:
+            if g is not None:
+                _remove(g)
+        _remove(Path(self.config.checkpoint_path))
+
+    '''
+        Move the generation into place. The Engines of both configs must be closed.
+        Return the backup paths of the old generation.
+    '''
+    def swap(self):
+        # A generation path that was never written (e.g. no alerts) only moves the old one away.
+        items = [[str(g) if g is not None and g.exists() else None, str(p), str(_sibling(p, f'.old-{self.stamp}'))]
+                 for g, p in self.items]
+        path = swap_path(self.live)
+        tmp = _sibling(path, '.tmp')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'items': items}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _apply(items)
+        path.unlink(missing_ok=True)
+        return [b for _, p, b in items if os.path.exists(b)]
+
+'''
+    Idempotent: the journal only lists generation paths that existed, so a missing one has already
+    been moved in and is skipped when the journal is replayed.
+'''
+def _apply(items):
+    for g, live, backup in items:
+        if g is None:
+            if os.path.exists(live) and not os.path.exists(backup):
+                os.replace(live, backup)
+        elif os.path.exists(g):
+            if os.path.exists(live):
+                os.replace(live, backup)
+            os.replace(g, live)
+
+'''
+    Finish a swap left by a crash. Call before anything reads the live paths.
+'''
+def recover(config):
+    path = swap_path(config)
+    if not path.exists():
+        return
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            items = json.load(f)['items']
+    except (OSError, ValueError, KeyError):
+        logging.warning(f'generation:unreadable swap journal {path}, removed')
+        path.unlink(missing_ok=True)
+        return
+    logging.warning(f'generation:completing an interrupted swap ({len(items)} paths)')
+    _apply(items)
+    path.unlink(missing_ok=True)
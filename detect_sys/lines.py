@@ -0,0 +1,318 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import sys                                          #
+import json                                         # For the status file.
+import time                                         # For lag and polling.
+import logging                                      #
+import argparse                                     # For command line options.
+import threading                                    # For one pipeline thread per line.
+from collections import deque                       # For the files in flight of a line.
+from functools import partial                       #
+from pathlib import Path                            # For filesystem path and operations.
+from concurrent.futures import ProcessPoolExecutor  # For the pool shared by all lines.
+from engine import Engine, Config, load_toml, as_abs  # The pipeline of one line (see engine.py).
+
+'''
+    Supervisor of several lines (one config.toml each) in one process.
+    Every line keeps its own Engine (cross table, state, outputs) in a thread of this process;
+    only the parse + edge detection of the files runs on one process pool shared by all lines
+    (parallel.parse_line), so the interpreter and pandas start once per worker, not per line.
+    Pool slots are handed out by weighted fair share: a free slot goes to the line with files
+    left to submit that has the fewest files in flight per unit of weight, and a line never
+    holds more than its max_workers slots. A line with a large backlog therefore cannot starve
+    the others, and slots no other line asks for are not left idle.
+    Each line's results are still stitched and paired in file order by its Engine, so the
+    outputs are the same as running that line alone.
+
+    lines.toml:
+     [supervisor]  workers, poll_interval_sec, status_path
+     [[line]]      name, config, weight, max_workers
+    Status (per line: pending files, lag = age of the oldest pending file, files/pairs done,
+    last error) is logged and written to status_path after every round.
+'''
+
+class FairPool:
+    def __init__(self, workers, lines):
+        from parallel import _init_lines
+        self.workers = workers
+        self.weight = {k: float(v['weight']) for k, v in lines.items()}
+        self.limit = {k: (v['max_workers'] or workers) for k, v in lines.items()}
+        self.inflight = dict.fromkeys(lines, 0)
+        self.served = dict.fromkeys(lines, 0)    # grant counter of the last slot, for ties
+        self.total = 0
+        self._grants = 0
+        self._waiting = set()   # lines blocked until they get a slot
+        self._wanting = set()   # lines with files left to submit
+        self._cond = threading.Condition()
+        self.ex = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_lines, initargs=({k: v['ctx'] for k, v in lines.items()},),
+        )
+
+    def _share(self, line):
+        return self.inflight[line] / self.weight[line]
+
+    def _free(self, line):
+        return self.total < self.workers and self.inflight[line] < self.limit[line]
+
+    def _grant(self, line):
+        self.inflight[line] += 1
+        self.total += 1
+        self._grants += 1
+        self.served[line] = self._grants
+
+    '''
+        Take a slot for `line`. block:False returns False at once when the slot should go to
+        another line with files left (or there is none); block:True waits for its turn among the
+        blocked lines, so a line with nothing in flight always gets a slot eventually.
+    '''
+    def _acquire(self, line, block):
+        key = lambda k: (self._share(k), self.served[k])
+        with self._cond:
+            if not block:
+                if self._free(line) and all(key(w) >= key(line) for w in self._wanting | self._waiting if self._free(w)):
+                    self._grant(line)
+                    return True
+                return False
+            self._waiting.add(line)
+            try:
+                while not (self._free(line) and line == min((w for w in self._waiting if self._free(w)), key=key)):
+                    self._cond.wait()
+                self._grant(line)
+                self._cond.notify_all()     # Other waiting lines may fit in the slots still free.
+                return True
+            finally:
+                self._waiting.discard(line)
+
+    def _release(self, line, fut):
+        with self._cond:
+            self.inflight[line] -= 1
+            self.total -= 1
+            self._cond.notify_all()
+
+    '''
+        parallel.iter_parsed() of one line on the shared pool: results in the order of `paths`.
+        At most 2 x max_workers results of a line are held, so memory stays bounded.
+    '''
+    def iter_parsed(self, line, paths):
+        from parallel import parse_line
+        window = 2 * self.limit[line]
+        q = deque()
+        it = iter(paths)
+        nxt = next(it, None)
+        try:
+            while nxt is not None or q:
+                with self._cond:
+                    self._wanting.add(line)
+                while nxt is not None and len(q) < window and self._acquire(line, block=not q):
+                    fut = self.ex.submit(parse_line, line, nxt)
+                    fut.add_done_callback(partial(self._release, line))
+                    q.append(fut)
+                    nxt = next(it, None)
+                if nxt is None:
+                    with self._cond:
+                        self._wanting.discard(line)
+                        self._cond.notify_all()
+                yield q.popleft().result()
+        finally:
+            with self._cond:
+                self._wanting.discard(line)
+                self._cond.notify_all()
+            for fut in q:
+                fut.cancel()
+
+    def shutdown(self):
+        self.ex.shutdown(wait=True, cancel_futures=True)
+
+'''
+    One line: its Engine and the status reported by the supervisor.
+'''
+class Line:
+    def __init__(self, name, config, weight=1.0, max_workers=0):
+        self.name = name
+        self.engine = Engine(config)
+        self.weight = weight
+        self.max_workers = max_workers
+        self.ctx = None     # Worker settings of parallel._init_lines, once loaded.
+        self.status = {'state': 'idle', 'pending': 0, 'lag_sec': 0.0, 'files': 0, 'pairs': 0, 'rounds': 0, 'error': None}
+
+    '''
+        Load the Engine. Called in the line's own thread: its SQLite connections belong to it.
+    '''
+    def load(self):
+        e = self.engine
+        try:
+            e._load()
+        except Exception as ex:
+            self.status['error'] = f'{type(ex).__name__}: {ex}'
+            logging.exception('lines:failed to load, line skipped')
+            return
+        c = e.config
+        self.ctx = (e.signals, c.encoding, c.header_row, c.debounce_n, c.fast_reader)
+
+    '''
+        Engine.reload() after a failed round. The pool workers keep the signal list they started
+        with, so a line whose cross table changed in between is stopped (restart the supervisor).
+    '''
+    def reload(self):
+        e = self.engine
+        try:
+            e.reload()
+        except Exception as ex:
+            self.status['error'] = f'{type(ex).__name__}: {ex}'
+            self.ctx = None
+            logging.exception('lines:failed to reload, line stopped')
+            return
+        if list(e.signals) != list(self.ctx[0]):
+            self.status['error'] = 'cross table changed, restart the supervisor'
+            self.ctx = None
+            logging.error('lines:cross table changed, line stopped')
+
+    '''
+        One round: find the pending files, measure the lag and process them.
+        watch:resident mode, files still being written are held back (write guard) for the next round.
+    '''
+    def run_round(self, watch=False):
+        e = self.engine
+        st = self.status
+        try:
+            pending = e.find_pending()
+            st['pending'] = len(pending)
+            st['lag_sec'] = round(time.time() - os.path.getmtime(e.base / pending[0]), 3) if pending else 0.0
+            if pending:
+                st['state'] = 'busy'
+                batch = e.process(pending, guard=True if watch else None)
+                st['files'] += len(batch.files)
+                st['pairs'] += sum(len(v[2]) for v in batch.pairs.values())
+                left = [r for r in pending if r not in e.already]
+                st['pending'] = len(left)
+                st['lag_sec'] = round(time.time() - os.path.getmtime(e.base / left[0]), 3) if left else 0.0
+                e.metrics.write()
+                e.metrics.reset()
+                logging.info(f'totalfile:{len(batch.files)}')
+            st['error'] = None
+        except Exception as ex:
+            st['error'] = f'{type(ex).__name__}: {ex}'
+            logging.exception('lines:failed to process, reload the last checkpoint and retry on next round')
+            self.reload()
+        st['state'] = 'idle' if self.ctx is not None else 'stopped'
+        st['rounds'] += 1
+        st['last_round'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+class Supervisor:
+    def __init__(self, path):
+        path = Path(path)
+        dic = load_toml(path)
+        base = path.resolve().parent
+        sup = dic.get('supervisor', {})
+        self.workers = int(sup.get('workers', 0)) or os.cpu_count() or 1                        #Shared_pool_processes(0:all_cores)
+        self.poll = float(sup.get('poll_interval_sec', 5.0))                                    #Polling_interval_seconds
+        self.status_path = as_abs(sup.get('status_path', 'lines_status.json'), base)            #Per-line_status(empty:OFF)
+        self.lines = {}
+        for d in dic.get('line', []):
+            name = str(d['name'])
+            if name in self.lines:
+                raise ValueError(f'lines:duplicate line name:{name}')
+            self.lines[name] = Line(
+                name, Config.load(as_abs(d['config'], base)),
+                float(d.get('weight', 1.0)), int(d.get('max_workers', 0)),
+            )
+            if self.lines[name].weight <= 0:
+                raise ValueError(f'lines:weight of {name} must be > 0')
+        if not self.lines:
+            raise ValueError(f'lines:no [[line]] in {path}')
+        self.stop = threading.Event()
+        self.pool = None
+        self._loaded = threading.Barrier(len(self.lines) + 1)
+        self._go = threading.Event()
+
+    '''
+        Create the shared pool for the lines that loaded.
+    '''
+    def start(self):
+        ready = {name: ln for name, ln in self.lines.items() if ln.ctx is not None}
+        if ready:
+            self.pool = FairPool(self.workers, {
+                name: {'ctx': ln.ctx, 'weight': ln.weight, 'max_workers': ln.max_workers} for name, ln in ready.items()
+            })
+            for name, ln in ready.items():
+                ln.engine.parse_pool = partial(self.pool.iter_parsed, name)
+        logging.info(f'lines:{len(ready)}/{len(self.lines)} lines on {self.workers} shared workers')
+
+    '''
+        Thread of one line: load, wait for the pool, then run rounds.
+    '''
+    def _loop(self, ln, watch):
+        try:
+            ln.load()
+            self._loaded.wait()
+            self._go.wait()
+            while ln.ctx is not None:
+                ln.run_round(watch)
+                if not watch or self.stop.wait(self.poll):
+                    return
+        finally:
+            ln.engine.close()
+
+    def write_status(self):
+        status = {name: dict(ln.status) for name, ln in self.lines.items()}
+        logging.info('lines:' + ' | '.join(
+            f"{n} pending:{s['pending']} lag:{s['lag_sec']:.1f}s files:{s['files']}" + (' ERROR' if s['error'] else '')
+            for n, s in status.items()
+        ))
+        if self.status_path is not None:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.status_path.with_name(self.status_path.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'lines': status}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.status_path)
+
+    '''
+        Run every line once (watch:False) or until interrupted, one thread per line.
+    '''
+    def run(self, watch=False):
+        threads = [
+            threading.Thread(target=self._loop, args=(ln, watch), name=name, daemon=True)
+            for name, ln in self.lines.items()
+        ]
+        for t in threads:
+            t.start()
+        self._loaded.wait()
+        try:
+            self.start()
+        finally:
+            self._go.set()
+        try:
+            while any(t.is_alive() for t in threads):
+                for t in threads:
+                    t.join(self.poll)
+                self.write_status()
+        except KeyboardInterrupt:
+            logging.info('lines:stopping')
+            self.stop.set()
+            for t in threads:
+                t.join()
+            self.write_status()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+def main(argv=None):
+    from main import setup_logging
+    parser = argparse.ArgumentParser(description='detect_sys supervisor of several lines')
+    parser.add_argument('--lines', default=None, help='lines.toml (default: next to lines.py)')
+    parser.add_argument('--watch', action='store_true', help='keep polling every line')
+    args = parser.parse_args(argv)
+
+    path = Path(args.lines) if args.lines is not None else Path(__file__).resolve().parent / 'lines.toml'
+    setup_logging(path.resolve().parent / 'logs', level=logging.INFO)
+    for h in logging.getLogger().handlers:
+        h.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(threadName)s %(message)s'))
+    sup = Supervisor(path)
+    try:
+        sup.run(args.watch)
+    finally:
+        sup.close()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
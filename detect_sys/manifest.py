@@ -0,0 +1,137 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import json                                         # For working with JSON.
+import fnmatch                                      # For matching file names against glob_csv.
+import logging                                      #
+from pathlib import Path                            # For filesystem path and operations.
+
+'''
+    Incremental directory manifest.
+    Remembers, per folder directly under base (e.g. INPUT_M20260114), its mtime, the mtimes of its
+    subfolders, its file count and whether every file in it has been processed. A folder that is
+    done is skipped without being listed while
+     - its mtime and the mtime of every subfolder are unchanged (a file added in a subfolder only
+       touches that subfolder), and
+     - the state store still has at least `count` processed files under it,
+    so closed day folders cost a few stats and one indexed count instead of a full listing.
+    The manifest belongs to one state store (StateStore.store_id). When the store changes (state.db
+    deleted or replaced to reprocess), every folder is listed again.
+'''
+class DirManifest:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.store = None   # store_id of the state store the records were made against
+        self.dirs = {}      # folder name -> {'mtime':float, 'subdirs':{rel:mtime}, 'count':int, 'done':bool}
+        self._open = {}     # folder name -> pending rel paths found by the last scan
+        if self.path.exists() and self.path.stat().st_size > 0:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    d = json.load(f)
+                self.store, self.dirs = d.get('store'), d.get('dirs', {})
+            except Exception:
+                logging.warning(f'manifest:cannot read {self.path}, rebuild')
+                self.dirs = {}
+
+    '''
+        True if a done folder is unchanged and still processed (see the class note).
+    '''
+    def _unchanged(self, e, rec, already):
+        if not rec or not rec.get('done') or rec.get('mtime') != e.stat().st_mtime:
+            return False
+        for rel, mt in rec.get('subdirs', {}).items():
+            try:
+                if os.stat(os.path.join(e.path, rel)).st_mtime != mt:
+                    return False
+            except OSError:
+                return False
+        return already.count_under(e.name) >= rec.get('count', 0)
+
+    '''
+        Return [(rel, mtime)] of the files under base that match `pattern` (one glob or a list) and are
+        not in `already`.
+        keep_dir:Called with a folder name before it is listed. False prunes the folder (RECENT_DAYS).
+        os.scandir():The DirEntry.stat() result comes with the listing on Windows/SMB, no extra round trip.
+    '''
+    def scan(self, base, pattern, already, keep_dir=None):
+        base = Path(base)
+        pats = [pattern] if isinstance(pattern, str) else list(pattern)
+        match = lambda name: any(fnmatch.fnmatch(name, p) for p in pats)
+        found = []
+        self._open = {}
+        if self.store != already.store_id:
+            if self.dirs:
+                logging.info('manifest:state store changed, list every folder again')
+            self.store, self.dirs = already.store_id, {}
+        with os.scandir(base) as it:
+            entries = list(it)
+
+        for e in entries:
+            if e.is_file():
+                if match(e.name) and e.name not in already:
+                    found.append((e.name, e.stat().st_mtime))
+                continue
+            if not e.is_dir():
+                continue
+            if keep_dir is not None and not keep_dir(e.name):
+                continue
+
+            if self._unchanged(e, self.dirs.get(e.name), already):
+                continue
+
+            mt = e.stat().st_mtime
+            count = 0
+            pending = []
+            subdirs = {}
+            for rel, f in _walk(e.path, e.name, subdirs):
+                if not match(f.name):
+                    continue
+                count += 1
+                if rel not in already:
+                    pending.append((rel, f.stat().st_mtime))
+            self.dirs[e.name] = {'mtime': mt, 'subdirs': subdirs, 'count': count, 'done': not pending}
+            if pending:
+                self._open[e.name] = {r for r, _ in pending}
+            found.extend(pending)
+
+        # Forget folders that were removed from the share.
+        names = {e.name for e in entries}
+        for name in list(self.dirs):
+            if name not in names:
+                del self.dirs[name]
+        return found
+
+    '''
+        Mark the folders whose pending files are all in `already` as done and save the manifest.
+    '''
+    def commit(self, already):
+        for name, pending in self._open.items():
+            if name in self.dirs:
+                self.dirs[name]['done'] = all(r in already for r in pending)
+        self._open = {n: p for n, p in self._open.items() if not self.dirs.get(n, {}).get('done')}
+        self.save()
+
+    '''
+        Write to a temporary file and replace, so a crash never leaves a half-written manifest.
+    '''
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as w:
+            json.dump({'store': self.store, 'dirs': self.dirs}, w, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+'''
+    Yield (rel, DirEntry) for every file under `path`, recursively. rel is POSIX-style from base.
+    subdirs:filled with {path relative to `path`: mtime} of every subfolder.
+'''
+def _walk(path, rel_dir, subdirs=None, sub=''):
+    with os.scandir(path) as it:
+        entries = list(it)
+    for e in entries:
+        rel = f'{rel_dir}/{e.name}'
+        if e.is_dir():
+            if subdirs is not None:
+                subdirs[sub + e.name] = e.stat().st_mtime
+            yield from _walk(e.path, rel, subdirs, sub + e.name + '/')
+        elif e.is_file():
+            yield rel, e
@@ -0,0 +1,154 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import json                                         # For the metrics file.
+import time                                         # For timing.
+from datetime import datetime                       # For the run id.
+from pathlib import Path                            # For filesystem path and operations.
+
+'''
+    Per-stage timing and counters of one run.
+    with metrics.stage('read'): ...   accumulates seconds and calls of the stage
+    metrics.add('rows', n)            accumulates a counter
+    metrics.set('backlog', n)         sets a gauge
+    write() stores a JSON file per run and a Prometheus textfile (node exporter textfile collector).
+    Run ids are unique per process (time, pid, sequence), and only the newest `keep` JSON files
+    are kept, so a resident process writing one per round does not fill the folder.
+    When disabled, stage() returns a shared no-op context and add()/set() return at once,
+    so the instrumented code costs one attribute check per call.
+'''
+class _NullStage:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullStage()
+
+class _Stage:
+    __slots__ = ('m', 'name', 't0')
+    def __init__(self, m, name):
+        self.m = m
+        self.name = name
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        st = self.m.stages.setdefault(self.name, [0.0, 0])
+        st[0] += time.perf_counter() - self.t0
+        st[1] += 1
+        return False
+
+## Prometheus metric names and help texts
+PROM_PREFIX = 'detect_sys'
+PROM_HELP = {
+    'files': 'Files processed in the last run.',
+    'rows': 'Rows read in the last run.',
+    'events': 'Rising edges mapped to a name in the last run.',
+    'pairs': 'X/Y pairs written in the last run.',
+    'backlog': 'Pending files found at the start of the last run.',
+    'open_x': 'Unmatched X kept after the last run.',
+    'open_x_evicted': 'Unmatched X evicted by the max-age/max-count rules in the last run.',
+    'prefetch_hidden_sec': 'Read time of prefetched files overlapped with processing in the last run.',
+}
+
+class Metrics:
+    def __init__(self, enabled=False, json_dir=None, prom_path=None, keep=0):
+        self.enabled = bool(enabled)
+        self.json_dir = Path(json_dir) if json_dir is not None else None
+        self.prom_path = Path(prom_path) if prom_path is not None else None
+        self.keep = int(keep)   # newest JSON files kept in json_dir (0:all)
+        self._seq = 0
+        self.reset()
+
+    '''
+        Start a new run (the resident mode calls this for every round).
+    '''
+    def reset(self):
+        self._seq += 1
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{self._seq:06d}"
+        self.t_start = time.time()
+        self.stages = {}     # name -> [seconds, calls]
+        self.counts = {}
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL
+        return _Stage(self, name)
+
+    def add(self, key, n=1):
+        if self.enabled:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def set(self, key, v):
+        if self.enabled:
+            self.counts[key] = v
+
+    def snapshot(self):
+        return {
+            'run_id': self.run_id,
+            'start': datetime.fromtimestamp(self.t_start).isoformat(timespec='seconds'),
+            'duration_sec': round(time.time() - self.t_start, 6),
+            'stages': {k: {'sec': round(v[0], 6), 'calls': v[1]} for k, v in self.stages.items()},
+            'counts': dict(self.counts),
+        }
+
+    def _prom_text(self, snap):
+        p = PROM_PREFIX
+        lines = [
+            f'# HELP {p}_run_duration_seconds Wall time of the last run.',
+            f'# TYPE {p}_run_duration_seconds gauge',
+            f"{p}_run_duration_seconds {snap['duration_sec']}",
+            f'# HELP {p}_last_run_timestamp_seconds Unix time the last run finished.',
+            f'# TYPE {p}_last_run_timestamp_seconds gauge',
+            f'{p}_last_run_timestamp_seconds {int(time.time())}',
+            f'# HELP {p}_stage_seconds Time spent in each stage in the last run.',
+            f'# TYPE {p}_stage_seconds gauge',
+        ]
+        lines += [f'{p}_stage_seconds{{stage="{k}"}} {v["sec"]}' for k, v in sorted(snap['stages'].items())]
+        lines += [f'# HELP {p}_stage_calls Calls of each stage in the last run.', f'# TYPE {p}_stage_calls gauge']
+        lines += [f'{p}_stage_calls{{stage="{k}"}} {v["calls"]}' for k, v in sorted(snap['stages'].items())]
+        for k, v in sorted(snap['counts'].items()):
+            lines += [
+                f"# HELP {p}_{k} {PROM_HELP.get(k, k + '.')}",
+                f'# TYPE {p}_{k} gauge',
+                f'{p}_{k} {v}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+    '''
+        Write the JSON file of this run and the Prometheus textfile.
+        Both are written to a tmp file and moved into place, so a reader never sees half a file.
+    '''
+    def write(self):
+        if not self.enabled:
+            return
+        snap = self.snapshot()
+        if self.json_dir is not None:
+            self.json_dir.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self.json_dir / f'metrics_{self.run_id}.json', json.dumps(snap, ensure_ascii=False, indent=2))
+            self.prune()
+        if self.prom_path is not None:
+            self.prom_path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self.prom_path, self._prom_text(snap))
+
+    '''
+        Remove the oldest JSON files beyond `keep` (by mtime, then name).
+    '''
+    def prune(self):
+        if self.keep <= 0 or self.json_dir is None:
+            return
+        files = []
+        for p in self.json_dir.glob('metrics_*.json'):
+            try:
+                files.append((p.stat().st_mtime_ns, p.name, p))
+            except OSError:
+                continue
+        for _, _, p in sorted(files)[:-self.keep]:
+            p.unlink(missing_ok=True)
+
+def _atomic_write(path, text):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(text)
+    os.replace(tmp, path)
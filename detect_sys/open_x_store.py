@@ -0,0 +1,96 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import sys                                          #
+import json                                         # For the header.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+
+'''
+    Binary store of the unmatched X (open_x), replacing the output.csv round trip.
+     magic   b'OPX1'
+     u32     length of the header JSON, then the header (padded to 8 bytes):
+             {"clock": ns, "names": [...], "counts": [...]}
+     times   int64 epoch ns of every name, concatenated in header order (queue order per name)
+    Loading reads the body with one np.fromfile and splits it into per-name views; saving is one
+    concatenate and one write. No per-row Python work and no pandas on either side.
+    clock is the newest event time seen so far, the reference of the max-age eviction.
+'''
+MAGIC = b'OPX1'
+EVICT_COLUMNS = ['Name', 'TIME', 'TIME_NS', 'REASON', 'CLOCK']
+
+def _empty():
+    return np.empty(0, dtype=np.int64)
+
+'''
+    Return ({name: int64 array}, clock_ns). A missing file is an empty store.
+'''
+def load(path):
+    if not os.path.exists(path):
+        return {}, 0
+    with open(path, 'rb') as f:
+        if f.read(4) != MAGIC:
+            raise ValueError(f'open_x:not an open-X store:{path}')
+        n_head = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+        head = json.loads(f.read(n_head))
+        body = np.fromfile(f, dtype='<i8')
+    counts = np.asarray(head['counts'], dtype=np.int64)
+    if counts.sum() != len(body):
+        raise ValueError(f'open_x:truncated store:{path}')
+    parts = np.split(body.astype(np.int64, copy=False), np.cumsum(counts)[:-1]) if len(counts) else []
+    return dict(zip(head['names'], parts)), int(head['clock'])
+
+def save(path, open_x, clock):
+    names = sorted(nm for nm, t in open_x.items() if len(t))
+    head = json.dumps({
+        'clock': int(clock), 'names': names, 'counts': [len(open_x[nm]) for nm in names],
+    }, ensure_ascii=False).encode('utf-8')
+    head += b' ' * (-(8 + len(head)) % 8)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(MAGIC + np.uint32(len(head)).tobytes() + head)
+        if names:
+            np.concatenate([open_x[nm] for nm in names]).astype('<i8', copy=False).tofile(f)
+
+'''
+    Drop open X older than max_age_ns before `clock` and keep at most max_count per name (the
+    newest in queue order). 0 disables a rule. open_x is updated in place.
+    Return the evicted entries as (names, times, reasons), or None.
+'''
+def evict(open_x, clock, max_age_ns=0, max_count=0):
+    names, times, reasons = [], [], []
+    for nm, t in open_x.items():
+        if not len(t):
+            continue
+        if max_age_ns > 0:
+            old = t < clock - max_age_ns
+            if old.any():
+                names += [nm] * int(old.sum())
+                times.append(t[old])
+                reasons += ['age'] * int(old.sum())
+                t = t[~old]
+        if max_count > 0 and len(t) > max_count:
+            k = len(t) - max_count
+            names += [nm] * k
+            times.append(t[:k])
+            reasons += ['count'] * k
+            t = t[k:]
+        open_x[nm] = t
+    if not names:
+        return None
+    return names, np.concatenate(times), reasons
+
+'''
+    Print a store as the former output.csv (Name, TIME, IO, TIME_NS) for a quick look.
+'''
+def main(argv=None):
+    import pandas as pd
+    from timeutil import format_ns
+    open_x, clock = load(argv[0])
+    names = [nm for nm, t in open_x.items() for _ in range(len(t))]
+    ns = np.concatenate(list(open_x.values())) if open_x else _empty()
+    df = pd.DataFrame({'Name': names, 'TIME': format_ns(ns), 'IO': 'X', 'TIME_NS': ns})
+    df.to_csv(sys.stdout, index=False)
+    print(f'# clock {format_ns(np.array([clock], dtype=np.int64))[0]}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,294 @@
+## Standard library
+import io                                           # For parsing the bytes of a range.
+import os                                           # For OS-dependent features.
+import sys                                          #
+import json                                         # For the header.
+import hashlib                                      # For the file fingerprint.
+import logging                                      #
+import argparse                                     # For command line options.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pandas as pd                                 # For query results.
+from timeutil import parse_time_bytes, parse_time_ns, format_ns  # TIME <-> int64 ns.
+
+'''
+    Sparse time index of the per-name pair CSVs (output_dir/<name>.csv, appended by the engine),
+    so a time-range query reads only the bytes of that range instead of months of rows.
+    One sidecar index_dir/<name>.csv.idx per CSV (paths.index_dir, kept out of output_dir so a
+    backfill generation swap never brings an old index along with its CSVs):
+     magic   b'PXI1'
+     u32     length of the header JSON, then the header (padded to 8 bytes):
+             {"size": indexed bytes, "finger": hash of the head and tail, "columns": [...], "blocks": n,
+              "csv": CSV path, "file_size": CSV size, "mtime_ns": CSV mtime}
+     blocks  5 int64 arrays of n: byte offset, hour of the first row, min X_TIME, max X_TIME, rows
+    A block is a run of rows of the same hour of X_TIME, cut at BLOCK_ROWS rows.
+    Before use the index is checked against the CSV: same path, size and mtime as indexed means
+    nothing to do. A CSV that only grew is brought up to date by parsing just the appended bytes.
+    A CSV that shrank, was rewritten at the same size, or changed below the indexed size
+    (checkpoint rollback, backfill generation swap) is indexed again from the start.
+    The range lookup is a binary search on the running max of the block maxima and the suffix
+    min of the block minima, so it stays exact when X_TIME is not sorted (lifo, late files).
+    Ranges are [start, end) on X_TIME, like pair_store.read_pairs.
+'''
+MAGIC = b'PXI1'
+SUFFIX = '.idx'
+NS_PER_HOUR = 3_600 * 1_000_000_000
+BLOCK_ROWS = 8192
+SCAN_BYTES = 64 * 1024 * 1024
+TIME_WIDTH = 23     # "YYYY-MM-DD HH:MM:SS.fff" as written by format_ns
+FIELDS = ('off', 'key', 'tmin', 'tmax', 'rows')
+COLUMNS = ['Name', 'X_TIME', 'Y_TIME', 'DURATION_MS']
+
+def index_path(csv_path, index_dir):
+    return None if index_dir is None else Path(index_dir) / (Path(csv_path).name + SUFFIX)
+
+def _empty_index():
+    return {'size': 0, 'finger': '', 'columns': None, **{k: np.empty(0, dtype=np.int64) for k in FIELDS}}
+
+## (path, size, mtime) of the CSV, stored in the header and compared before the index is used
+def _stamp(csv_path, st):
+    return [str(Path(csv_path).resolve()), st.st_size, st.st_mtime_ns]
+
+'''
+    Hash of the first 4 KB and of the 64 bytes before `size`: changes when the indexed part of
+    the file is replaced, not when rows are appended after it.
+'''
+def _finger(f, size):
+    h = hashlib.sha1()
+    f.seek(0)
+    h.update(f.read(min(size, 4096)))
+    f.seek(max(0, size - 64))
+    h.update(f.read(min(size, 64)))
+    return h.hexdigest()[:16]
+
+def _load(path):
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        if f.read(4) != MAGIC:
+            return None
+        n_head = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+        head = json.loads(f.read(n_head))
+        body = np.fromfile(f, dtype='<i8')
+    n = head['blocks']
+    if len(body) != len(FIELDS) * n:
+        return None
+    idx = {'size': head['size'], 'finger': head['finger'], 'columns': head['columns'],
+           'stamp': [head.get('csv'), head.get('file_size'), head.get('mtime_ns')]}
+    idx.update({k: body[i * n:(i + 1) * n].astype(np.int64) for i, k in enumerate(FIELDS)})
+    return idx
+
+'''
+    Write the index to index_dir (None: not kept). A read-only folder only costs the rescan next time.
+'''
+def _save(path, idx):
+    if path is None:
+        return
+    csv, file_size, mtime_ns = idx['stamp']
+    head = json.dumps({
+        'size': idx['size'], 'finger': idx['finger'], 'columns': idx['columns'], 'blocks': len(idx['off']),
+        'csv': csv, 'file_size': file_size, 'mtime_ns': mtime_ns,
+    }, ensure_ascii=False).encode('utf-8')
+    head += b' ' * (-(8 + len(head)) % 8)
+    tmp = Path(str(path) + '.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + np.uint32(len(head)).tobytes() + head)
+            np.concatenate([idx[k] for k in FIELDS]).astype('<i8').tofile(f)
+        os.replace(tmp, path)
+    except OSError as ex:
+        logging.debug(f'pair_index:index not saved:{path}:{ex}')
+
+'''
+    X_TIME of every line. starts:offsets of the lines in buf, ends:offsets of their '\n'.
+'''
+def _line_times(buf, starts, ends):
+    if len(starts) and ((ends - starts) > TIME_WIDTH).all() and (buf[starts + TIME_WIDTH] == ord(',')).all():
+        ns = parse_time_bytes(buf[starts[:, None] + np.arange(TIME_WIDTH)])
+        if ns is not None:
+            return ns
+    raw = buf.tobytes()
+    return parse_time_ns([raw[a:b].split(b',', 1)[0].decode('ascii', 'replace').strip() for a, b in zip(starts, ends)])
+
+'''
+    Append the blocks of new rows (times ns, byte offsets offs) to idx.
+    The first rows continue the last block while they stay in its hour and under BLOCK_ROWS.
+'''
+def _add_blocks(idx, ns, offs):
+    key = ns // NS_PER_HOUR
+    prev_key = idx['key'][-1] if len(idx['off']) else None
+    change = np.empty(len(ns), dtype=bool)
+    change[0] = prev_key is None or key[0] != prev_key
+    change[1:] = key[1:] != key[:-1]
+    run_start = np.maximum.accumulate(np.where(change, np.arange(len(ns)), 0))
+    pos = np.arange(len(ns)) - run_start
+    if not change[0]:
+        first_run = run_start == 0
+        pos[first_run] += idx['rows'][-1]
+    start = change | (pos % BLOCK_ROWS == 0)
+    cut = np.flatnonzero(start)
+    if len(cut) == 0 or cut[0] != 0:
+        # The rows up to the first cut belong to the last block.
+        m = cut[0] if len(cut) else len(ns)
+        idx['tmin'][-1] = min(idx['tmin'][-1], ns[:m].min())
+        idx['tmax'][-1] = max(idx['tmax'][-1], ns[:m].max())
+        idx['rows'][-1] += m
+    if len(cut):
+        new = {
+            'off': offs[cut], 'key': key[cut],
+            'tmin': np.minimum.reduceat(ns[cut[0]:], cut - cut[0]), 'tmax': np.maximum.reduceat(ns[cut[0]:], cut - cut[0]),
+            'rows': np.diff(np.append(cut, len(ns))),
+        }
+        for k in FIELDS:
+            idx[k] = np.concatenate([idx[k], new[k]])
+
+'''
+    Bring the index of one pair CSV up to date and return it (see the module note).
+    Only complete lines are indexed; a row being appended right now is picked up next time.
+    index_dir:folder of the sidecars (None: index in memory only).
+'''
+def refresh(csv_path, index_dir=None):
+    csv_path = Path(csv_path)
+    ipath = index_path(csv_path, index_dir)
+    st = csv_path.stat()
+    size, stamp = st.st_size, _stamp(csv_path, st)
+    idx = _load(ipath)
+    if idx is not None and idx['stamp'] == stamp:
+        return idx
+    with open(csv_path, 'rb') as f:
+        old_path, old_size, _ = idx['stamp'] if idx is not None else (None, None, None)
+        if (idx is None or old_path != stamp[0] or old_size is None or size <= old_size
+                or idx['size'] > size or _finger(f, idx['size']) != idx['finger']):
+            idx = _empty_index()
+        idx['stamp'] = stamp
+        pos = idx['size']
+        f.seek(pos)
+        while pos < size:
+            buf = np.frombuffer(f.read(min(SCAN_BYTES, size - pos)), dtype=np.uint8)
+            nl = np.flatnonzero(buf == ord('\n'))
+            if len(nl) == 0:
+                if pos + len(buf) < size:
+                    raise ValueError(f'pair_index:line longer than {SCAN_BYTES} bytes in {csv_path}')
+                break
+            ends = nl
+            starts = np.concatenate([[0], nl[:-1] + 1])
+            if pos == 0:
+                columns = buf[:nl[0]].tobytes().decode('ascii', 'replace').strip().split(',')
+                if columns[:1] != ['X_TIME']:
+                    raise ValueError(f'pair_index:not a pair CSV (no X_TIME column):{csv_path}')
+                idx['columns'] = columns
+                starts, ends = starts[1:], ends[1:]
+            if len(starts):
+                _add_blocks(idx, _line_times(buf, starts, ends), starts.astype(np.int64) + pos)
+            pos += int(nl[-1]) + 1
+            f.seek(pos)
+        idx['size'] = pos
+        idx['finger'] = _finger(f, pos)
+    _save(ipath, idx)
+    return idx
+
+def _ns(t):
+    return None if t is None else pd.Timestamp(t).as_unit('ns').value
+
+'''
+    Rows of one pair CSV with start <= X_TIME < end (None: open), in file order.
+    Reads only the bytes of the blocks the binary search selects.
+'''
+def read_range(csv_path, start=None, end=None, encoding='cp932', index_dir=None):
+    idx = refresh(csv_path, index_dir)
+    start, end = _ns(start), _ns(end)
+    n = len(idx['off'])
+    run_max = np.maximum.accumulate(idx['tmax']) if n else idx['tmax']
+    suf_min = np.minimum.accumulate(idx['tmin'][::-1])[::-1] if n else idx['tmin']
+    lo = 0 if start is None else int(np.searchsorted(run_max, start, side='left'))
+    hi = n if end is None else int(np.searchsorted(suf_min, end, side='left'))
+    cols = idx['columns'] or COLUMNS[1:]
+    if lo >= hi:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in cols})
+    a = int(idx['off'][lo])
+    b = int(idx['off'][hi]) if hi < n else idx['size']
+    with open(csv_path, 'rb') as f:
+        f.seek(a)
+        data = f.read(b - a)
+    df = pd.read_csv(io.BytesIO(data), header=None, names=cols, encoding=encoding)
+    x = parse_time_ns(df['X_TIME'])
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= x >= start
+    if end is not None:
+        keep &= x < end
+    return df[keep].reset_index(drop=True)
+
+'''
+    Pairs of one name or a list of names (a dashboard panel) with start <= X_TIME < end.
+    Same frame as pair_store.read_pairs: Name, X_TIME, Y_TIME (datetime64), DURATION_MS,
+    sorted by Name and X_TIME. Names without a CSV are read from parquet_dir when it is given.
+'''
+def query(output_dir, names, start=None, end=None, encoding='cp932', parquet_dir=None, index_dir=None):
+    from engine import sanitize
+    names = [names] if isinstance(names, str) else list(dict.fromkeys(names))
+    frames, missing = [], []
+    for name in names:
+        p = Path(output_dir) / f'{sanitize(name)}.csv'
+        if not p.exists():
+            missing.append(name)
+            continue
+        df = read_range(p, start, end, encoding, index_dir)
+        frames.append(pd.DataFrame({
+            'Name': str(name),
+            'X_TIME': pd.to_datetime(df['X_TIME']).astype('datetime64[ns]'),
+            'Y_TIME': pd.to_datetime(df['Y_TIME']).astype('datetime64[ns]'),
+            'DURATION_MS': df['DURATION_MS'].astype(np.int64),
+        }, columns=COLUMNS))
+    if missing and parquet_dir is not None and Path(parquet_dir).is_dir():
+        from pair_store import read_pairs
+        frames.append(read_pairs(parquet_dir, missing, start, end, COLUMNS))
+    if not frames:
+        from pair_store import SCHEMA
+        return pd.DataFrame({c: pd.Series(dtype=SCHEMA[c]) for c in COLUMNS})
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values(['Name', 'X_TIME'], kind='stable', ignore_index=True)
+
+'''
+    Index every pair CSV of output_dir into index_dir (other CSVs are skipped). Return the number indexed.
+'''
+def build_all(output_dir, index_dir):
+    done = 0
+    for p in sorted(Path(output_dir).glob('*.csv')):
+        try:
+            refresh(p, index_dir)
+            done += 1
+        except ValueError:
+            continue
+    return done
+
+def main(argv=None):
+    from engine import Config
+    parser = argparse.ArgumentParser(description='time-range query of the per-name pair outputs')
+    parser.add_argument('names', nargs='*', help='names to query (several for a dashboard panel)')
+    parser.add_argument('--start', default=None, help='X_TIME from (inclusive), e.g. "2026-03-05 08:00"')
+    parser.add_argument('--end', default=None, help='X_TIME to (exclusive)')
+    parser.add_argument('--config', default=None, help='config.toml (default: next to the application)')
+    parser.add_argument('--out', default=None, help='write the result CSV here (default: stdout)')
+    parser.add_argument('--build', action='store_true', help='bring the index of every pair CSV up to date')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    c = Config.load(args.config)
+    if args.build:
+        logging.info(f'pair_index:{build_all(c.output_dir, c.index_dir)} pair CSVs of {c.output_dir} indexed in {c.index_dir}')
+    if not args.names:
+        return
+    df = query(c.output_dir, args.names, args.start, args.end, c.encoding, c.parquet_dir, c.index_dir)
+    if len(df):
+        df['X_TIME'] = format_ns(df['X_TIME'].to_numpy().view(np.int64))
+        df['Y_TIME'] = format_ns(df['Y_TIME'].to_numpy().view(np.int64))
+    if args.out is None:
+        df.to_csv(sys.stdout, index=False)
+    else:
+        df.to_csv(args.out, index=False, encoding=c.encoding)
+        logging.info(f'pair_index:{len(df)} pairs -> {args.out}')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
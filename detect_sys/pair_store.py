@@ -0,0 +1,206 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import re                                           # For regular expression.
+import time                                         # For file stamps.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pandas as pd                                 # For data analysis.
+
+## Optional: Parquet (pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+'''
+    Columnar sink for the X/Y pairs: Parquet files partitioned by name and by day of X_TIME.
+     <root>/name=<name>/day=YYYYMMDD/p<stamp>.parquet   one file per flush
+     <root>/name=<name>/day=YYYYMMDD/c<stamp>.parquet   compacted file
+    Partition folders use the same sanitized name as the per-name CSV.
+    A compacted file c<S> replaces every file of its folder with stamp <= S. Files it replaced
+    are ignored by readers and removed by the next compaction, so a crash in between never
+    shows a pair twice.
+'''
+SCHEMA = {'Name': 'object', 'X_TIME': 'datetime64[ns]', 'Y_TIME': 'datetime64[ns]', 'DURATION_MS': 'int64'}
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+def part_key(name):
+    return re.sub(r'[\\/:*?"<>|]', '_', str(name).strip() or 'noname')
+
+def _stamp(path):
+    return int(path.stem[1:])
+
+def _top_stamp(part_dir):
+    stamps = [_stamp(p) for p in part_dir.glob('*.parquet') if p.stem[:1] in ('p', 'c') and p.stem[1:].isdigit()]
+    return max(stamps, default=0)
+
+'''
+    Files of one partition folder that hold its current rows (see the module note).
+'''
+def _live_files(part_dir):
+    files = [p for p in part_dir.glob('*.parquet') if p.stem[:1] in ('p', 'c') and p.stem[1:].isdigit()]
+    comp = [p for p in files if p.stem[0] == 'c']
+    if not comp:
+        return sorted(files, key=_stamp)
+    top = max(comp, key=_stamp)
+    return [top] + sorted((p for p in files if _stamp(p) > _stamp(top)), key=_stamp)
+
+def _ts_scalar(t):
+    return pa.scalar(pd.Timestamp(t).as_unit('ns').value, pa.timestamp('ns'))
+
+def _day_range(start, end):
+    lo = None if start is None else pd.Timestamp(start).strftime('%Y%m%d')
+    hi = None if end is None else pd.Timestamp(end).strftime('%Y%m%d')
+    return lo, hi
+
+'''
+    Writer side. write() buffers nothing: each call writes one file per touched day.
+    compact() merges folders that reached `compact_min_files` files.
+'''
+class PairStore:
+    def __init__(self, root, compact_min_files=16):
+        if pa is None:
+            raise ImportError('pyarrow is required for the parquet output (pip install pyarrow)')
+        self.root = Path(root)
+        self.compact_min_files = int(compact_min_files)
+        self._last = max((_top_stamp(part) for part in self.root.glob('name=*/day=*')), default=0)  # Restart above what is stored.
+        self._touched = set()
+
+    '''
+        Stamp of the next flush: the clock, but always above the stored stamps (seen at start and
+        in the folders it goes to), so a clock stepped back, a restart or another writer can never
+        put a new file at or below a compacted one (it would be hidden, then removed by the next
+        compaction), and mark() stays above every committed file.
+    '''
+    def _next_stamp(self, parts=()):
+        self._last = max([time.time_ns(), self._last + 1] + [_top_stamp(p) + 1 for p in parts])
+        return self._last
+
+    '''
+        Lowest stamp the next write() will use (for rollback()).
+    '''
+    def mark(self):
+        return max(time.time_ns(), self._last + 1)
+
+    '''
+        Remove the flush files written from stamp `since` on (an uncommitted checkpoint).
+    '''
+    def rollback(self, since):
+        for p in self.root.glob('name=*/day=*/p*.parquet'):
+            if p.stem[1:].isdigit() and _stamp(p) >= since:
+                p.unlink(missing_ok=True)
+        self._touched.clear()
+
+    '''
+        Write a tmp file and move it into place, so readers never see a partial file.
+    '''
+    def _write(self, table, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        pq.write_table(table, tmp, compression='zstd')
+        os.replace(tmp, path)
+
+    '''
+        Append the pairs of one name. x_ns, y_ns:int64 epoch nanoseconds, dur_ms:int64.
+    '''
+    def write(self, name, x_ns, y_ns, dur_ms):
+        if len(x_ns) == 0:
+            return
+        x_ns = np.asarray(x_ns, dtype=np.int64)
+        y_ns = np.asarray(y_ns, dtype=np.int64)
+        dur_ms = np.asarray(dur_ms, dtype=np.int64)
+        day = np.floor_divide(x_ns, NS_PER_DAY)
+        days = np.unique(day)
+        parts = [self.root / f'name={part_key(name)}' / f"day={np.datetime64(int(d), 'D').astype(str).replace('-', '')}" for d in days]
+        stamp = self._next_stamp(parts)
+        for d, part in zip(days, parts):
+            sel = day == d
+            table = pa.table({
+                'Name': pa.array([str(name)] * int(sel.sum()), pa.string()).dictionary_encode(),
+                'X_TIME': pa.array(x_ns[sel].view('datetime64[ns]')),
+                'Y_TIME': pa.array(y_ns[sel].view('datetime64[ns]')),
+                'DURATION_MS': pa.array(dur_ms[sel]),
+            })
+            self._write(table, part / f'p{stamp}.parquet')
+            self._touched.add(part)
+
+    '''
+        Merge the live files of a folder into one c<stamp> file sorted by X_TIME, then remove
+        everything it replaced. folders:None means the folders written since the last call.
+        Return the number of folders compacted.
+    '''
+    def compact(self, folders=None, min_files=None):
+        min_files = self.compact_min_files if min_files is None else int(min_files)
+        if folders is None:
+            folders, self._touched = self._touched, set()
+        done = 0
+        for part in folders:
+            part = Path(part)
+            live = _live_files(part)
+            if len(live) >= max(min_files, 2):
+                top = max(_stamp(p) for p in live)
+                table = ds.dataset([str(p) for p in live], format='parquet').to_table()
+                table = table.sort_by([('X_TIME', 'ascending'), ('Y_TIME', 'ascending')])
+                self._write(table, part / f'c{top}.parquet')
+                done += 1
+            # Remove what the newest compacted file replaced (also left over from an interrupted run).
+            keep = set(_live_files(part))
+            for p in part.glob('*.parquet'):
+                if p not in keep:
+                    p.unlink(missing_ok=True)
+        return done
+
+    '''
+        Compact every folder under root (maintenance).
+    '''
+    def compact_all(self, min_files=None):
+        return self.compact(self.root.glob('name=*/day=*'), min_files)
+
+'''
+    Read pairs from a PairStore folder as a DataFrame (Name, X_TIME, Y_TIME, DURATION_MS).
+     names :name or list of names (None:all)
+     start :X_TIME >= start (None:no lower bound)
+     end   :X_TIME <  end   (None:no upper bound)
+    Names and the day range select partition folders before any file is opened;
+    the time filter is then pushed down to the Parquet row groups.
+'''
+def read_pairs(root, names=None, start=None, end=None, columns=None):
+    if pa is None:
+        raise ImportError('pyarrow is required for the parquet output (pip install pyarrow)')
+    root = Path(root)
+    if isinstance(names, str):
+        names = [names]
+    name_dirs = [root / f'name={k}' for k in dict.fromkeys(map(part_key, names))] if names else root.glob('name=*')
+
+    lo, hi = _day_range(start, end)
+    files = []
+    for nd in name_dirs:
+        if not nd.is_dir():
+            continue
+        for part in nd.glob('day=*'):
+            day = part.name[4:]
+            if (lo is not None and day < lo) or (hi is not None and day > hi):
+                continue
+            files += [str(p) for p in _live_files(part)]
+
+    cols = list(columns) if columns is not None else list(SCHEMA)
+    if not files:
+        return pd.DataFrame({c: pd.Series(dtype=SCHEMA[c]) for c in cols})
+
+    flt = None
+    if names:
+        flt = ds.field('Name').isin([str(n) for n in names])
+    if start is not None:
+        f = ds.field('X_TIME') >= _ts_scalar(start)
+        flt = f if flt is None else flt & f
+    if end is not None:
+        f = ds.field('X_TIME') < _ts_scalar(end)
+        flt = f if flt is None else flt & f
+    table = ds.dataset(files, format='parquet').to_table(columns=cols, filter=flt)
+    df = table.to_pandas()
+    if 'Name' in df.columns:
+        df['Name'] = df['Name'].astype(str)
+    sort = [c for c in ('Name', 'X_TIME') if c in df.columns]
+    return df.sort_values(sort, kind='stable', ignore_index=True) if sort else df
@@ -0,0 +1,120 @@
+## Standard library
+import numpy as np                                  # For vectorized X/Y pairing.
+
+'''
+    Batch X/Y pairing engine.
+    Works per name on sorted int64 time arrays (epoch nanoseconds).
+    Events are ordered by time and, at the same timestamp, X before Y.
+
+    fifo    :Y pairs with the oldest open X (queue).
+    lifo    :Y pairs with the newest open X (stack).
+    nearest :Y pairs with the newest open X and the older open X are dropped.
+'''
+FIFO = 'fifo'
+LIFO = 'lifo'
+NEAREST = 'nearest'
+STRATEGIES = (FIFO, LIFO, NEAREST)
+
+NS_PER_MS = 1_000_000
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+'''
+    Empty result of pair_name().
+'''
+def _no_pairs(remaining):
+    return _EMPTY, _EMPTY, _EMPTY, remaining
+
+'''
+    Walk of the open-X count over the merged event order, reflected at 0.
+    S[k]      :open count after the k-th Y if every Y found an X.
+    floor[k]  :min(0, S[0..k-1]), how far the walk has been pushed up by empty pops.
+    A Y finds the queue empty exactly when S drops below its previous floor.
+'''
+def _walk(q0, nx_before_y):
+    n_y = len(nx_before_y)
+    s = q0 + nx_before_y - np.arange(1, n_y + 1, dtype=np.int64)
+    floor = np.minimum.accumulate(np.concatenate(([0], s)))
+    matched = s >= floor[:-1]
+    return s, floor, matched
+
+'''
+    LIFO matching: a pop at level l takes the latest push that raised the stack to level l.
+    Positions are indexes in the merged event order; open X sit before every new event.
+'''
+def _lifo_index(q0, x_times, y_times, nx_before_y, s, floor, matched):
+    n_x = len(x_times)
+    ny_before_x = np.searchsorted(y_times, x_times, side='left')
+
+    # Level reached by each push (open X first, then new X).
+    x_level = np.empty(q0 + n_x, dtype=np.int64)
+    x_level[:q0] = np.arange(1, q0 + 1)
+    x_level[q0:] = q0 + np.arange(1, n_x + 1) - ny_before_x - floor[ny_before_x]
+    x_pos = np.empty(q0 + n_x, dtype=np.int64)
+    x_pos[:q0] = np.arange(q0)
+    x_pos[q0:] = q0 + np.arange(n_x) + ny_before_x
+
+    # Level popped by each matched Y (level before the pop).
+    y_idx = np.flatnonzero(matched)
+    y_level = s[y_idx] + 1 - floor[y_idx]
+    y_pos = q0 + nx_before_y[y_idx] + y_idx
+
+    span = q0 + n_x + len(y_times) + 1
+    x_key = x_level * span + x_pos
+    order = np.argsort(x_key, kind='stable')
+    hit = np.searchsorted(x_key[order], y_level * span + y_pos, side='left') - 1
+    return order[hit]
+
+'''
+    Pair one name's events.
+    open_x  :int64 open X times in queue (arrival) order, carried from earlier files.
+    x_times :sorted int64 X rising-edge times of this batch.
+    y_times :sorted int64 Y rising-edge times of this batch.
+    dur_min/dur_max :duration thresholds in ms (0:OFF). A filtered pair still consumes its X.
+    Return (x_paired, y_paired, dur_ms, remaining_open_x).
+'''
+def pair_name(open_x, x_times, y_times, strategy=FIFO, dur_min=0, dur_max=0):
+    if strategy not in STRATEGIES:
+        raise ValueError(f'unknown pairing strategy:{strategy}')
+
+    open_x = np.asarray(open_x, dtype=np.int64)
+    x_times = np.asarray(x_times, dtype=np.int64)
+    y_times = np.asarray(y_times, dtype=np.int64)
+    all_x = np.concatenate((open_x, x_times))
+    q0 = len(open_x)
+
+    if len(y_times) == 0 or len(all_x) == 0:
+        return _no_pairs(all_x)
+
+    nx_before_y = np.searchsorted(x_times, y_times, side='right') #X at the same time comes first.
+
+    if strategy == NEAREST:
+        x_idx = q0 + nx_before_y - 1
+        prev_max = np.maximum.accumulate(np.concatenate(([-1], x_idx)))
+        matched = x_idx > prev_max[:-1]
+        remaining = all_x[prev_max[-1] + 1:]
+        x_idx = x_idx[matched]
+    else:
+        s, floor, matched = _walk(q0, nx_before_y)
+        n_pairs = int(matched.sum())
+        if n_pairs == 0:
+            return _no_pairs(all_x)
+        if strategy == FIFO:
+            x_idx = np.arange(n_pairs)
+            remaining = all_x[n_pairs:]
+        else:
+            x_idx = _lifo_index(q0, x_times, y_times, nx_before_y, s, floor, matched)
+            keep = np.ones(len(all_x), dtype=bool)
+            keep[x_idx] = False
+            remaining = all_x[keep]
+
+    x_paired = all_x[x_idx]
+    y_paired = y_times[matched]
+    dur_ms = (y_paired - x_paired) // NS_PER_MS
+
+    ok = np.ones(len(dur_ms), dtype=bool)
+    if dur_min:
+        ok &= dur_ms >= dur_min
+    if dur_max:
+        ok &= dur_ms <= dur_max
+    return x_paired[ok], y_paired[ok], dur_ms[ok], remaining
@@ -0,0 +1,95 @@
+## Standard library
+from collections import deque                       # For the bounded window of submitted files.
+from concurrent.futures import ProcessPoolExecutor  # For parsing files on all cores.
+import numpy as np                                  #
+from edge import detect_edges                       # For vectorized rising-edge detection.
+from signal_reader import SignalReader, read_signal_csv  # For reading the signal CSV.
+
+'''
+    Parallel parse + edge detection with ordered stitching.
+    The only dependency between files is the one-row carry, so each worker starts from a
+    provisional carry equal to the file's own first row (row 0 can never rise). stitch() then
+    fixes row 0 in file order once the true previous last row is known.
+'''
+
+## Worker settings (set once per worker process by _init / _init_lines)
+_CTX = {}
+_LINES = {}     # line id -> settings like _CTX (a pool shared by several pipelines)
+
+def _context(signals, encoding, header_row, debounce_n, fast_reader=True):
+    return {
+        'signals': list(signals), 'encoding': encoding, 'header_row': header_row, 'debounce_n': debounce_n,
+        'reader': SignalReader(signals, encoding, header_row) if fast_reader else None,
+    }
+
+def _init(signals, encoding, header_row, debounce_n, fast_reader=True):
+    _CTX.update(_context(signals, encoding, header_row, debounce_n, fast_reader))
+
+'''
+    lines:{line id: (signals, encoding, header_row, debounce_n, fast_reader)}
+'''
+def _init_lines(lines):
+    _LINES.update({k: _context(*v) for k, v in lines.items()})
+
+'''
+    Worker: parse_edges() with the settings of one line of a shared pool.
+'''
+def parse_line(line, path):
+    return parse_edges(path, _LINES[line])
+
+'''
+    Worker: read one file and detect its edges with the provisional carry.
+    Return None for a file without rows.
+'''
+def parse_edges(path, ctx=None):
+    ctx = _CTX if ctx is None else ctx
+    if ctx['reader'] is not None:
+        sig = ctx['reader'].read(path)
+    else:
+        sig = read_signal_csv(path, ctx['signals'], ctx['encoding'], ctx['header_row'])
+    if sig is None:
+        return None
+    ts, mat, present, last_row = sig
+    rising, stable, last = detect_edges(mat, mat[0], ctx['debounce_n'], present)
+    return {
+        'ts': ts, 'rising': rising, 'present': present, 'last_row': last_row,
+        'first': mat[0].copy(), 'stable0': stable[0].copy(), 'last': last,
+    }
+
+'''
+    Fix row 0 of a worker result with the true carry and return the carry for the next file.
+    Same result as detect_edges(mat, carry, debounce_n, present) on the whole file.
+'''
+def stitch(res, carry, debounce_n):
+    present = res['present']
+    row0 = (carry == 0) & (res['first'] == 1) & present
+    if debounce_n > 1:
+        row0 &= res['stable0']
+    res['rising'][0] = row0
+
+    next_carry = np.array(carry, dtype=np.uint8, copy=True)
+    next_carry[present] = res['last'][present]
+    return next_carry
+
+'''
+    Yield parse_edges() results in the order of `paths`.
+    At most `window` files are in flight, so memory stays bounded during a long catch-up.
+'''
+def iter_parsed(paths, workers, signals, encoding, header_row, debounce_n, fast_reader=True, window=None):
+    window = window or workers * 4
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init,
+        initargs=(signals, encoding, header_row, debounce_n, fast_reader),
+    ) as ex:
+        it = iter(paths)
+        q = deque()
+        for p in it:
+            q.append(ex.submit(parse_edges, p))
+            if len(q) >= window:
+                break
+        while q:
+            res = q.popleft().result()
+            for p in it:
+                q.append(ex.submit(parse_edges, p))
+                break
+            yield res
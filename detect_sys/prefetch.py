@@ -0,0 +1,88 @@
+## Standard library
+import os                                           # For the file sizes reserved at submit.
+import time                                         # For the read/wait timing.
+import threading                                    # For the read counters.
+from collections import deque                       # For the files in flight, in order.
+from concurrent.futures import ThreadPoolExecutor   # For overlapping network reads.
+
+'''
+    Bounded read-ahead of whole files on a thread pool.
+    The share is latency-bound, not CPU-bound, so a few threads fetching the next files' bytes
+    hide most of the read time behind the parse and pairing of the current file.
+    At most `max_files` files are in flight or buffered. Each read reserves the file's size
+    (os.stat) when it is submitted and releases it when the consumer takes the bytes; a read
+    only starts if the reservations stay within `max_bytes`, or nothing else is queued, so
+    memory stays under max(max_bytes, largest prefetched file).
+     read_sec  :time the threads spent reading
+     wait_sec  :time the consumer was blocked waiting for bytes
+     hidden_sec:read_sec - wait_sec, the read time overlapped with processing
+'''
+class Prefetcher:
+    def __init__(self, paths, threads=4, max_files=8, max_bytes=256 * 1024 * 1024, skip=None):
+        self.paths = list(paths)
+        self.threads = max(1, int(threads))
+        self.max_files = max(1, int(max_files))
+        self.max_bytes = int(max_bytes)
+        self.skip = skip        # path -> bool, files the consumer reads itself (e.g. chunked)
+        self.read_sec = 0.0
+        self.wait_sec = 0.0
+        self.files = 0
+        self.bytes = 0
+        self._held = 0          # bytes reserved by reads submitted and not yet handed out
+        self._lock = threading.Lock()
+
+    @property
+    def hidden_sec(self):
+        return max(0.0, self.read_sec - self.wait_sec)
+
+    def _fetch(self, path):
+        t0 = time.perf_counter()
+        with open(path, 'rb') as f:
+            data = f.read()
+        with self._lock:
+            self.read_sec += time.perf_counter() - t0
+            self.files += 1
+            self.bytes += len(data)
+        return data
+
+    ## Next path and the bytes its read reserves (None for skipped files, 0 if stat fails and the read raises)
+    def _next(self, it):
+        path = next(it, None)
+        if path is None or (self.skip is not None and self.skip(path)):
+            return path, None
+        try:
+            return path, os.stat(path).st_size
+        except OSError:
+            return path, 0
+
+    '''
+        Yield (path, data) in the order of `paths`. data is None for skipped files,
+        which the consumer reads itself.
+    '''
+    def __iter__(self):
+        ex = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='prefetch')
+        q = deque()
+        it = iter(self.paths)
+        try:
+            pending, size = self._next(it)
+            while pending is not None or q:
+                while pending is not None and len(q) < self.max_files and (not q or self._held + (size or 0) <= self.max_bytes):
+                    if size is None:
+                        q.append((pending, None, 0))
+                    else:
+                        self._held += size
+                        q.append((pending, ex.submit(self._fetch, pending), size))
+                    pending, size = self._next(it)
+                path, fut, reserved = q.popleft()
+                if fut is None:
+                    yield path, None
+                    continue
+                t0 = time.perf_counter()
+                try:
+                    data = fut.result()
+                finally:
+                    self._held -= reserved
+                self.wait_sec += time.perf_counter() - t0
+                yield path, data
+        finally:
+            ex.shutdown(wait=True, cancel_futures=True)
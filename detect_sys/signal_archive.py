@@ -0,0 +1,280 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import io                                           # For the header line.
+import shutil                                       # For copying the files kept as CSV.
+import sys                                          #
+import csv                                          # For splitting the header line.
+import json                                         # For the file meta and the header dictionary.
+import time                                         # For timing.
+import hashlib                                      # For the header dictionary key.
+import logging                                      #
+import argparse                                     # For command line options.
+from concurrent.futures import ProcessPoolExecutor  # For converting on all cores.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pandas as pd                                 # For the snapshot row.
+
+'''
+    Bit-packed archive of the raw signal CSVs (one .sga file per CSV).
+     magic   b'SGA1'
+     u32     length of the meta JSON, then the meta (padded to 8 bytes):
+             {"header": key, "rows": n, "cols": m, "t0": ns, "unit": ns, "delta": "<i4"|"<i8", "last_time": TIME}
+     deltas  n signed ints: TIME[i] - TIME[i-1] in `unit` ns (the first is 0)
+     bits    n rows of ceil(m/8) bytes: np.packbits of the m flag columns
+    The flag column names are kept once per distinct header in headers.json at the archive root
+    (key -> names), so a 10-second file stores only its rows. A ~150-column row goes from ~320 CSV
+    bytes to ~20 bytes + 4 bytes of time.
+    Readers memory-map the file and return the same (ts, mat, present, last_row) as the CSV
+    readers, so detect_sys replays an archive directly (base_dir = archive root,
+    glob_csv = ["*.sga", <the CSV glob>]).
+    The flags are 0/1 after the readers' own normalisation (empty cells are 0). A file with other
+    values, or with a row whose TIME does not parse, cannot be packed: it is copied into the archive
+    as is (same name and mtime), so the replay still sees every file.
+'''
+MAGIC = b'SGA1'
+SUFFIX = '.sga'
+DICT_NAME = 'headers.json'
+
+def is_archive(path):
+    return str(path).lower().endswith(SUFFIX)
+
+## Write
+'''
+    ts:int64 ns, bits:uint8 0/1 matrix (rows, cols).
+'''
+def encode(ts, bits, key, last_time):
+    from timeutil import NAT_NS
+    ts = np.asarray(ts, dtype=np.int64)
+    if (ts == NAT_NS).any():
+        raise ValueError('archive:TIME has missing values, cannot delta-encode')
+    d = np.diff(ts, prepend=ts[:1])
+    unit = next(u for u in (1_000_000, 1_000, 1) if not (d % u).any())
+    d //= unit
+    dtype = '<i4' if len(d) == 0 or (d.min() >= -2**31 and d.max() < 2**31) else '<i8'
+    meta = json.dumps({
+        'header': key, 'rows': len(ts), 'cols': bits.shape[1], 't0': int(ts[0]), 'unit': unit,
+        'delta': dtype, 'last_time': last_time,
+    }).encode('utf-8')
+    meta += b' ' * (-(8 + len(meta)) % 8)
+    return b''.join([
+        MAGIC, np.uint32(len(meta)).tobytes(), meta,
+        d.astype(dtype).tobytes(), np.packbits(bits.astype(bool), axis=1).tobytes(),
+    ])
+
+def header_key(names):
+    return hashlib.sha1('\x1f'.join(names).encode('utf-8')).hexdigest()[:16]
+
+'''
+    Header line of a signal CSV (the header_row-th non-blank line), or None.
+'''
+def header_line(path, header_row):
+    seen = 0
+    with open(path, 'rb') as f:
+        for line in iter(f.readline, b''):
+            line = line.rstrip(b'\r\n')
+            if not line.strip():
+                continue
+            if seen == header_row:
+                return line
+            seen += 1
+    return None
+
+## Converter worker settings
+_CONV = {}
+
+def _conv_init(encoding, header_row):
+    _CONV.update(encoding=encoding, header_row=header_row, readers={})
+
+'''
+    Worker: convert one CSV to dst + '.tmp'.
+    Return (key, names, rows) or (None, reason, 0) if the file stays CSV.
+    Duplicate column names keep their first column, as the CSV readers do.
+'''
+def convert_file(src, dst):
+    from signal_reader import SignalReader
+    header = header_line(src, _CONV['header_row'])
+    if header is None:
+        return None, 'no header', 0
+    names = next(csv.reader(io.StringIO(header.decode(_CONV['encoding']))))
+    if not names or names[0] != 'TIME':
+        return None, 'TIME is not the first column', 0
+    names = list(dict.fromkeys(n for n in names[1:] if n))
+    reader = _CONV['readers'].get(header)
+    if reader is None:
+        reader = _CONV['readers'][header] = SignalReader(names, _CONV['encoding'], _CONV['header_row'])
+    sig = reader.read(src)
+    if sig is None:
+        return None, 'no rows', 0
+    ts, mat, present, last_row = sig
+    if mat.max(initial=0) > 1:
+        return None, 'values other than 0/1', 0
+    from timeutil import NAT_NS
+    if (ts == NAT_NS).any():
+        return None, 'rows without a valid TIME', 0
+    key = header_key(names)
+    Path(dst).parent.mkdir(parents=True, exist_ok=True)
+    with open(dst + '.tmp', 'wb') as f:
+        f.write(encode(ts, mat, key, str(last_row['TIME'].iloc[0])))
+    return key, names, len(ts)
+
+def _load_dict(root):
+    p = Path(root) / DICT_NAME
+    if p.exists():
+        with open(p, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def _save_dict(root, d):
+    p = Path(root) / DICT_NAME
+    tmp = p.with_name(p.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(d, f, ensure_ascii=False)
+    os.replace(tmp, p)
+
+def _same_mtime(a, b):
+    return b.exists() and b.stat().st_mtime_ns == a.stat().st_mtime_ns
+
+'''
+    Convert every CSV under src (glob) to dst/<same rel path>.sga.
+    An archive gets the mtime of its CSV (detect_sys orders files by mtime) and is skipped on the
+    next run while that still matches. It is renamed into place only after its header is in the
+    dictionary, so an interrupted run never leaves an unreadable archive.
+    A CSV that cannot be packed is copied to dst/<same rel path> with its mtime instead. Whichever
+    of the two a file did not become is removed, so a file never appears twice in the replay.
+    Return {'files', 'converted', 'skipped', 'kept_csv', 'rows', 'csv_bytes', 'sga_bytes'}.
+'''
+def convert_tree(src, dst, glob='*.csv', encoding='cp932', header_row=2, workers=0):
+    src, dst = Path(src), Path(dst)
+    if dst.resolve() == src.resolve():
+        raise ValueError(f'archive:dst must differ from src:{dst}')
+    dst.mkdir(parents=True, exist_ok=True)
+    headers = _load_dict(dst)
+    todo = []
+    st = dict.fromkeys(['files', 'converted', 'skipped', 'kept_csv', 'rows', 'csv_bytes', 'sga_bytes'], 0)
+    for f in sorted(src.rglob(glob)):
+        st['files'] += 1
+        out = dst / f.relative_to(src).with_suffix(SUFFIX)
+        if _same_mtime(f, out) or _same_mtime(f, dst / f.relative_to(src)):
+            st['skipped'] += 1
+            continue
+        todo.append((f, out))
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_conv_init, initargs=(encoding, header_row)) as ex:
+        results = ex.map(convert_file, [str(f) for f, _ in todo], [str(o) for _, o in todo], chunksize=16)
+        for (f, out), (key, names, rows) in zip(todo, results):
+            kept = dst / f.relative_to(src)
+            if key is None:
+                out.unlink(missing_ok=True)
+                kept.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(f, kept)
+                st['kept_csv'] += 1
+                logging.warning(f'archive:{f} copied as CSV ({names})')
+                continue
+            kept.unlink(missing_ok=True)
+            if key not in headers:
+                headers[key] = names
+                _save_dict(dst, headers)
+            os.replace(str(out) + '.tmp', out)
+            s = f.stat()
+            os.utime(out, ns=(s.st_atime_ns, s.st_mtime_ns))
+            st['converted'] += 1
+            st['rows'] += rows
+            st['csv_bytes'] += s.st_size
+            st['sga_bytes'] += out.stat().st_size
+    return st
+
+## Read
+'''
+    Memory-mapped archive reader for a fixed list of signals.
+    Same results as SignalReader.read / iter_chunks on the original CSV.
+    read(path, data) parses bytes already read (prefetch) instead of mapping the file.
+'''
+class ArchiveReader:
+    def __init__(self, signals):
+        self.signals = list(signals)
+        self._dicts = {}    # archive root -> {key: names}
+        self._layout = {}   # key -> (col index per signal, present)
+
+    def _names(self, path, key):
+        for d in Path(path).resolve().parents:
+            if d in self._dicts or (d / DICT_NAME).exists():
+                if d not in self._dicts or key not in self._dicts[d]:
+                    self._dicts[d] = _load_dict(d)
+                names = self._dicts[d].get(key)
+                if names is not None:
+                    return names
+        raise ValueError(f'archive:header {key} of {path} is not in any {DICT_NAME}')
+
+    def _resolve(self, path, key):
+        hit = self._layout.get(key)
+        if hit is None:
+            pos = {nm: k for k, nm in enumerate(self._names(path, key))}
+            idx = np.array([pos.get(sig, -1) for sig in self.signals], dtype=np.int64)
+            hit = self._layout[key] = (idx, idx >= 0)
+        return hit
+
+    def _open(self, path, data=None):
+        mm = np.frombuffer(data, dtype=np.uint8) if data is not None else np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(mm[:4]) != MAGIC:
+            raise ValueError(f'archive:not an {SUFFIX} file:{path}')
+        n_meta = int(mm[4:8].view('<u4')[0])
+        meta = json.loads(bytes(mm[8:8 + n_meta]))
+        off = 8 + n_meta
+        n = meta['rows']
+        d_size = np.dtype(meta['delta']).itemsize
+        deltas = mm[off:off + n * d_size].view(meta['delta'])
+        nb = (meta['cols'] + 7) // 8
+        bits = mm[off + n * d_size:off + n * d_size + n * nb].reshape(n, nb)
+        ts = meta['t0'] + np.cumsum(deltas, dtype=np.int64) * meta['unit']
+        return meta, ts, bits
+
+    def _rows(self, path, meta, ts, bits, lo, hi):
+        idx, present = self._resolve(path, meta['header'])
+        mat = np.zeros((hi - lo, len(self.signals)), dtype=np.uint8)
+        if present.any():
+            flags = np.unpackbits(bits[lo:hi], axis=1, count=meta['cols'])
+            mat[:, present] = flags[:, idx[present]]
+        last_time = meta['last_time'] if hi == meta['rows'] else None
+        if last_time is None:
+            from timeutil import format_ns
+            last_time = str(format_ns(ts[hi - 1:hi])[0])
+        last_row = pd.DataFrame(
+            [[last_time] + mat[-1, present].tolist()],
+            columns=['TIME'] + [s for s, ok in zip(self.signals, present) if ok],
+        )
+        return ts[lo:hi].copy(), mat, present, last_row
+
+    def read(self, path, data=None):
+        meta, ts, bits = self._open(path, data)
+        if meta['rows'] == 0:
+            return None
+        return self._rows(path, meta, ts, bits, 0, meta['rows'])
+
+    def iter_chunks(self, path, chunk_rows):
+        meta, ts, bits = self._open(path)
+        for lo in range(0, meta['rows'], chunk_rows):
+            yield self._rows(path, meta, ts, bits, lo, min(lo + chunk_rows, meta['rows']))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='convert signal CSVs to the bit-packed .sga archive')
+    parser.add_argument('src', help='CSV root (e.g. base_dir)')
+    parser.add_argument('dst', help='archive root')
+    parser.add_argument('--glob', default='*.csv')
+    parser.add_argument('--encoding', default='cp932')
+    parser.add_argument('--header-row', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=0, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    t0 = time.perf_counter()
+    st = convert_tree(args.src, args.dst, args.glob, args.encoding, args.header_row, args.workers)
+    ratio = st['csv_bytes'] / st['sga_bytes'] if st['sga_bytes'] else 0
+    logging.info(f"archive:{st['converted']} converted, {st['skipped']} up to date, {st['kept_csv']} copied as CSV, "
+                 f"{st['rows']} rows, {st['csv_bytes'] / 2**20:.1f} MB -> {st['sga_bytes'] / 2**20:.1f} MB "
+                 f"(1/{ratio:.1f}) in {time.perf_counter() - t0:.1f}s")
+    if st['kept_csv']:
+        logging.info(f'archive:replay with glob_csv = ["*{SUFFIX}", "{args.glob}"] to include the files copied as CSV')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,261 @@
+## Standard library
+import io                                           # For parsing prefetched bytes.
+import numpy as np                                  #
+import pandas as pd                                 # For data analysis.
+from timeutil import parse_time_ns, parse_time_bytes  # For TIME to int64 nanoseconds.
+from signal_archive import ArchiveReader, is_archive  # For the bit-packed .sga archive.
+
+'''
+    Reading of the equipment signal CSV.
+    Kept free of module-level side effects so worker processes can import it.
+    Every reader also takes a .sga archive file (see signal_archive) and returns the same result.
+'''
+_ARCHIVE = {}   # signals -> ArchiveReader
+
+def _archive(signals):
+    key = tuple(signals)
+    if key not in _ARCHIVE:
+        _ARCHIVE[key] = ArchiveReader(signals)
+    return _ARCHIVE[key]
+
+'''
+    Read one signal CSV with pandas.
+    Return (ts, mat, present, last_row), or None if the file has no rows.
+     ts       :int64 epoch nanoseconds of TIME
+     mat      :uint8 matrix (rows, signals). Missing values are 0.
+     present  :bool vector (signals,). False if the column is not in the file.
+     last_row :last row as a 1-row DataFrame (for the previous snapshot).
+    data:the file's bytes if already read (prefetch), so the file is not opened again.
+    usecols:Read only the specified columns.
+    dtype:Set the data type for each (specified) column.
+    low_memory:Control type inferenve strategy(memory usage vs. consistency).
+'''
+def read_signal_csv(path, signals, encoding, header_row, data=None):
+    if is_archive(path):
+        return _archive(signals).read(path, data)
+    usecols = {'TIME', *signals}    #Signals missing from the file are left out (present:False).
+    dtype_map = {sig:'Int8' for sig in signals} #Create a dtype map to read all signal columns as Int8.
+    df = pd.read_csv(
+        io.BytesIO(data) if data is not None else path, header=header_row, encoding=encoding,
+        usecols=lambda c: c in usecols,
+        dtype=dtype_map, low_memory=False
+    )
+    if df.empty:
+        return None
+    return _frame_signals(df, signals)
+
+'''
+    Chunked read_signal_csv(): yield the same tuple for each block of `chunk_rows` rows.
+    skip:data rows to drop first (already read by another reader).
+'''
+def iter_signal_csv(path, signals, encoding, header_row, chunk_rows, skip=0):
+    if is_archive(path):
+        yield from _archive(signals).iter_chunks(path, chunk_rows)
+        return
+    usecols = {'TIME', *signals}
+    dtype_map = {sig:'Int8' for sig in signals}
+    with pd.read_csv(
+        path, header=header_row, encoding=encoding,
+        usecols=lambda c: c in usecols,
+        dtype=dtype_map, chunksize=chunk_rows,
+    ) as chunks:
+        for df in chunks:
+            if skip:
+                n = min(skip, len(df))
+                df, skip = df.iloc[n:], skip - n
+            if not df.empty:
+                yield _frame_signals(df, signals)
+
+def _frame_signals(df, signals):
+    present = np.array([sig in df.columns for sig in signals], dtype=bool)
+    mat = np.zeros((len(df), len(signals)), dtype=np.uint8)
+    if present.any():
+        cols = [sig for sig, ok in zip(signals, present) if ok]
+        mat[:, present] = df[cols].fillna(0).to_numpy(dtype=np.int64).astype(np.uint8) #Normalize to 0/1 for robust comparisons.
+    return parse_time_ns(df['TIME']), mat, present, df.iloc[[-1]]
+
+'''
+    Specialized reader for the equipment format:
+    a preamble, one header line, then rows of TIME followed by single-digit flags ("...,0,1,0").
+    The header is resolved once per distinct header line (cached by its raw bytes, so the
+    Shift-JIS names are decoded only on a cache miss). The body is fixed width, so it is viewed
+    as a 2-D byte array and the flag columns are sliced straight into a uint8 matrix.
+    Anything that does not fit (empty cells, multi-digit values, ragged rows) falls back to
+    read_signal_csv(), so the result is always the same as the pandas path.
+'''
+class SignalReader:
+    def __init__(self, signals, encoding, header_row):
+        self.signals = list(signals)
+        self.encoding = encoding
+        self.header_row = header_row
+        self._cache = {}     # header bytes -> (n_cols, col index per signal, present)
+        self.fallbacks = 0
+
+    '''
+        Resolve the signal columns of a header line. Return None if TIME is not the first column.
+    '''
+    def _resolve(self, header):
+        hit = self._cache.get(header)
+        if hit is not None or header in self._cache:
+            return hit
+        names = header.decode(self.encoding).split(',')
+        if b'"' in header:
+            names = []  # Quoted names are left to pandas.
+        pos = {}
+        for k, nm in enumerate(names):
+            pos.setdefault(nm, k)
+        if not names or names[0] != 'TIME':
+            res = None
+        else:
+            idx = np.array([pos.get(sig, -1) for sig in self.signals], dtype=np.int64)
+            res = (len(names), idx, idx >= 0)
+        self._cache[header] = res
+        return res
+
+    def read(self, path, data=None):
+        if is_archive(path):
+            return _archive(self.signals).read(path, data)
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        res = self._read_bytes(data)
+        if res is None:
+            self.fallbacks += 1
+            return read_signal_csv(path, self.signals, self.encoding, self.header_row, data)
+        return res
+
+    '''
+        Chunked read(): yield the tuple of read() for each block of `chunk_rows` rows, reading the
+        file block by block so memory is bounded by the block size. A block that does not fit the
+        fixed-width layout hands the rest of the file to the pandas chunk reader.
+    '''
+    def iter_chunks(self, path, chunk_rows):
+        if is_archive(path):
+            yield from _archive(self.signals).iter_chunks(path, chunk_rows)
+            return
+        done = 0
+        for res in self._iter_fast(path, chunk_rows):
+            if res is None:
+                self.fallbacks += 1
+                yield from iter_signal_csv(path, self.signals, self.encoding, self.header_row, chunk_rows, skip=done)
+                return
+            done += len(res[0])
+            yield res
+
+    def _iter_fast(self, path, chunk_rows):
+        with open(path, 'rb') as f:
+            seen = 0
+            header = None
+            for line in iter(f.readline, b''):
+                line = line.rstrip(b'\r\n')
+                if not line.strip():
+                    continue
+                if seen == self.header_row:
+                    header = line
+                    break
+                seen += 1
+            layout = self._resolve(header) if header is not None else None
+            first = f.readline()
+            if layout is None or not first.rstrip(b'\r\n'):
+                yield None
+                return
+            shape = self._row_shape(first.rstrip(b'\n'), layout[0])
+            if shape is None:
+                yield None
+                return
+            stride = shape[2] + shape[1]
+            block = stride * chunk_rows
+            buf = first
+            while True:
+                buf += f.read(block - len(buf))
+                last = len(buf) < block
+                body = buf.rstrip(b'\r\n') if last else buf[:-shape[1]]
+                if body:
+                    res = self._parse_body(body, layout, shape)
+                    yield res
+                    if res is None:
+                        return
+                if last:
+                    return
+                buf = b''
+
+    '''
+        (w, eol, line_len) of the first body line: TIME width, line ending length, line length
+        without the ending. None if the line is not TIME followed by one-character flags.
+    '''
+    def _row_shape(self, first, n_cols):
+        eol = 2 if first.endswith(b'\r') else 1
+        line_len = len(first) - (eol - 1)
+        w = first.find(b',')
+        if w < 0 or line_len != w + 2 * (n_cols - 1):
+            return None
+        return w, eol, line_len
+
+    '''
+        Return the same tuple as read_signal_csv(), or None to ask for the pandas fallback.
+    '''
+    def _read_bytes(self, data):
+        # Locate the header line (blank lines are skipped, as pandas does).
+        pos = 0
+        seen = 0
+        header = None
+        while pos < len(data):
+            end = data.find(b'\n', pos)
+            if end < 0:
+                end = len(data)
+            line = data[pos:end].rstrip(b'\r')
+            pos = end + 1
+            if not line.strip():
+                continue
+            if seen == self.header_row:
+                header = line
+                break
+            seen += 1
+        if header is None:
+            return None
+        layout = self._resolve(header)
+        if layout is None:
+            return None
+
+        body = data[pos:].rstrip(b'\r\n')
+        if not body:
+            return None
+        first_end = body.find(b'\n')
+        shape = self._row_shape(body if first_end < 0 else body[:first_end], layout[0])
+        if shape is None:
+            return None
+        return self._parse_body(body, layout, shape)
+
+    '''
+        Parse body rows (without the final line ending) of a known layout and row shape.
+    '''
+    def _parse_body(self, body, layout, shape):
+        n_cols, idx, present = layout
+        w, eol, line_len = shape
+        stride = line_len + eol
+        if (len(body) + eol) % stride:
+            return None
+
+        arr = np.frombuffer(body + (b'\r\n' if eol == 2 else b'\n'), dtype=np.uint8).reshape(-1, stride)
+        # Every row must have its commas and line ending in the same place.
+        if not (arr[:, w:line_len:2] == ord(',')).all() or not (arr[:, -1] == ord('\n')).all():
+            return None
+        if eol == 2 and not (arr[:, -2] == ord('\r')).all():
+            return None
+        vals = arr[:, w + 1:line_len:2]
+        if vals.size and (vals.min() < ord('0') or vals.max() > ord('9')):
+            return None
+
+        ts = parse_time_bytes(arr[:, :w])
+        if ts is None:
+            ts = parse_time_ns(np.char.decode(arr[:, :w].copy().view(f'S{w}').ravel(), 'ascii'))
+
+        mat = np.zeros((len(arr), len(self.signals)), dtype=np.uint8)
+        if present.any():
+            mat[:, present] = vals[:, idx[present] - 1] - ord('0')
+
+        last_row = pd.DataFrame(
+            [[bytes(arr[-1, :w]).decode('ascii')] + mat[-1, present].tolist()],
+            columns=['TIME'] + [s for s, ok in zip(self.signals, present) if ok],
+        )
+        return ts, mat, present, last_row
@@ -0,0 +1,176 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import re                                           # For regular expression.
+import json                                         # For reading the legacy state.json.
+import uuid                                         # For the store identity.
+import sqlite3                                      # For the processed-file store.
+import logging                                      #
+from pathlib import Path                            # For filesystem path and operations.
+from datetime import datetime, timedelta            # For the retention window.
+
+'''
+    Processed-file state store (SQLite).
+    Each processed file is one row keyed by (day, rel). day is the first 8-digit date in rel
+    (INPUT_M20260114/... -> 20260114), so a lookup only loads the rows of that day partition.
+    Adding files is one transaction, so a crash keeps either all or none of a batch.
+    Days older than the retention window are moved to a sibling archive database.
+    store_id is a random id made when the database is created. Caches of "what is processed"
+    (the directory manifest) keep it and are dropped when it changes, e.g. when state.db was
+    deleted or replaced to reprocess everything.
+'''
+class StateStore:
+    def __init__(self, path, legacy_json=None, retention_days=0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.archive_path = self.path.with_name(self.path.stem + '_archive' + self.path.suffix)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS processed('
+                'day TEXT NOT NULL, rel TEXT NOT NULL, PRIMARY KEY(day, rel)) WITHOUT ROWID'
+            )
+            self.conn.execute('CREATE TABLE IF NOT EXISTS archived_days(day TEXT PRIMARY KEY, count INTEGER)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT)')
+            self.conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES('store_id', ?)", (uuid.uuid4().hex,))
+        self.store_id = self.conn.execute("SELECT value FROM meta WHERE key='store_id'").fetchone()[0]
+        self._arc = None    # archive connection of count_under(), opened on first use
+        self._days = {}     # day -> set of rel (loaded on first lookup)
+        self._archived = {r[0] for r in self.conn.execute('SELECT day FROM archived_days')}
+
+        if legacy_json is not None:
+            self._migrate(Path(legacy_json))
+        if retention_days > 0:
+            self.archive((datetime.now() - timedelta(days=retention_days)).strftime('%Y%m%d'))
+
+    '''
+        Import the processed_paths of a legacy state.json once, then rename it to *.migrated.
+    '''
+    def _migrate(self, legacy):
+        if not legacy.exists() or legacy.stat().st_size == 0:
+            return
+        try:
+            with open(legacy, 'r', encoding='utf-8') as f:
+                paths = json.load(f).get('processed_paths', [])
+        except Exception:
+            logging.warning(f'state:cannot read legacy {legacy}, skip migration')
+            return
+        self.update(paths)
+        os.replace(legacy, legacy.with_name(legacy.name + '.migrated'))
+        logging.info(f'state:migrated {len(paths)} paths from {legacy}')
+
+    def _load_day(self, day):
+        rows = self.conn.execute('SELECT rel FROM processed WHERE day=?', (day,)).fetchall()
+        if day in self._archived and self.archive_path.exists():
+            arc = sqlite3.connect(self.archive_path)
+            try:
+                rows += arc.execute('SELECT rel FROM processed WHERE day=?', (day,)).fetchall()
+            finally:
+                arc.close()
+        s = {r[0] for r in rows}
+        self._days[day] = s
+        return s
+
+    def __contains__(self, rel):
+        day = day_of(rel)
+        s = self._days.get(day)
+        if s is None:
+            s = self._load_day(day)
+        return rel in s
+
+    '''
+        Attach another SQLite database, so hooks of update() can write it in the same transaction.
+    '''
+    def attach(self, path, alias):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn.execute('ATTACH DATABASE ? AS ' + alias, (str(path),))
+
+    '''
+        Record processed files in one transaction.
+        hook(conn):optional, runs inside the same transaction (e.g. writes to an attached database).
+    '''
+    def update(self, rels, hook=None):
+        rows = [(day_of(r), r) for r in rels]
+        if not rows and hook is None:
+            return
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO processed(day, rel) VALUES(?, ?)', rows)
+            if hook is not None:
+                hook(self.conn)
+        for day, rel in rows:
+            if day in self._days:
+                self._days[day].add(rel)
+
+    '''
+        Every day with processed files, archived days included.
+    '''
+    def days(self):
+        return {r[0] for r in self.conn.execute('SELECT DISTINCT day FROM processed')} | set(self._archived)
+
+    def processed_in(self, day):
+        return set(self._days[day]) if day in self._days else set(self._load_day(day))
+
+    '''
+        Number of processed files under the top folder `name` (rel starting with name/), counted
+        in SQL without loading the day partition. A folder without a date in its name is counted
+        over every day.
+    '''
+    def count_under(self, name):
+        day = day_of(name)
+        rng = (name + '/', name + '0')     # '0' follows '/'
+        if not day:
+            return self.conn.execute('SELECT COUNT(*) FROM processed WHERE rel >= ? AND rel < ?', rng).fetchone()[0]
+        sql = 'SELECT COUNT(*) FROM processed WHERE day = ? AND rel >= ? AND rel < ?'
+        n = self.conn.execute(sql, (day,) + rng).fetchone()[0]
+        if day in self._archived and self.archive_path.exists():
+            if self._arc is None:
+                self._arc = sqlite3.connect(self.archive_path)
+            n += self._arc.execute(sql, (day,) + rng).fetchone()[0]
+        return n
+
+    '''
+        Move the days before `cutoff` (YYYYMMDD) to the archive database.
+        Lookups of an archived day still work, they just read the archive file.
+    '''
+    def archive(self, cutoff):
+        days = [r[0] for r in self.conn.execute(
+            "SELECT DISTINCT day FROM processed WHERE day <> '' AND day < ?", (cutoff,))]
+        if not days:
+            return
+        arc = sqlite3.connect(self.archive_path)
+        try:
+            with arc:
+                arc.execute(
+                    'CREATE TABLE IF NOT EXISTS processed('
+                    'day TEXT NOT NULL, rel TEXT NOT NULL, PRIMARY KEY(day, rel)) WITHOUT ROWID'
+                )
+                for day in days:
+                    rows = self.conn.execute('SELECT day, rel FROM processed WHERE day=?', (day,)).fetchall()
+                    arc.executemany('INSERT OR IGNORE INTO processed(day, rel) VALUES(?, ?)', rows)
+        finally:
+            arc.close()
+        # The archive is committed before the rows are removed here, so a crash can only duplicate.
+        with self.conn:
+            for day in days:
+                n = self.conn.execute('DELETE FROM processed WHERE day=?', (day,)).rowcount
+                self.conn.execute(
+                    'INSERT INTO archived_days(day, count) VALUES(?, ?) '
+                    'ON CONFLICT(day) DO UPDATE SET count = count + excluded.count', (day, n))
+        self._archived.update(days)
+        for day in days:
+            self._days.pop(day, None)
+        logging.info(f'state:archived {len(days)} days before {cutoff}')
+
+    def close(self):
+        if self._arc is not None:
+            self._arc.close()
+            self._arc = None
+        self.conn.close()
+
+'''
+    Day partition of a relative path: the first 8-digit date, or '' if there is none.
+'''
+_DAY = re.compile(r'\d{8}')
+def day_of(rel):
+    m = _DAY.search(rel)
+    return m.group(0) if m else ''
@@ -0,0 +1,68 @@
+## Standard library
+import sys                                          #
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pytest                                       #
+
+'''
+    detect_sys is a folder of flat modules (run as scripts), so the tests import them the same
+    way: the application folder goes first on sys.path.
+'''
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+## Equipment signal CSV as written by the equipment (see gen_logs.py)
+SIGNALS = ['押釦1', '押釦2', 'センサ', 'ランプ']
+HEADER_ROW = 2
+ENCODING = 'cp932'
+
+'''
+    Bytes of one signal CSV: two preamble lines, the header, then TIME and the flags.
+    rows:[(TIME string, [cell strings])]. Cells are written as given ('' for an empty cell).
+'''
+def signal_bytes(rows, names=SIGNALS, newline='\r\n'):
+    lines = ['PREAMBLE,x', 'line2,y', ','.join(['TIME'] + list(names))]
+    lines += [','.join([t] + [str(v) for v in vals]) for t, vals in rows]
+    return (newline.join(lines) + newline).encode(ENCODING)
+
+'''
+    Random rows of 0/1 flags every 250 ms from t0, in runs so edges and debounce windows occur.
+'''
+def random_rows(rng, n, n_sig=len(SIGNALS), t0='2026-03-05 08:00:00', step_ms=250):
+    import pandas as pd
+    times = pd.Timestamp(t0) + pd.to_timedelta(np.arange(n) * step_ms, unit='ms')
+    vals = (rng.random((n, n_sig)) < 0.5).astype(int)
+    vals = np.repeat(vals, rng.integers(1, 4, size=n), axis=0)[:n]
+    return [(t.strftime('%Y/%m/%d %H:%M:%S.%f')[:-3], list(v)) for t, v in zip(times, vals)]
+
+@pytest.fixture
+def write_signal_csv(tmp_path):
+    def write(name, rows, names=SIGNALS, newline='\r\n'):
+        p = tmp_path / name
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(signal_bytes(rows, names, newline))
+        return p
+    return write
+
+## One pipeline in a tmp folder (see engine.Config)
+CROSS = [('A', '押釦1', '押釦2'), ('B', 'センサ', 'ランプ'), ('C', '押釦1', 'ランプ')]
+
+'''
+    Config of an Engine rooted at tmp_path: cross table table/d_tube_assembly.xlsx (CROSS),
+    signal CSV under data/ (write them with write_signal_csv('data/...')), every other path at
+    its default. sections:config.toml sections merged over that, e.g. {'logic': {'debounce_n': 3}}.
+'''
+@pytest.fixture
+def make_config(tmp_path):
+    import pandas as pd
+    from engine import Config
+    def make(sections=None, base=tmp_path):
+        xlsx = Path(base) / 'table' / 'd_tube_assembly.xlsx'
+        if not xlsx.exists():
+            xlsx.parent.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(CROSS, columns=['name', 'x', 'y']).to_excel(xlsx, index=False)
+        (Path(base) / 'data').mkdir(parents=True, exist_ok=True)
+        dic = {'io': {'encoding': ENCODING, 'header_row': HEADER_ROW}}
+        for sec, keys in (sections or {}).items():
+            dic.setdefault(sec, {}).update(keys)
+        return Config(dic, base)
+    return make
@@ -0,0 +1,108 @@
+## Standard library
+import sqlite3                                      # For the flush transaction.
+import numpy as np                                  #
+import pytest                                       #
+from anomaly import Baselines, _ewm                 # Under test.
+
+'''
+    The closed-form _ewm and Baselines.score_name against the pair-by-pair recursion they replace.
+'''
+def ewm_loop(s0, u, decay):
+    out = []
+    for v in u:
+        s0 = decay * s0 + v
+        out.append(s0)
+    return np.array(out)
+
+'''
+    Reference scoring: one pair at a time, scored against the baseline before it is folded in.
+'''
+def score_loop(x, alpha, z_threshold, warmup, state=(0, 0.0, 0.0)):
+    n, m, v = state
+    if n == 0:
+        m = x[0]
+    mean, std, z, flagged = [], [], [], []
+    for d in x:
+        s = np.sqrt(max(v, 0.0))
+        zz = (d - m) / s if s > 1e-6 * max(abs(m), 1.0) else 0.0
+        mean.append(m), std.append(s), z.append(zz), flagged.append(n >= warmup and abs(zz) > z_threshold)
+        diff = d - m
+        m = (1 - alpha) * m + alpha * d
+        v = (1 - alpha) * (v + alpha * diff * diff)
+        n += 1
+    return np.array(mean), np.array(std), np.array(z), np.array(flagged), (n, m, v)
+
+@pytest.mark.parametrize('decay,n', [(0.98, 100), (0.98, 30_000), (0.5, 2_000), (0.999, 250_000)])
+def test_ewm_matches_the_loop(decay, n):
+    u = np.random.default_rng(n).normal(100, 30, size=n)
+    assert np.allclose(_ewm(7.0, u, decay), ewm_loop(7.0, u, decay), rtol=1e-9)
+    assert len(_ewm(7.0, u[:0], decay)) == 0
+
+def durations(seed, n):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(500, 40, size=n)
+    x[rng.choice(n, n // 100, replace=False)] *= 3     # a few slow pairs
+    return x
+
+def test_score_name_matches_the_loop(tmp_path):
+    x = durations(0, 3000)
+    b = Baselines(tmp_path / 'baseline.db', alpha=0.05, z_threshold=3.0, warmup=20)
+    got = b.score_name('A', x)
+    want = score_loop(x, 0.05, 3.0, 20)
+    for g, w in zip(got[:3], want[:3]):
+        assert np.allclose(g, w, rtol=1e-9, atol=1e-9)
+    assert np.array_equal(got[3], want[3]) and want[3].sum() >= 20
+    assert not got[3][:20].any()                        # nothing flagged during the warmup
+    assert b.state['A'][0] == 3000 and np.allclose(b.state['A'][1:], want[4][1:], rtol=1e-9)
+
+def test_batches_equal_one_call(tmp_path):
+    x = durations(1, 2000)
+    one = Baselines(tmp_path / 'one.db', alpha=0.02, z_threshold=3.0, warmup=50)
+    ref = one.score_name('A', x)
+    many = Baselines(tmp_path / 'many.db', alpha=0.02, z_threshold=3.0, warmup=50)
+    parts = [many.score_name('A', c) for c in np.array_split(x, [1, 7, 60, 61, 900])]
+    for k in range(3):
+        assert np.allclose(np.concatenate([p[k] for p in parts]), ref[k], rtol=1e-9, atol=1e-9)
+    assert np.array_equal(np.concatenate([p[3] for p in parts]), ref[3])
+
+def test_constant_history_is_not_flagged(tmp_path):
+    b = Baselines(tmp_path / 'baseline.db', alpha=0.1, z_threshold=3.0, warmup=5)
+    _, _, z, flagged = b.score_name('A', np.full(100, 250.0))
+    assert not flagged.any() and np.all(z == 0)
+
+def test_score_returns_the_flagged_pairs(tmp_path):
+    b = Baselines(tmp_path / 'baseline.db', alpha=0.05, z_threshold=3.0, warmup=20)
+    xa, xb = durations(2, 500), durations(3, 300)
+    ta, tb = np.arange(500, dtype=np.int64) * 2, np.arange(300, dtype=np.int64) * 3 + 1
+    df = b.score({'A': (ta, ta + 5, xa), 'B': (tb, tb + 5, xb), 'C': (ta[:0], ta[:0], xa[:0])})
+    fa, fb = score_loop(xa, 0.05, 3.0, 20)[3], score_loop(xb, 0.05, 3.0, 20)[3]
+    assert len(df) == fa.sum() + fb.sum() and df['X_TIME'].is_monotonic_increasing
+    assert sorted(df.loc[df['Name'] == 'A', 'X_TIME']) == ta[fa].tolist()
+    assert 'C' not in b.state
+    assert b.score({'A': (ta[:5], ta[:5], np.full(5, 500.0))}) is None
+
+def flush(b):
+    conn = sqlite3.connect(b.path)
+    with conn:
+        b.flush(conn)
+    conn.close()
+    b.committed()
+
+def test_flush_and_rollback(tmp_path):
+    x = durations(4, 400)
+    b = Baselines(tmp_path / 'baseline.db', alpha=0.05, z_threshold=3.0, warmup=20)
+    b.score_name('A', x[:200])
+    flush(b)
+    kept = b.state['A']
+    b.score_name('A', x[200:])                          # an abandoned checkpoint
+    b.rollback()
+    assert b.state['A'] == kept
+    again = Baselines(tmp_path / 'baseline.db', alpha=0.05, z_threshold=3.0, warmup=20)
+    assert again.state == {'A': kept}
+    got = again.score_name('A', x[200:])
+    assert np.array_equal(got[3], score_loop(x, 0.05, 3.0, 20)[3][200:])
+
+def test_alpha_is_checked(tmp_path):
+    for alpha in (0, 1, 1.5):
+        with pytest.raises(ValueError):
+            Baselines(tmp_path / 'baseline.db', alpha=alpha)
@@ -0,0 +1,154 @@
+## Standard library
+import os                                           # For the file mtimes.
+import logging                                      #
+import sqlite3                                      # For the baselines.
+import numpy as np                                  #
+import pandas as pd                                 # For the pair CSVs.
+import pytest                                       #
+from conftest import SIGNALS, random_rows           # Test data.
+from engine import Engine                           # Serial reference.
+from duration_stats import DurationStats, daily_stats  #
+from anomaly import Baselines                       #
+import backfill                                     # Under test.
+
+'''
+    A backfill against a serial run over the same files: pair CSVs, open X, snapshot, processed
+    files, duration statistics and anomaly baselines.
+'''
+DAYS = ['20260303', '20260304', '20260305']
+LOGIC = {'debounce_n': 3, 'duration_max_ms': 3000}      # the "changed" settings the backfill applies
+ANOMALY = {'enable': True, 'warmup': 5, 'z_threshold': 1.5}
+
+'''
+    Three files per day folder. Each file ends with every signal low, so the carry at a day boundary
+    is 0 whatever debounce_n is (the --from reference starts from an empty carry).
+'''
+@pytest.fixture
+def files():
+    rng = np.random.default_rng(0)
+    out = []
+    for d in DAYS:
+        for k in range(3):
+            t0 = f'{d[:4]}-{d[4:6]}-{d[6:]} {8 + k:02d}:00:00'
+            rows = random_rows(rng, 120, t0=t0, step_ms=300)
+            last = pd.Timestamp(rows[-1][0].replace('/', '-'))
+            rows += [((last + pd.Timedelta(seconds=j + 1)).strftime('%Y/%m/%d %H:%M:%S.%f')[:-3], [0] * len(SIGNALS))
+                     for j in range(3)]
+            out.append((f'data/INPUT_M{d}/{k}.csv', rows))
+    return out
+
+def build(make_config, write_signal_csv, tmp_path, files, name, logic, keep=None):
+    base = tmp_path / name
+    for i, (rel, rows) in enumerate(files):
+        if keep is not None and not keep(rel):
+            continue
+        p = write_signal_csv(f'{name}/{rel}', rows)
+        os.utime(p, ns=(10**18 + i * 10**9, 10**18 + i * 10**9))
+    return make_config({'logic': logic, 'anomaly': ANOMALY}, base=base)
+
+def serial(config):
+    e = Engine(config)
+    e.run_once()
+    e.close()
+
+def pair_csvs(config):
+    out = {}
+    for p in sorted(config.output_dir.glob('*.csv')):
+        if p.read_bytes().startswith(b'X_TIME,'):
+            out[p.name] = pd.read_csv(p, encoding=config.encoding)
+    return out
+
+def read(path):
+    return path.read_bytes() if path.exists() else None
+
+def alerts(config):
+    if not config.alerts_path.exists():
+        return []
+    df = pd.read_csv(config.alerts_path, encoding=config.encoding)
+    return df[['Name', 'X_TIME', 'Y_TIME', 'DURATION_MS']].values.tolist()
+
+def baselines(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT name, count, mean, var FROM baseline ORDER BY name').fetchall()
+    finally:
+        conn.close()
+
+def same_stats(got, ref):
+    a, b = daily_stats(got), daily_stats(ref)
+    assert a[['name', 'day', 'count', 'min', 'max']].values.tolist() == b[['name', 'day', 'count', 'min', 'max']].values.tolist()
+    num = [c for c in a.columns if c not in ('name', 'day')]
+    assert np.allclose(a[num].to_numpy(float), b[num].to_numpy(float), rtol=1e-9, equal_nan=True)
+
+def same_baselines(got, ref):
+    a, b = baselines(got), baselines(ref)
+    assert [r[:2] for r in a] == [r[:2] for r in b]
+    assert np.allclose([r[2:] for r in a], [r[2:] for r in b], rtol=1e-9)
+
+def processed(config):
+    e = Engine(config)
+    e._load()
+    done = sorted(r for d in e.already.days() for r in e.already.processed_in(d))
+    e.close()
+    return done
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_full_backfill_matches_serial(make_config, write_signal_csv, tmp_path, files, workers):
+    live = build(make_config, write_signal_csv, tmp_path, files, 'live', {})
+    serial(live)                                        # history written with the old settings
+    for k, v in LOGIC.items():
+        setattr(live, {'debounce_n': 'debounce_n', 'duration_max_ms': 'dur_max'}[k], v)
+    backfill.backfill(live, workers=workers)
+
+    ref = build(make_config, write_signal_csv, tmp_path, files, 'ref', LOGIC)
+    serial(ref)
+    got, want = pair_csvs(live), pair_csvs(ref)
+    assert list(got) == list(want) and all(got[n].equals(want[n]) for n in want)
+    for attr in ('out_events', 'prev_path'):
+        assert read(getattr(live, attr)) == read(getattr(ref, attr)), attr
+    assert alerts(live) == alerts(ref)
+    assert processed(live) == processed(ref)
+    same_stats(live.stats_db, ref.stats_db)
+    same_baselines(live.baseline_db, ref.baseline_db)
+
+def test_backfill_from_a_day(make_config, write_signal_csv, tmp_path, files):
+    live = build(make_config, write_signal_csv, tmp_path, files, 'live', {})
+    serial(live)
+    before = pair_csvs(live)
+    live.debounce_n, live.dur_max = LOGIC['debounce_n'], LOGIC['duration_max_ms']
+    backfill.backfill(live, start=DAYS[1], workers=2)
+
+    # Reference: the earlier pairs as they were, then a serial run of the range from an empty queue.
+    ref = build(make_config, write_signal_csv, tmp_path, files, 'ref', LOGIC, keep=lambda rel: DAYS[0] not in rel)
+    serial(ref)
+    cutoff = pd.Timestamp(f'{DAYS[1][:4]}-{DAYS[1][4:6]}-{DAYS[1][6:]} 08:00:00')
+    got, tail = pair_csvs(live), pair_csvs(ref)
+    for name in sorted(set(before) | set(tail)):
+        head = before.get(name, pd.DataFrame(columns=['X_TIME', 'Y_TIME', 'DURATION_MS']))
+        head = head[pd.to_datetime(head['Y_TIME']) < cutoff]
+        want = pd.concat([head, tail.get(name, head.iloc[:0])], ignore_index=True)
+        assert len(head) and got[name].astype(str).values.tolist() == want.astype(str).values.tolist(), name
+
+        # Statistics and baselines rebuilt from the same pairs, in the same order.
+        stats = DurationStats(tmp_path / 'want' / 'stats.db')
+        stats.add(name[:-4], pd.to_datetime(want['X_TIME']).to_numpy('datetime64[ns]').view(np.int64), want['DURATION_MS'].to_numpy())
+        base = Baselines(tmp_path / 'want' / 'baseline.db', live.anomaly_alpha, live.anomaly_z, live.anomaly_warmup)
+        base.score_name(name[:-4], want['DURATION_MS'].to_numpy())
+        conn = sqlite3.connect(tmp_path / 'want' / 'stats.db')
+        with conn:
+            conn.execute(f"ATTACH DATABASE '{tmp_path / 'want' / 'baseline.db'}' AS anomaly")
+            stats.flush(conn)
+            base.flush(conn, 'anomaly')
+        conn.close()
+    same_stats(live.stats_db, tmp_path / 'want' / 'stats.db')
+    same_baselines(live.baseline_db, tmp_path / 'want' / 'baseline.db')
+    assert live.prev_path.read_bytes() == ref.prev_path.read_bytes()
+    assert processed(live) == sorted(rel[5:] for rel, _ in files)
+
+def test_undated_files_are_reported(make_config, write_signal_csv, tmp_path, files, caplog):
+    config = build(make_config, write_signal_csv, tmp_path, files, 'live', {})
+    write_signal_csv('live/data/loose.csv', files[0][1])
+    with caplog.at_level(logging.WARNING):
+        days = backfill.files_by_day(config)
+    assert list(days) == DAYS and sum(map(len, days.values())) == 9
+    assert 'loose.csv' in caplog.text
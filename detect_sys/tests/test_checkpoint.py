@@ -0,0 +1,72 @@
+## Standard library
+from checkpoint import Checkpoint                   # Under test.
+
+'''
+    One checkpoint: append to a per-name CSV, write output.csv and the snapshot to their tmp
+    names, then stop before or after the commit point.
+'''
+def start(tmp_path, journal):
+    csv, new_csv = tmp_path / 'A.csv', tmp_path / 'B.csv'
+    csv.write_bytes(b'X_TIME,Y_TIME,DURATION_MS\nold\n')
+    out, snap, legacy = tmp_path / 'open_x.bin', tmp_path / 'snap.csv', tmp_path / 'output.csv'
+    out.write_bytes(b'old open')
+    snap.write_bytes(b'old snap')
+    legacy.write_bytes(b'legacy')
+    journal.begin(
+        ['d1/f1.csv', 'd1/f2.csv'], [csv, new_csv],
+        replace=[(tmp_path / 'open_x.bin.ckpt', out), (tmp_path / 'snap.csv.ckpt', snap)],
+        remove=[legacy], pq_since='s1',
+    )
+    with open(csv, 'ab') as f:
+        f.write(b'new\n')
+    new_csv.write_bytes(b'X_TIME,Y_TIME,DURATION_MS\nnew\n')
+    (tmp_path / 'open_x.bin.ckpt').write_bytes(b'new open')
+    (tmp_path / 'snap.csv.ckpt').write_bytes(b'new snap')
+    return csv, new_csv, out, snap, legacy
+
+class Store:
+    def __init__(self):
+        self.rolled = []
+    def rollback(self, since):
+        self.rolled.append(since)
+
+def assert_new(tmp_path, csv, new_csv, out, snap, legacy):
+    assert csv.read_bytes().endswith(b'old\nnew\n') and new_csv.exists()
+    assert out.read_bytes() == b'new open' and snap.read_bytes() == b'new snap'
+    assert not legacy.exists()
+    assert not list(tmp_path.glob('*.ckpt')) and not (tmp_path / 'ckpt.json').exists()
+
+def assert_old(tmp_path, csv, new_csv, out, snap, legacy):
+    assert csv.read_bytes() == b'X_TIME,Y_TIME,DURATION_MS\nold\n' and not new_csv.exists()
+    assert out.read_bytes() == b'old open' and snap.read_bytes() == b'old snap'
+    assert legacy.exists()
+    assert not list(tmp_path.glob('*.ckpt')) and not (tmp_path / 'ckpt.json').exists()
+
+def test_finish(tmp_path):
+    journal = Checkpoint(tmp_path / 'ckpt.json')
+    paths = start(tmp_path, journal)
+    journal.finish()
+    assert_new(tmp_path, *paths)
+
+def test_recover_after_commit_rolls_forward(tmp_path):
+    paths = start(tmp_path, Checkpoint(tmp_path / 'ckpt.json'))
+    store = Store()
+    Checkpoint(tmp_path / 'ckpt.json').recover({'d1/f1.csv', 'd1/f2.csv', 'd0/x.csv'}, store)
+    assert_new(tmp_path, *paths)
+    assert store.rolled == []
+
+def test_recover_before_commit_rolls_back(tmp_path):
+    paths = start(tmp_path, Checkpoint(tmp_path / 'ckpt.json'))
+    store = Store()
+    Checkpoint(tmp_path / 'ckpt.json').recover({'d1/f1.csv'}, store)
+    assert_old(tmp_path, *paths)
+    assert store.rolled == ['s1']
+
+def test_recover_without_journal(tmp_path):
+    Checkpoint(tmp_path / 'ckpt.json').recover(set())
+    assert not any(tmp_path.iterdir())
+
+def test_unreadable_journal_is_removed(tmp_path):
+    (tmp_path / 'ckpt.json').write_text('{', encoding='utf-8')
+    Checkpoint(tmp_path / 'ckpt.json').recover(set())
+    assert not (tmp_path / 'ckpt.json').exists()
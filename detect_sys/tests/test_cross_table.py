@@ -0,0 +1,113 @@
+## Standard library
+import os                                           # For the xlsx mtime.
+import numpy as np                                  #
+import pandas as pd                                 # For writing the xlsx.
+import pytest                                       #
+from cross_table import CrossMap                    # Under test.
+from timeutil import NAT_NS                         #
+
+'''
+    CrossMap: expand() against a loop over the table rows, and when the npz cache is used.
+'''
+TABLE = [('A', 's1', 's2'), ('B', 's3', 's4'), ('C', 's1', 's4'), ('A', 's5', 's2'), (7, 's2', 's1')]
+
+def write_xlsx(path, rows=TABLE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows, columns=['name', 'x', 'y']).to_excel(path, index=False)
+    return path
+
+@pytest.fixture
+def reads(monkeypatch):
+    calls = []
+    read_excel = pd.read_excel
+    monkeypatch.setattr(pd, 'read_excel', lambda *a, **k: calls.append(a[0]) or read_excel(*a, **k))
+    return calls
+
+def reference(rows, signals, ts, rising, side):
+    col = 1 if side == 'x' else 2
+    names = list(dict.fromkeys(r[0] for r in rows))
+    ev = []
+    for i, j in zip(*np.nonzero(rising)):
+        if ts[i] == NAT_NS:
+            continue
+        ev += [(names.index(r[0]), int(ts[i])) for r in rows if r[col] == signals[j]]
+    return sorted(ev)
+
+def test_expand_matches_the_table(tmp_path):
+    cm = CrossMap.load(write_xlsx(tmp_path / 't.xlsx'))
+    assert cm.signals == ['s1', 's2', 's3', 's4', 's5'] and cm.names == ['A', 'B', 'C', 7]
+    rng = np.random.default_rng(0)
+    ts = np.sort(rng.integers(0, 10**12, size=200)).astype(np.int64)
+    ts[[3, 50]] = NAT_NS
+    rising = rng.random((200, 5)) < 0.2
+    for side in ('x', 'y'):
+        nid, t = cm.expand(ts, rising, side)
+        assert list(zip(nid.tolist(), t.tolist())) == reference(TABLE, cm.signals, ts, rising, side)
+    nid, t = cm.expand(ts[:0], rising[:0], 'x')
+    assert len(nid) == 0 and nid.dtype == np.int64
+
+def test_missing_columns(tmp_path):
+    p = tmp_path / 't.xlsx'
+    pd.DataFrame({'name': ['A'], 'x': ['s1']}).to_excel(p, index=False)
+    with pytest.raises(ValueError):
+        CrossMap.load(p)
+
+def same(a, b):
+    assert a.signals == b.signals and a.names == b.names
+    for k in ('x_ptr', 'x_idx', 'y_ptr', 'y_idx'):
+        assert np.array_equal(getattr(a, k), getattr(b, k))
+
+def test_cache_is_used_while_the_xlsx_is_unchanged(tmp_path, reads):
+    xlsx, cache = write_xlsx(tmp_path / 't.xlsx'), tmp_path / 'cache' / 'cross.npz'
+    ref = CrossMap.load(xlsx, cache)
+    assert len(reads) == 1 and cache.exists()
+    same(CrossMap.load(xlsx, cache), ref)
+    assert len(reads) == 1
+
+def test_touched_xlsx_is_checked_by_hash(tmp_path, reads):
+    xlsx, cache = write_xlsx(tmp_path / 't.xlsx'), tmp_path / 'cross.npz'
+    ref = CrossMap.load(xlsx, cache)
+    st = os.stat(xlsx)
+    os.utime(xlsx, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))     # copied or touched, same bytes
+    same(CrossMap.load(xlsx, cache), ref)
+    assert len(reads) == 1
+    before = cache.stat().st_mtime_ns
+    same(CrossMap.load(xlsx, cache), ref)               # the refreshed key matches without hashing
+    assert len(reads) == 1 and cache.stat().st_mtime_ns == before
+
+def test_edited_xlsx_is_read_again(tmp_path, reads):
+    xlsx, cache = write_xlsx(tmp_path / 't.xlsx'), tmp_path / 'cross.npz'
+    CrossMap.load(xlsx, cache)
+    st = os.stat(xlsx)
+    write_xlsx(xlsx, TABLE + [('D', 's6', 's1')])
+    os.utime(xlsx, ns=(st.st_atime_ns, st.st_mtime_ns))             # even with the old mtime
+    cm = CrossMap.load(xlsx, cache)
+    assert len(reads) == 2 and cm.names[-1] == 'D'
+    assert CrossMap.load(xlsx, cache).names[-1] == 'D' and len(reads) == 2
+
+def test_other_xlsx_path(tmp_path, reads):
+    cache = tmp_path / 'cross.npz'
+    CrossMap.load(write_xlsx(tmp_path / 'a' / 't.xlsx'), cache)
+    cm = CrossMap.load(write_xlsx(tmp_path / 'b' / 't.xlsx', TABLE[:2]), cache)
+    assert len(reads) == 2 and cm.names == ['A', 'B']
+
+@pytest.mark.parametrize('content', [b'', b'not an npz', None])
+def test_unreadable_cache_is_rebuilt(tmp_path, reads, content):
+    xlsx, cache = write_xlsx(tmp_path / 't.xlsx'), tmp_path / 'cross.npz'
+    ref = CrossMap.load(xlsx)
+    if content is None:                                 # a cache of another version
+        ref.save(cache, {'path': str(xlsx.resolve())})
+        np.savez(cache, meta=np.array('{"version": 0}'))
+    else:
+        cache.write_bytes(content)
+    same(CrossMap.load(xlsx, cache), ref)
+    same(CrossMap.load(xlsx, cache), ref)
+    assert len(reads) == 2                              # reference + one rebuild
+
+def test_cache_off_or_not_writable(tmp_path, reads):
+    xlsx = write_xlsx(tmp_path / 't.xlsx')
+    CrossMap.load(xlsx, None)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['t.xlsx']
+    (tmp_path / 'ro').write_text('a file where the cache folder should be')
+    CrossMap.load(xlsx, tmp_path / 'ro' / 'cross.npz')
+    assert len(reads) == 2
@@ -0,0 +1,91 @@
+## Standard library
+import sqlite3                                      # For the flush transaction.
+import numpy as np                                  #
+import pytest                                       #
+from duration_stats import ALPHA, NS_PER_DAY, Sketch, DayStats, DurationStats, daily_stats, merged_stats  # Under test.
+
+'''
+    Sketch and DayStats: merged parts against one pass over all the values, quantiles against the
+    exact sample quantiles; DurationStats: flush and the read side.
+'''
+Q = np.linspace(0, 1, 101)
+
+def values(seed, n=5000):
+    rng = np.random.default_rng(seed)
+    v = np.round(rng.lognormal(6, 1.5, size=n)).astype(np.int64)
+    v[:n // 50] = 0                                     # zero durations go to the zero bucket
+    return rng.permutation(v)
+
+def same_sketch(a, b):
+    assert np.array_equal(a.keys, b.keys) and np.array_equal(a.counts, b.counts) and a.zero == b.zero
+
+def same_day(a, b):
+    assert (a.count, a.min, a.max) == (b.count, b.min, b.max)
+    assert np.isclose(a.mean, b.mean, rtol=1e-12) and np.isclose(a.m2, b.m2, rtol=1e-9)
+    same_sketch(a.sketch, b.sketch)
+
+@pytest.mark.parametrize('parts', [1, 2, 7, 50])
+def test_merge_equals_one_pass(parts):
+    v = values(parts)
+    chunks = np.array_split(v, parts)
+    ref = DayStats.of(v)
+    fwd, rev = DayStats(), DayStats()
+    for c in chunks:
+        fwd = fwd.merge(DayStats.of(c))
+    for c in reversed(chunks):
+        rev = DayStats.of(c).merge(rev)
+    same_day(fwd, ref)
+    same_day(rev, ref)
+    assert np.isclose(fwd.std(), v.std(ddof=1), rtol=1e-9)
+
+def test_quantiles_within_alpha():
+    for seed in range(3):
+        v = values(seed)
+        exact = np.quantile(v, Q, method='lower')       # the sample the sketch's rank points at
+        for got in (Sketch.of(v).quantiles(Q), DayStats.of(v).quantiles(Q)):
+            assert np.all(np.abs(got - exact) <= ALPHA * exact + 1e-9)
+    st = DayStats.of(values(0))
+    assert st.quantiles([0])[0] == st.min and st.quantiles([1])[0] == st.max
+
+def test_empty_and_round_trip():
+    assert Sketch().count() == 0 and np.isnan(Sketch().quantiles([0.5])).all()
+    assert np.isnan(DayStats().quantiles([0.1, 0.9])).all() and np.isnan(DayStats.of([5]).std())
+    s = Sketch.of(values(4))
+    same_sketch(Sketch.from_bytes(s.to_bytes()), s)
+    same_sketch(Sketch.from_bytes(Sketch().to_bytes()), Sketch())
+
+def flush(stats):
+    conn = sqlite3.connect(stats.path)
+    with conn:
+        stats.flush(conn)
+    conn.close()
+    stats.committed()
+
+def test_flush_and_read(tmp_path):
+    day0 = np.datetime64('2026-03-04', 'D').astype(np.int64) * NS_PER_DAY
+    v = values(5, 3000)
+    x = day0 + np.sort(np.random.default_rng(5).integers(0, 2 * NS_PER_DAY, size=len(v)))
+    stats = DurationStats(tmp_path / 'stats.db')
+    for part in np.array_split(np.arange(len(v)), 4):   # one flush per checkpoint
+        stats.add('A', x[part], v[part])
+        stats.add('B', x[part][:10], v[part][:10])
+        flush(stats)
+    stats.add('A', x, v)
+    stats.discard()                                     # an abandoned checkpoint adds nothing
+    flush(stats)
+
+    df = daily_stats(tmp_path / 'stats.db', 'A')
+    first = x < day0 + NS_PER_DAY
+    assert df['day'].tolist() == ['20260304', '20260305']
+    assert df['count'].tolist() == [first.sum(), (~first).sum()]
+    assert df['max'].tolist() == [v[first].max(), v[~first].max()]
+    assert np.isclose(df['mean'][0], v[first].mean()) and np.isclose(df['std'][1], v[~first].std(ddof=1))
+
+    m = merged_stats(tmp_path / 'stats.db')
+    assert m['name'].tolist() == ['A', 'B'] and m['count'].tolist() == [len(v), 40]
+    a = m.iloc[0]
+    assert np.isclose(a['mean'], v.mean()) and np.isclose(a['std'], v.std(ddof=1))
+    exact = np.quantile(v, [0.01, 0.5, 0.99], method='lower')
+    assert np.all(np.abs(a[['q0.01', 'q0.5', 'q0.99']].to_numpy(float) - exact) <= ALPHA * exact + 1e-9)
+    assert merged_stats(tmp_path / 'stats.db', 'A', start_day='20260305')['count'].tolist() == [(~first).sum()]
+    assert daily_stats(tmp_path / 'stats.db', 'C').empty
@@ -0,0 +1,85 @@
+## Standard library
+import numpy as np                                  #
+import pandas as pd                                 # For the per-signal reference.
+import pytest                                       #
+from edge import detect_edges                       # Under test.
+
+'''
+    detect_edges() against the former per-signal pandas loop of main.py.
+'''
+def reference(mat, prev_row, debounce_n):
+    rising = np.zeros(mat.shape, dtype=bool)
+    last = prev_row.copy()
+    for k in range(mat.shape[1]):
+        s = pd.Series(mat[:, k]).astype('Int8').fillna(0).astype('Int8')
+        prev_in_file = pd.concat([pd.Series([prev_row[k]]), s[:-1]], ignore_index=True)
+        if debounce_n > 1:
+            stable_mask = (s.rolling(debounce_n, min_periods=debounce_n).sum() == debounce_n).fillna(False)
+            mask = (prev_in_file == 0) & (s == 1) & stable_mask
+        else:
+            mask = (prev_in_file == 0) & (s == 1)
+        rising[:, k] = mask.to_numpy(dtype=bool)
+        last[k] = int(s.iloc[-1])
+    return rising, last
+
+def random_mat(rng, rows, cols, p_one=0.5, run=4):
+    # Runs of equal values, so debounce windows are both met and missed.
+    lens = rng.integers(1, run + 1, size=rows)
+    vals = (rng.random((rows, cols)) < p_one).astype(np.uint8)
+    return np.repeat(vals, lens, axis=0)[:rows]
+
+@pytest.mark.parametrize('debounce_n', [1, 2, 3, 5])
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_pandas_loop(debounce_n, seed):
+    rng = np.random.default_rng(seed)
+    mat = random_mat(rng, 200, 7)
+    prev = rng.integers(0, 2, size=7).astype(np.uint8)
+    rising, _, last = detect_edges(mat, prev, debounce_n)
+    ref_rising, ref_last = reference(mat, prev, debounce_n)
+    assert np.array_equal(rising, ref_rising)
+    assert np.array_equal(last, ref_last)
+
+@pytest.mark.parametrize('debounce_n', [1, 3])
+def test_carry_across_files(debounce_n):
+    rng = np.random.default_rng(1)
+    files = [random_mat(rng, n, 4) for n in (1, 2, 50, 3)]
+    carry = np.zeros(4, dtype=np.uint8)
+    ref_carry = carry.copy()
+    for mat in files:
+        rising, _, carry = detect_edges(mat, carry, debounce_n)
+        ref_rising, ref_carry = reference(mat, ref_carry, debounce_n)
+        assert np.array_equal(rising, ref_rising)
+        assert np.array_equal(carry, ref_carry)
+
+def test_short_file_never_stable():
+    mat = np.array([[1], [1]], dtype=np.uint8)
+    rising, stable, _ = detect_edges(mat, np.zeros(1, dtype=np.uint8), 3)
+    assert not rising.any() and not stable.any()
+
+def test_missing_columns_keep_carry():
+    mat = np.array([[1, 1], [1, 0], [0, 1]], dtype=np.uint8)
+    prev = np.array([0, 1], dtype=np.uint8)
+    present = np.array([True, False])
+    rising, _, last = detect_edges(mat, prev, 1, present)
+    assert rising[:, 1].sum() == 0
+    assert rising[0, 0] and not rising[1:, 0].any()
+    assert list(last) == [0, 1]
+
+@pytest.mark.parametrize('debounce_n', [2, 4])
+def test_chunks_with_head_match_whole_file(debounce_n):
+    rng = np.random.default_rng(2)
+    mat = random_mat(rng, 300, 5)
+    prev = np.zeros(5, dtype=np.uint8)
+    whole, _, whole_last = detect_edges(mat, prev, debounce_n)
+    parts, carry, head = [], prev, None
+    for lo in range(0, len(mat), 37):
+        chunk = mat[lo:lo + 37]
+        rising, _, carry = detect_edges(chunk, carry, debounce_n, head=head)
+        parts.append(rising)
+        head = chunk
+    assert np.array_equal(np.concatenate(parts), whole)
+    assert np.array_equal(carry, whole_last)
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError):
+        detect_edges(np.zeros((3, 2), dtype=np.uint8), np.zeros(3, dtype=np.uint8))
@@ -0,0 +1,154 @@
+## Standard library
+import os                                           # For the file mtimes.
+import sys                                          #
+import time                                         # For the write guard's sleep.
+import shutil                                       # For copying the data folder.
+import subprocess                                   # For a fresh interpreter.
+from pathlib import Path                            # For filesystem path and operations.
+import numpy as np                                  #
+import pytest                                       #
+import pandas as pd                                 # For the pair CSVs.
+from conftest import random_rows                    # Test data.
+import engine                                       # Under test.
+from engine import Engine, PairsBatch               #
+from lines import Line                              #
+
+'''
+    Engine through its API on a tmp pipeline (see conftest.make_config).
+'''
+@pytest.fixture
+def day(write_signal_csv):
+    rng = np.random.default_rng(0)
+    for k in range(3):
+        write_signal_csv(f'data/INPUT_M20260305/{k}.csv', random_rows(rng, 40, t0=f'2026-03-05 08:0{k}:00'))
+    return ['INPUT_M20260305/0.csv', 'INPUT_M20260305/1.csv', 'INPUT_M20260305/2.csv']
+
+'''
+    Write guard: stable_files() is replaced by one that sees every file still growing.
+'''
+@pytest.fixture
+def growing(monkeypatch):
+    calls = []
+    monkeypatch.setattr(engine, 'stable_files', lambda paths, *a: calls.append(list(paths)) or [])
+    return calls
+
+def test_guard_follows_the_config(make_config, day, growing):
+    e = Engine(make_config({'logic': {'write_guard_enable': True}}))
+    assert e.process(day).files == [] and len(growing) == 1
+    assert e.process(day, guard=False).files == day and len(growing) == 1
+    e.close()
+
+def test_watch_rounds_always_guard(make_config, day, growing):
+    e = Engine(make_config())
+    assert e.process(day, guard=True).files == []
+    assert e.find_pending() == day                      # held back, not recorded
+    e.close()
+    ln = Line('L1', make_config())
+    ln.load()
+    ln.run_round(watch=True)
+    assert ln.status['files'] == 0 and ln.status['pending'] == 3 and ln.status['error'] is None
+    ln.run_round(watch=False)
+    assert ln.status['files'] == 3 and ln.status['pending'] == 0
+    ln.engine.close()
+
+'''
+    stable_files(): one sleep for the whole list; whatever changes during it is held back.
+'''
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls, during = [], []      # during: what happens to the files while the guard sleeps
+    def sleep(sec):
+        calls.append(sec)
+        for f in during:
+            f()
+    monkeypatch.setattr(time, 'sleep', sleep)
+    return calls, during
+
+def test_stable_files(tmp_path, sleeps):
+    calls, during = sleeps
+    paths = [tmp_path / f'{k}.csv' for k in range(5)]
+    for p in paths:
+        p.write_text('TIME\n')
+    during += [lambda: paths[1].write_text('TIME\n1\n'), lambda: paths[3].unlink()]
+    got = engine.stable_files(paths[::-1] + [tmp_path / 'gone.csv'], 200)
+    assert got == [paths[4], paths[2], paths[0]] and calls == [0.2]
+    during.clear()
+    assert engine.stable(paths[0], 200) and len(calls) == 2
+
+def test_old_files_skip_the_wait(tmp_path, sleeps):
+    calls, during = sleeps
+    paths = [tmp_path / f'{k}.csv' for k in range(3)]
+    for p in paths:
+        p.write_text('TIME\n')
+        os.utime(p, (time.time() - 3600, time.time() - 3600))
+    during.append(lambda: paths[2].write_text('TIME\n2\n2\n'))
+    assert engine.stable_files(paths, 200, max_age_sec=600) == paths and calls == []
+    paths[2].write_text('TIME\n2\n')                    # recent again: it alone shares the wait
+    assert engine.stable_files(paths, 200, max_age_sec=600) == paths[:2] and calls == [0.2]
+    assert engine.stable_files([], 200) == [] and calls == [0.2]
+
+'''
+    Importing the engine (and the tools built on it) loads only the standard library and reads
+    no config; PairsBatch works before any Engine has run.
+'''
+APP = Path(__file__).resolve().parents[1]
+
+def fresh(code, cwd):
+    return subprocess.run([sys.executable, '-c', code], cwd=cwd, env={'PYTHONPATH': str(APP)},
+                          capture_output=True, text=True, check=True).stdout.split()
+
+def test_import_has_no_side_effects(tmp_path):
+    out = fresh('import sys, engine; print(sorted({"numpy", "pandas", "tomllib"} & set(sys.modules)))', tmp_path)
+    assert out == ["['tomllib']"]
+    fresh('import bench_reader', tmp_path)                  # no config.toml is read at import
+    assert list(tmp_path.iterdir()) == []
+
+def test_pairs_batch_without_an_engine(tmp_path):
+    code = (
+        'import numpy as np\n'
+        'from engine import PairsBatch\n'
+        'b = PairsBatch(["a.csv"])\n'
+        'b._add("A", np.array([1, 2]), np.array([3, 4]), np.array([0, 0]))\n'
+        'print(len(b), len(b.frame()), list(b.pairs), len(PairsBatch().frame()))\n'
+    )
+    assert fresh(code, tmp_path) == ['2', '2', "['A']", '0']
+
+def test_frame(make_config):
+    b = PairsBatch()
+    assert b.frame().empty and list(b.frame().columns) == ['Name', 'X_TIME', 'Y_TIME', 'DURATION_MS']
+    b._add('B', np.array([5]), np.array([7]), np.array([0]))
+    b._add('A', np.array([1, 2]), np.array([3, 4]), np.array([0, 0]))
+    df = b.frame()
+    assert df['Name'].tolist() == ['B', 'A', 'A'] and df['X_TIME'].dtype == 'datetime64[ns]'
+    assert b.frame('A')['Y_TIME'].astype('int64').tolist() == [3, 4]
+
+'''
+    The API a notebook or a worker uses: run_once, process with and without commit, close/reopen.
+'''
+def test_engine_api(make_config, day, write_signal_csv, tmp_path):
+    e = Engine(make_config())
+    assert e.find_pending() == day
+    batch = e.run_once()
+    assert batch.files == day and len(batch) > 0
+    for name, (x_ns, y_ns, dur_ms) in batch.pairs.items():
+        df = pd.read_csv(e.config.output_dir / f'{name}.csv', encoding=e.config.encoding)
+        assert df['DURATION_MS'].tolist() == dur_ms.tolist()
+        assert pd.to_datetime(df['X_TIME']).to_numpy('datetime64[ns]').view(np.int64).tolist() == x_ns.tolist()
+    assert len(e.run_once()) == 0 and e.find_pending() == []
+
+    # The same files in one process() call from a cold engine give the same pairs.
+    ref = Engine(make_config(base=tmp_path / 'ref'))
+    shutil.copytree(e.base, tmp_path / 'ref' / 'data', dirs_exist_ok=True)
+    ref_batch = ref.process(day, commit=False)
+    assert ref.find_pending() == day                        # not committed
+    assert {k: [a.tolist() for a in v] for k, v in ref_batch.pairs.items()} == \
+           {k: [a.tolist() for a in v] for k, v in batch.pairs.items()}
+    ref.close()
+
+    # A new file after a restart continues from the committed carry and open X.
+    e.close()
+    write_signal_csv('data/INPUT_M20260305/3.csv', random_rows(np.random.default_rng(9), 40, t0='2026-03-05 08:03:00'))
+    e = Engine(make_config())
+    assert e.find_pending() == ['INPUT_M20260305/3.csv']
+    assert e.run_once().files == ['INPUT_M20260305/3.csv']
+    e.close()
@@ -0,0 +1,141 @@
+## Standard library
+import json                                         # For the status file.
+import threading                                    # For a blocked line.
+import numpy as np                                  #
+import pandas as pd                                 # For the pair CSVs.
+import pytest                                       #
+from conftest import ENCODING, HEADER_ROW, random_rows  # Test data.
+from engine import Engine                           # Serial reference.
+from lines import FairPool, Line, Supervisor        # Under test.
+
+'''
+    FairPool slot shares, Line after a failed round, and a Supervisor run against each line alone.
+'''
+def pool(workers, lines):
+    p = FairPool(workers, {k: {'ctx': None, 'weight': w, 'max_workers': m} for k, (w, m) in lines.items()})
+    p._wanting.update(lines)
+    return p
+
+'''
+    Non-blocking grants in turn until no line may take a slot: how the free slots are shared
+    while every line has files left.
+'''
+def fill(p):
+    while True:
+        granted = [k for k in p.inflight if k in p._wanting and p._acquire(k, block=False)]
+        if not granted:
+            return dict(p.inflight)
+
+def test_shares_follow_the_weights():
+    p = pool(6, {'A': (2.0, 0), 'B': (1.0, 0), 'C': (1.0, 1)})
+    try:
+        assert fill(p) == {'A': 3, 'B': 2, 'C': 1}      # C capped, the rest 2:1 (rounded)
+        p._release('A', None)
+        assert not p._acquire('B', block=False)         # the freed slot is A's: lower share
+        assert fill(p) == {'A': 3, 'B': 2, 'C': 1}
+        p._release('B', None)
+        p._release('C', None)
+        assert fill(p) == {'A': 3, 'B': 2, 'C': 1}
+        p._wanting.discard('C')                         # C has nothing left: its slot goes to the others
+        p._release('C', None)
+        assert fill(p) == {'A': 4, 'B': 2, 'C': 0}
+    finally:
+        p.shutdown()
+
+def test_idle_lines_leave_no_slot_unused():
+    p = pool(4, {'A': (1.0, 0), 'B': (5.0, 0)})
+    try:
+        p._wanting.discard('B')
+        assert fill(p) == {'A': 4, 'B': 0}
+        p.shutdown()
+        p = pool(4, {'A': (1.0, 2), 'B': (1.0, 0)})
+        p._wanting.discard('B')
+        assert fill(p) == {'A': 2, 'B': 0}              # max_workers holds even with free slots
+    finally:
+        p.shutdown()
+
+def test_blocked_line_gets_the_next_slot():
+    p = pool(2, {'A': (10.0, 0), 'B': (1.0, 0)})
+    try:
+        p._wanting.discard('B')
+        assert fill(p) == {'A': 2, 'B': 0}
+        t = threading.Thread(target=p._acquire, args=('B', True))
+        t.start()
+        while 'B' not in p._waiting:
+            t.join(0.01)
+        p._release('A', None)
+        t.join(5)
+        assert not t.is_alive() and p.inflight == {'A': 1, 'B': 1}
+        assert not p._acquire('A', block=False)
+    finally:
+        p.shutdown()
+
+'''
+    Line after a failed round: the last checkpoint is reloaded; a line whose reload fails, or
+    whose cross table changed, is stopped.
+'''
+def fail(ex):
+    def raise_(*a, **k):
+        raise ex
+    return raise_
+
+@pytest.fixture
+def line(make_config, write_signal_csv, monkeypatch):
+    write_signal_csv('data/INPUT_M20260305/0.csv', random_rows(np.random.default_rng(0), 40))
+    ln = Line('L1', make_config())
+    ln.load()
+    monkeypatch.setattr(ln.engine, 'process', fail(OSError('share gone')))
+    yield ln
+    ln.engine.close()
+
+def test_failed_round_reloads(line):
+    line.run_round()
+    assert line.status['error'] == 'OSError: share gone' and line.status['state'] == 'idle'
+    assert line.ctx is not None and line.engine.find_pending() == ['INPUT_M20260305/0.csv']
+
+def test_failed_reload_stops_the_line(line, monkeypatch):
+    monkeypatch.setattr(line.engine, '_load', fail(ValueError('bad table')))
+    line.run_round()
+    assert line.status['error'] == 'ValueError: bad table' and line.status['state'] == 'stopped'
+    assert line.ctx is None
+
+def test_changed_cross_table_stops_the_line(line, tmp_path):
+    pd.DataFrame([('A', '押釦1', 'センサ')], columns=['name', 'x', 'y']).to_excel(tmp_path / 'table' / 'd_tube_assembly.xlsx', index=False)
+    line.run_round()
+    assert line.status['error'] == 'cross table changed, restart the supervisor'
+    assert line.status['state'] == 'stopped' and line.ctx is None
+
+'''
+    Two lines on one shared pool give the outputs of each line run alone.
+'''
+def pair_csvs(config):
+    return {p.name: p.read_bytes() for p in sorted(config.output_dir.glob('*.csv')) if p.read_bytes().startswith(b'X_TIME,')}
+
+def test_supervisor_matches_each_line_alone(make_config, write_signal_csv, tmp_path):
+    rng = np.random.default_rng(1)
+    conf = f'[io]\nencoding = "{ENCODING}"\nheader_row = {HEADER_ROW}\n'
+    for name in ('L1', 'L2', 'ref1', 'ref2'):
+        make_config(base=tmp_path / name)
+        (tmp_path / name / 'config.toml').write_text(conf, encoding='utf-8')
+    for k in range(6):
+        for name, ref in (('L1', 'ref1'), ('L2', 'ref2')):
+            rows = random_rows(rng, 60, t0=f'2026-03-05 08:{k:02d}:00')
+            write_signal_csv(f'{name}/data/INPUT_M20260305/{k}.csv', rows)
+            write_signal_csv(f'{ref}/data/INPUT_M20260305/{k}.csv', rows)
+    (tmp_path / 'lines.toml').write_text(
+        '[supervisor]\nworkers = 2\npoll_interval_sec = 0.1\nstatus_path = "status.json"\n'
+        '[[line]]\nname = "L1"\nconfig = "L1/config.toml"\nweight = 2.0\n'
+        '[[line]]\nname = "L2"\nconfig = "L2/config.toml"\nmax_workers = 1\n', encoding='utf-8')
+    sup = Supervisor(tmp_path / 'lines.toml')
+    try:
+        sup.run()
+    finally:
+        sup.close()
+    status = json.loads((tmp_path / 'status.json').read_text(encoding='utf-8'))['lines']
+    assert {n: (s['files'], s['pending'], s['error']) for n, s in status.items()} == {'L1': (6, 0, None), 'L2': (6, 0, None)}
+    for name, ref in (('L1', 'ref1'), ('L2', 'ref2')):
+        e = Engine(make_config(base=tmp_path / ref))
+        e.run_once()
+        e.close()
+        got, want = pair_csvs(sup.lines[name].engine.config), pair_csvs(e.config)
+        assert got and got == want
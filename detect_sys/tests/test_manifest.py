@@ -0,0 +1,127 @@
+## Standard library
+import os                                           # For folder mtimes.
+import shutil                                       # For removing a folder.
+import pytest                                       #
+import manifest                                     # Under test.
+from manifest import DirManifest                    #
+from state_store import StateStore                  #
+
+'''
+    DirManifest.scan() against listing every file, and the folders it lists to get there.
+'''
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('TIME\n')
+
+def bump(folder, sec=10):
+    st = os.stat(folder)
+    os.utime(folder, ns=(st.st_atime_ns, st.st_mtime_ns + sec * 10**9))
+
+@pytest.fixture
+def base(tmp_path):
+    b = tmp_path / 'data'
+    for d in ('INPUT_M20260303', 'INPUT_M20260304'):
+        touch(b / d / 'a.csv')
+        touch(b / d / 'sub' / 'b.csv')
+        touch(b / d / 'note.txt')
+    touch(b / 'loose.csv')
+    return b
+
+@pytest.fixture
+def listed(monkeypatch):
+    calls = []      # day folders listed (the walk recurses into their subfolders)
+    walk = manifest._walk
+    def spy(path, rel_dir, *a):
+        if '/' not in rel_dir:
+            calls.append(rel_dir)
+        return walk(path, rel_dir, *a)
+    monkeypatch.setattr(manifest, '_walk', spy)
+    return calls
+
+def reference(base, already):
+    return sorted(p.relative_to(base).as_posix() for p in base.rglob('*.csv') if p.relative_to(base).as_posix() not in already)
+
+def scan(m, base, already):
+    found = sorted(r for r, _ in m.scan(base, '*.csv', already))
+    assert found == reference(base, already)
+    return found
+
+def run(m, base, already):
+    found = scan(m, base, already)
+    already.update(found)
+    m.commit(already)
+    return found
+
+def test_done_folders_are_skipped(tmp_path, base, listed):
+    already = StateStore(tmp_path / 'state.db')
+    m = DirManifest(tmp_path / 'manifest.json')
+    assert len(run(m, base, already)) == 5
+    listed.clear()
+    assert run(DirManifest(tmp_path / 'manifest.json'), base, already) == []   # reloaded from disk
+    assert listed == []
+
+def test_new_files_in_done_folders(tmp_path, base, listed):
+    already = StateStore(tmp_path / 'state.db')
+    m = DirManifest(tmp_path / 'manifest.json')
+    run(m, base, already)
+    touch(base / 'INPUT_M20260303' / 'sub' / 'deep' / 'c.csv')     # touches sub/ and creates deep/
+    touch(base / 'INPUT_M20260304' / 'sub' / 'd.csv')              # only sub/ changes
+    listed.clear()
+    assert run(m, base, already) == ['INPUT_M20260303/sub/deep/c.csv', 'INPUT_M20260304/sub/d.csv']
+    assert sorted(listed) == ['INPUT_M20260303', 'INPUT_M20260304']
+    touch(base / 'INPUT_M20260304' / 'sub' / 'deep2' / 'e.csv')
+    bump(base / 'INPUT_M20260304' / 'sub' / 'deep2')
+    listed.clear()
+    assert run(m, base, already) == ['INPUT_M20260304/sub/deep2/e.csv']
+    assert listed == ['INPUT_M20260304']
+
+def test_partly_processed_folder_is_listed_until_done(tmp_path, base, listed):
+    already = StateStore(tmp_path / 'state.db')
+    m = DirManifest(tmp_path / 'manifest.json')
+    found = scan(m, base, already)
+    already.update(found[:2])
+    m.commit(already)
+    listed.clear()
+    assert run(m, base, already) == found[2:]
+    assert 'INPUT_M20260304' in listed
+
+def test_other_state_store_lists_everything(tmp_path, base):
+    already = StateStore(tmp_path / 'state.db')
+    m = DirManifest(tmp_path / 'manifest.json')
+    run(m, base, already)
+    already.close()
+    os.remove(tmp_path / 'state.db')                    # reprocess everything
+    fresh = StateStore(tmp_path / 'state.db')
+    assert fresh.store_id != already.store_id
+    assert len(scan(DirManifest(tmp_path / 'manifest.json'), base, fresh)) == 5
+
+def test_rows_removed_from_the_same_store(tmp_path, base):
+    already = StateStore(tmp_path / 'state.db')
+    m = DirManifest(tmp_path / 'manifest.json')
+    run(m, base, already)
+    with already.conn:
+        already.conn.execute("DELETE FROM processed WHERE rel = 'INPUT_M20260303/sub/b.csv'")
+    already = StateStore(tmp_path / 'state.db')
+    assert already.count_under('INPUT_M20260303') == 1 and already.count_under('INPUT_M20260304') == 2
+    assert scan(m, base, already) == ['INPUT_M20260303/sub/b.csv']
+
+def test_archived_days_still_count(tmp_path, base, listed):
+    already = StateStore(tmp_path / 'state.db')
+    m = DirManifest(tmp_path / 'manifest.json')
+    run(m, base, already)
+    already.archive('20260304')
+    assert already.count_under('INPUT_M20260303') == 2
+    listed.clear()
+    assert run(m, base, already) == [] and listed == []
+
+def test_removed_and_pruned_folders(tmp_path, base, listed):
+    already = StateStore(tmp_path / 'state.db')
+    m = DirManifest(tmp_path / 'manifest.json')
+    run(m, base, already)
+    shutil.rmtree(base / 'INPUT_M20260303')
+    scan(m, base, already)
+    assert sorted(m.dirs) == ['INPUT_M20260304']
+    touch(base / 'INPUT_M20260305' / 'x.csv')
+    listed.clear()
+    found = m.scan(base, '*.csv', already, keep_dir=lambda name: name >= 'INPUT_M20260305')
+    assert [r for r, _ in found] == ['INPUT_M20260305/x.csv'] and listed == ['INPUT_M20260305']
@@ -0,0 +1,77 @@
+## Standard library
+import json                                         # For the metrics file.
+from metrics import Metrics                         # Under test.
+
+def test_disabled_is_a_no_op(tmp_path):
+    m = Metrics(False, tmp_path / 'json', tmp_path / 'm.prom')
+    with m.stage('read'):
+        pass
+    m.add('rows', 5)
+    m.set('backlog', 3)
+    m.write()
+    assert m.stages == {} and m.counts == {}
+    assert not any(tmp_path.iterdir())
+
+def test_stages_and_counters():
+    m = Metrics(True)
+    for _ in range(3):
+        with m.stage('read'):
+            pass
+    m.add('rows', 5)
+    m.add('rows', 7)
+    m.set('backlog', 3)
+    m.set('backlog', 1)
+    snap = m.snapshot()
+    assert snap['stages']['read']['calls'] == 3
+    assert snap['counts'] == {'rows': 12, 'backlog': 1}
+
+def test_stage_counted_on_error():
+    m = Metrics(True)
+    try:
+        with m.stage('pair'):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert m.stages['pair'][1] == 1
+
+def test_write_json_and_prom(tmp_path):
+    m = Metrics(True, tmp_path / 'json', tmp_path / 'prom' / 'detect_sys.prom')
+    with m.stage('read'):
+        pass
+    m.add('files', 2)
+    m.write()
+    (js,) = (tmp_path / 'json').glob('metrics_*.json')
+    snap = json.loads(js.read_text(encoding='utf-8'))
+    assert snap['counts'] == {'files': 2} and snap['stages']['read']['calls'] == 1
+    prom = (tmp_path / 'prom' / 'detect_sys.prom').read_text(encoding='utf-8')
+    assert 'detect_sys_stage_calls{stage="read"} 1' in prom
+    assert '# HELP detect_sys_files Files processed in the last run.' in prom
+    assert 'detect_sys_files 2' in prom
+    assert not list(tmp_path.rglob('*.tmp'))
+
+def test_reset_starts_a_new_run():
+    m = Metrics(True)
+    m.add('rows', 1)
+    m.reset()
+    assert m.counts == {} and m.stages == {}
+
+def test_run_ids_are_unique_within_a_second(tmp_path):
+    m = Metrics(True, tmp_path)
+    ids = set()
+    for _ in range(5):       # watch rounds well under a second apart
+        m.add('files')
+        m.write()
+        ids.add(m.run_id)
+        m.reset()
+    assert len(ids) == 5 and len(list(tmp_path.glob('metrics_*.json'))) == 5
+
+def test_old_json_files_are_pruned(tmp_path):
+    m = Metrics(True, tmp_path, keep=3)
+    (tmp_path / 'other.json').write_text('{}')
+    written = []
+    for _ in range(7):
+        m.write()
+        written.append(f'metrics_{m.run_id}.json')
+        m.reset()
+    assert sorted(p.name for p in tmp_path.glob('metrics_*.json')) == sorted(written[-3:])
+    assert (tmp_path / 'other.json').exists()
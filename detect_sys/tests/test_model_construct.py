@@ -0,0 +1,108 @@
+## Standard library
+import numpy as np                                  #
+import pandas as pd                                 # Reference trimming.
+import pytest                                       #
+import ModerlConstruct                              # Under test.
+from timeutil import format_ns                      #
+
+'''
+    pre*.csv kept up to date through pre_state.json against a full rebuild and against the
+    former per-file pandas script.
+'''
+DAY = 86_400 * 10**9
+BASE = pd.Timestamp('2026-03-05').value
+
+def pairs(rng, day0, days, per_day=200):
+    x = np.sort(BASE + day0 * DAY + rng.integers(0, days * DAY, size=days * per_day))
+    dur = rng.integers(100, 5000, size=len(x))
+    return pd.DataFrame({'X_TIME': format_ns(x), 'Y_TIME': format_ns(x + dur * 10**6), 'DURATION_MS': dur})
+
+def write(path, df, mode='w'):
+    df.to_csv(path, mode=mode, index=False, header=mode == 'w', encoding='cp932')
+
+def baseline(path, upper=0.99, lower=0.01):
+    df = pd.read_csv(path, encoding='cp932').rename(columns={'X_TIME': 'time', 'DURATION_MS': 'value'})[['time', 'value']]
+    d = pd.to_datetime(df['time']).dt.floor('D')
+    q_upper = df.groupby(d)['value'].transform(lambda s: s.quantile(upper))
+    q_lower = df.groupby(d)['value'].transform(lambda s: s.quantile(lower))
+    return df[(df['value'] < q_upper) & (df['value'] > q_lower)].reset_index(drop=True)
+
+def run(src, dst, *extra):
+    ModerlConstruct.main(['--src', str(src), '--dst', str(dst), '--workers', '1', *extra])
+
+def check(src, dst, full):
+    run(src, full, '--full')
+    names = sorted(p.name for p in full.glob('pre*.csv'))
+    assert names == sorted(p.name for p in dst.glob('pre*.csv'))
+    for name in names:
+        assert (dst / name).read_bytes() == (full / name).read_bytes(), name
+        got = pd.read_csv(full / name, encoding='cp932')
+        assert got.astype(str).values.tolist() == baseline(src / name[3:]).astype(str).values.tolist()
+
+@pytest.fixture
+def dirs(tmp_path):
+    src = tmp_path / 'output'
+    src.mkdir()
+    return src, tmp_path / 'pre', tmp_path / 'full'
+
+def test_pair_files(dirs):
+    src, _, _ = dirs
+    rng = np.random.default_rng(0)
+    for name in ('press01.csv', 'pre.csv', 'A.csv'):
+        write(src / name, pairs(rng, 0, 1, 10))
+    (src / 'output.csv').write_text('Name,TIME,IO,TIME_NS\n', encoding='cp932')
+    (src / 'preA.csv').write_text('time,value\n', encoding='cp932')
+    (src / 'alerts.csv').write_text('Name,X_TIME,Y_TIME,DURATION_MS,Z\n', encoding='cp932')
+    assert ModerlConstruct.pair_files(src) == ['A.csv', 'pre.csv', 'press01.csv']
+
+def test_incremental_matches_full_rebuild(dirs, monkeypatch):
+    src, dst, full = dirs
+    starts = []
+    read_rows = ModerlConstruct.read_rows
+    monkeypatch.setattr(ModerlConstruct, 'read_rows', lambda f, start: starts.append(start) or read_rows(f, start))
+    rng = np.random.default_rng(1)
+    write(src / 'press01.csv', pairs(rng, 0, 3))
+    write(src / 'B.csv', pairs(rng, 0, 2))
+    run(src, dst)
+    check(src, dst, full)
+
+    # Appends to the last day and new days.
+    last = pd.read_csv(src / 'press01.csv', encoding='cp932')['X_TIME'].iloc[-1]
+    more = pairs(rng, 2, 2)
+    write(src / 'press01.csv', more[more['X_TIME'] > last], mode='a')
+    starts.clear()
+    run(src, dst)
+    assert len(starts) == 1 and starts[0] > 0   # only the tail from the last day was read
+    check(src, dst, full)
+
+    # Nothing new.
+    run(src, dst)
+    check(src, dst, full)
+
+    # Rewritten (backfill generation swap): other rows, smaller, larger or the same size.
+    write(src / 'press01.csv', pairs(rng, 0, 1))
+    write(src / 'B.csv', pairs(rng, 0, 4))
+    run(src, dst)
+    check(src, dst, full)
+    df = pd.read_csv(src / 'B.csv', encoding='cp932')
+    df['DURATION_MS'] = df['DURATION_MS'][::-1].to_numpy()
+    write(src / 'B.csv', df)
+    run(src, dst)
+    check(src, dst, full)
+
+def test_pairs_for_an_older_day(dirs):
+    src, dst, full = dirs
+    rng = np.random.default_rng(2)
+    write(src / 'A.csv', pairs(rng, 1, 2))
+    run(src, dst)
+    write(src / 'A.csv', pairs(rng, 0, 1, 20), mode='a')   # lifo / late files
+    run(src, dst)
+    check(src, dst, full)
+
+def test_other_thresholds_rebuild(dirs):
+    src, dst, full = dirs
+    write(src / 'A.csv', pairs(np.random.default_rng(3), 0, 2))
+    run(src, dst)
+    run(src, dst, '--upper', '0.9', '--lower', '0.1')
+    run(src, full, '--full', '--upper', '0.9', '--lower', '0.1')
+    assert (dst / 'preA.csv').read_bytes() == (full / 'preA.csv').read_bytes()
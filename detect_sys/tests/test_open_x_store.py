@@ -0,0 +1,63 @@
+## Standard library
+import numpy as np                                  #
+import pytest                                       #
+import open_x_store                                 # Under test.
+
+def test_round_trip(tmp_path):
+    p = tmp_path / 'out' / 'open_x.bin'
+    open_x = {
+        'ライン1/押釦': np.array([30, 10, 20], dtype=np.int64),     # queue order, not sorted
+        'B': np.array([-5, 2**62], dtype=np.int64),
+        'empty': np.empty(0, dtype=np.int64),
+    }
+    open_x_store.save(p, open_x, 12345)
+    got, clock = open_x_store.load(p)
+    assert clock == 12345
+    assert sorted(got) == ['B', 'ライン1/押釦']
+    for nm, t in got.items():
+        assert t.dtype == np.int64 and t.tolist() == open_x[nm].tolist()
+
+def test_empty_store(tmp_path):
+    p = tmp_path / 'open_x.bin'
+    open_x_store.save(p, {}, 0)
+    assert open_x_store.load(p) == ({}, 0)
+    assert open_x_store.load(tmp_path / 'missing.bin') == ({}, 0)
+
+def test_truncated_and_foreign_files(tmp_path):
+    p = tmp_path / 'open_x.bin'
+    open_x_store.save(p, {'A': np.arange(4, dtype=np.int64)}, 1)
+    p.write_bytes(p.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        open_x_store.load(p)
+    p.write_bytes(b'Name,TIME,IO\n')
+    with pytest.raises(ValueError):
+        open_x_store.load(p)
+
+'''
+    evict() against a per-entry loop: age first, then keep the newest max_count in queue order.
+'''
+def reference(open_x, clock, max_age_ns, max_count):
+    out, evicted = {}, []
+    for nm, t in open_x.items():
+        t = list(t)
+        if max_age_ns > 0:
+            evicted += [(nm, x, 'age') for x in t if x < clock - max_age_ns]
+            t = [x for x in t if x >= clock - max_age_ns]
+        if max_count > 0 and len(t) > max_count:
+            evicted += [(nm, x, 'count') for x in t[:len(t) - max_count]]
+            t = t[len(t) - max_count:]
+        out[nm] = t
+    return out, evicted
+
+@pytest.mark.parametrize('max_age_ns,max_count', [(0, 0), (50, 0), (0, 2), (50, 2), (1000, 1)])
+def test_evict(max_age_ns, max_count):
+    rng = np.random.default_rng(0)
+    open_x = {nm: rng.integers(0, 100, size=rng.integers(0, 6)).astype(np.int64) for nm in 'ABCDE'}
+    ref_open, ref_evicted = reference(open_x, 100, max_age_ns, max_count)
+    res = open_x_store.evict(open_x, 100, max_age_ns, max_count)
+    assert {nm: t.tolist() for nm, t in open_x.items()} == ref_open
+    if res is None:
+        assert ref_evicted == []
+    else:
+        names, times, reasons = res
+        assert list(zip(names, times.tolist(), reasons)) == ref_evicted
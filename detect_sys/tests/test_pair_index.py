@@ -0,0 +1,125 @@
+## Standard library
+import os                                           # For the CSV mtime.
+import numpy as np                                  #
+import pandas as pd                                 # Reference filter.
+import pytest                                       #
+import pair_index                                   # Under test.
+from timeutil import format_ns                      #
+
+'''
+    Range reads through the sparse index against filtering the whole CSV with pandas.
+'''
+BASE = pd.Timestamp('2026-03-05').value
+MS = 1_000_000
+
+def write(path, x_ns, mode='w'):
+    df = pd.DataFrame({'X_TIME': format_ns(x_ns), 'Y_TIME': format_ns(x_ns + 500 * MS), 'DURATION_MS': 500})
+    df.to_csv(path, mode=mode, index=False, header=mode == 'w', encoding='cp932')
+
+def reference(path, start, end):
+    df = pd.read_csv(path, encoding='cp932')
+    t = pd.to_datetime(df['X_TIME'])
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= t >= pd.Timestamp(start)
+    if end is not None:
+        keep &= t < pd.Timestamp(end)
+    return df[keep].reset_index(drop=True)
+
+def check(path, index_dir, start, end):
+    got = pair_index.read_range(path, start, end, index_dir=index_dir)
+    ref = reference(path, start, end)
+    assert got.astype(str).values.tolist() == ref.astype(str).values.tolist()
+    return got
+
+RANGES = [
+    (None, None), ('2026-03-05 06:00', '2026-03-05 07:30'), ('2026-03-06 23:59:59.999', None),
+    (None, '2026-03-05 00:00:00.001'), ('2026-03-05 12:00:00.250', '2026-03-05 12:00:00.251'),
+]
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(pair_index, 'BLOCK_ROWS', 64)
+
+@pytest.mark.parametrize('sort', [True, False])
+def test_ranges(tmp_path, sort):
+    rng = np.random.default_rng(0)
+    x = BASE + rng.integers(0, 2 * 86400 * 1000, size=5000) * MS
+    x = np.sort(x) if sort else x     # lifo and late files write X_TIME out of order
+    p = tmp_path / 'A.csv'
+    write(p, x)
+    for start, end in RANGES:
+        check(p, tmp_path / 'index', start, end)
+
+def test_sidecar_lives_in_index_dir(tmp_path):
+    out, idx = tmp_path / 'output', tmp_path / 'index'
+    out.mkdir()
+    write(out / 'A.csv', BASE + np.arange(10) * MS)
+    check(out / 'A.csv', idx, None, None)
+    assert os.listdir(out) == ['A.csv']
+    assert os.listdir(idx) == ['A.csv.idx']
+
+def test_without_index_dir(tmp_path):
+    write(tmp_path / 'A.csv', BASE + np.arange(100) * MS)
+    check(tmp_path / 'A.csv', None, '2026-03-05 00:00:00.010', '2026-03-05 00:00:00.050')
+    assert os.listdir(tmp_path) == ['A.csv']
+
+def test_appends_are_indexed(tmp_path):
+    rng = np.random.default_rng(1)
+    p, idx = tmp_path / 'A.csv', tmp_path / 'index'
+    write(p, np.sort(BASE + rng.integers(0, 3600 * 1000, size=1000) * MS))
+    check(p, idx, None, None)
+    for k in range(1, 4):
+        write(p, np.sort(BASE + k * 3600 * 10**9 + rng.integers(0, 3600 * 1000, size=300) * MS), mode='a')
+        for start, end in RANGES:
+            check(p, idx, start, end)
+
+def test_partial_last_line(tmp_path):
+    p, idx = tmp_path / 'A.csv', tmp_path / 'index'
+    write(p, BASE + np.arange(10) * MS)
+    with open(p, 'ab') as f:
+        f.write(b'2026-03-05 00:00:01.000,2026-03-05 00:')
+    assert len(pair_index.read_range(p, index_dir=idx)) == 10
+    with open(p, 'ab') as f:
+        f.write(b'00:01.500,500\n')
+    assert len(pair_index.read_range(p, index_dir=idx)) == 11
+
+def test_rewritten_csv_is_reindexed(tmp_path):
+    p, idx = tmp_path / 'A.csv', tmp_path / 'index'
+    x = BASE + np.arange(2000) * 1000 * MS
+    write(p, x)
+    check(p, idx, None, None)
+    # Same size, other rows (a generation swap), with a newer mtime.
+    st = os.stat(p)
+    write(p, x + 3600 * 10**9)
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert os.stat(p).st_size == st.st_size
+    check(p, idx, '2026-03-05 01:00', '2026-03-05 01:10')
+
+def test_shrunk_csv_is_reindexed(tmp_path):
+    p, idx = tmp_path / 'A.csv', tmp_path / 'index'
+    x = BASE + np.arange(2000) * 1000 * MS
+    write(p, x)
+    check(p, idx, None, None)
+    write(p, x[:300])
+    for start, end in RANGES:
+        check(p, idx, start, end)
+
+def test_empty_range(tmp_path):
+    write(tmp_path / 'A.csv', BASE + np.arange(10) * MS)
+    got = pair_index.read_range(tmp_path / 'A.csv', '2027-01-01', '2027-01-02', index_dir=tmp_path / 'index')
+    assert got.empty and list(got.columns) == ['X_TIME', 'Y_TIME', 'DURATION_MS']
+
+def test_query_and_build_all(tmp_path):
+    from engine import sanitize
+    out, idx = tmp_path / 'output', tmp_path / 'index'
+    out.mkdir()
+    names = ['ライン1/押釦', 'B']
+    for k, nm in enumerate(names):
+        write(out / f'{sanitize(nm)}.csv', BASE + (np.arange(50) + k) * 60 * 10**9)
+    (out / 'duration_q.csv').write_text('Name,q50\nB,1\n', encoding='cp932')
+    assert pair_index.build_all(out, idx) == 2
+    df = pair_index.query(out, names + ['missing'], '2026-03-05 00:10', '2026-03-05 00:20', index_dir=idx)
+    assert list(df.columns) == pair_index.COLUMNS
+    assert df['Name'].tolist() == ['B'] * 10 + ['ライン1/押釦'] * 10
+    assert df['X_TIME'].dtype == 'datetime64[ns]' and df['DURATION_MS'].tolist() == [500] * 20
@@ -0,0 +1,122 @@
+## Standard library
+import numpy as np                                  #
+import pandas as pd                                 # Reference frame.
+import pytest                                       #
+pytest.importorskip('pyarrow')
+import pair_store                                   # Under test.
+from pair_store import PairStore, read_pairs        #
+
+'''
+    PairStore written in flushes, compacted and reopened, against the pairs it was given.
+'''
+BASE = pd.Timestamp('2026-03-05').value
+MS = 1_000_000
+
+def flush(rng, n=50, days=2):
+    x = BASE + rng.integers(0, days * 86_400_000, size=n) * MS
+    dur = rng.integers(100, 5000, size=n)
+    return x, x + dur * MS, dur
+
+def frame(written):
+    df = pd.DataFrame([(nm, x, y, d) for nm, (xs, ys, ds) in written for x, y, d in zip(xs, ys, ds)],
+                      columns=['Name', 'X_TIME', 'Y_TIME', 'DURATION_MS'])
+    df['X_TIME'] = df['X_TIME'].astype('int64').values.view('datetime64[ns]')
+    df['Y_TIME'] = df['Y_TIME'].astype('int64').values.view('datetime64[ns]')
+    return df
+
+def check(root, written, names=None, start=None, end=None):
+    ref = frame(written)
+    if names is not None:
+        ref = ref[ref['Name'].isin(names)]
+    if start is not None:
+        ref = ref[ref['X_TIME'] >= pd.Timestamp(start)]
+    if end is not None:
+        ref = ref[ref['X_TIME'] < pd.Timestamp(end)]
+    got = read_pairs(root, names, start, end)
+    key = ['Name', 'X_TIME', 'Y_TIME', 'DURATION_MS']
+    ref = ref.sort_values(key, ignore_index=True)
+    assert got.sort_values(key, ignore_index=True).astype(str).values.tolist() == ref.astype(str).values.tolist()
+
+def write_flushes(store, rng, written, k, names=('ライン1/押釦', 'B')):
+    for _ in range(k):
+        for nm in names:
+            pairs = flush(rng)
+            store.write(nm, *pairs)
+            written.append((nm, pairs))
+
+def test_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    store, written = PairStore(tmp_path, compact_min_files=100), []
+    write_flushes(store, rng, written, 3)
+    check(tmp_path, written)
+    check(tmp_path, written, names=['B'])
+    check(tmp_path, written, start='2026-03-05 12:00', end='2026-03-06 06:00')
+    check(tmp_path, written, names=['ライン1/押釦'], start='2026-03-06')
+    assert read_pairs(tmp_path, ['missing']).empty
+
+def test_compaction(tmp_path):
+    rng = np.random.default_rng(1)
+    store, written = PairStore(tmp_path, compact_min_files=3), []
+    write_flushes(store, rng, written, 2)
+    assert store.compact() == 0
+    write_flushes(store, rng, written, 1)
+    assert store.compact() == 4                         # 2 names x 2 days
+    for part in tmp_path.glob('name=*/day=*'):
+        assert [p.name[0] for p in part.glob('*.parquet')] == ['c']
+    check(tmp_path, written)
+    write_flushes(store, rng, written, 1)
+    check(tmp_path, written)
+    assert store.compact_all(min_files=2) == 4
+    check(tmp_path, written)
+
+def test_interrupted_compaction_is_finished(tmp_path):
+    rng = np.random.default_rng(2)
+    store, written = PairStore(tmp_path, compact_min_files=2), []
+    write_flushes(store, rng, written, 2, names=['A'])
+    live = {part: sorted(part.glob('*.parquet')) for part in tmp_path.glob('name=*/day=*')}
+    store.compact()
+    for part, files in live.items():                    # crash after c<S> was written, before the removal
+        for p in files:
+            p.write_bytes(b'stale')
+    check(tmp_path, written)
+    store.compact(list(live))
+    assert all(len(list(part.glob('*.parquet'))) == 1 for part in live)
+    check(tmp_path, written)
+
+@pytest.mark.parametrize('step_back_ns', [0, 3600 * 10**9])
+def test_restart_and_clock_step_back(tmp_path, monkeypatch, step_back_ns):
+    rng = np.random.default_rng(3)
+    store, written = PairStore(tmp_path, compact_min_files=2), []
+    write_flushes(store, rng, written, 2)
+    store.compact()
+    top = max(pair_store._stamp(p) for p in tmp_path.rglob('*.parquet'))
+    now = pair_store.time.time_ns
+    monkeypatch.setattr(pair_store.time, 'time_ns', lambda: now() - step_back_ns)
+    store = PairStore(tmp_path, compact_min_files=2)    # a new process
+    mark = store.mark()
+    assert mark > top
+    write_flushes(store, rng, written, 1)
+    assert min(pair_store._stamp(p) for p in tmp_path.rglob('p*.parquet')) >= mark
+    check(tmp_path, written)
+    store.compact()
+    check(tmp_path, written)
+
+def test_two_writers(tmp_path, monkeypatch):
+    rng = np.random.default_rng(4)
+    a, b, written = PairStore(tmp_path, compact_min_files=2), PairStore(tmp_path, compact_min_files=2), []
+    write_flushes(a, rng, written, 2, names=['A'])
+    a.compact()
+    monkeypatch.setattr(pair_store.time, 'time_ns', lambda: 1)    # b's clock is far behind
+    write_flushes(b, rng, written, 1, names=['A'])
+    check(tmp_path, written)
+    b.compact()
+    check(tmp_path, written)
+
+def test_rollback(tmp_path):
+    rng = np.random.default_rng(5)
+    store, written = PairStore(tmp_path, compact_min_files=100), []
+    write_flushes(store, rng, written, 2)
+    since = store.mark()
+    write_flushes(store, rng, [], 2)                    # an uncommitted checkpoint
+    store.rollback(since)
+    check(tmp_path, written)
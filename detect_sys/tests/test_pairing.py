@@ -0,0 +1,76 @@
+## Standard library
+import numpy as np                                  #
+import pytest                                       #
+from pairing import pair_name, STRATEGIES, FIFO, LIFO, NEAREST  # Under test.
+
+'''
+    pair_name() against the event loop of main.py (sorted by time, X before Y at the same time),
+    with the queue pop of each strategy.
+'''
+def reference(open_x, x_times, y_times, strategy, dur_min=0, dur_max=0):
+    q = list(open_x)
+    events = sorted([(t, 0) for t in x_times] + [(t, 1) for t in y_times])
+    pairs = []
+    for t, io in events:
+        if io == 0:
+            q.append(t)
+            continue
+        if not q:
+            continue
+        if strategy == FIFO:
+            x = q.pop(0)
+        else:
+            x = q.pop()
+            if strategy == NEAREST:
+                q.clear()
+        dur = (t - x) // 1_000_000
+        if (dur_min and dur < dur_min) or (dur_max and dur > dur_max):
+            continue
+        pairs.append((x, t, dur))
+    return pairs, q
+
+def check(open_x, x_times, y_times, strategy, dur_min=0, dur_max=0):
+    xp, yp, dur, rem = pair_name(open_x, x_times, y_times, strategy, dur_min, dur_max)
+    ref_pairs, ref_rem = reference(open_x, x_times, y_times, strategy, dur_min, dur_max)
+    assert list(zip(xp.tolist(), yp.tolist(), dur.tolist())) == ref_pairs
+    assert rem.tolist() == ref_rem
+    assert rem.dtype == np.int64
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_event_loop(strategy, seed):
+    rng = np.random.default_rng(seed)
+    ms = 1_000_000
+    # Few distinct times, so X and Y often share a timestamp.
+    open_x = np.sort(rng.integers(0, 20, size=rng.integers(0, 4))) * ms
+    x_times = np.sort(rng.integers(20, 60, size=rng.integers(0, 15))) * ms
+    y_times = np.sort(rng.integers(20, 60, size=rng.integers(0, 15))) * ms
+    check(open_x, x_times, y_times, strategy)
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+def test_duration_filter_consumes_x(strategy):
+    ms = 1_000_000
+    check([0], np.array([10, 20]) * ms, np.array([15, 40, 500]) * ms, strategy, dur_min=10, dur_max=100)
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+def test_same_time_x_before_y(strategy):
+    check([], [5, 7], [5, 7], strategy)
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+def test_empty_inputs(strategy):
+    check([], [], [], strategy)
+    check([1, 2], [], [], strategy)
+    check([], [], [3, 4], strategy)
+    check([1], [2], [], strategy)
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+def test_queue_emptied(strategy):
+    # Every X is paired; the remaining queue is an empty int64 array.
+    check([1], [2, 3], [4, 5, 6, 7], strategy)
+
+def test_lifo_unsorted_open_x():
+    check([30, 10, 20], [40], [50, 60, 70], LIFO)
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        pair_name([], [1], [2], 'random')
@@ -0,0 +1,49 @@
+## Standard library
+import numpy as np                                  #
+import pytest                                       #
+from conftest import SIGNALS, HEADER_ROW, ENCODING, random_rows  # Test data.
+from edge import detect_edges                       # Serial reference.
+from signal_reader import read_signal_csv           #
+from parallel import _context, parse_edges, stitch, iter_parsed  # Under test.
+
+'''
+    Worker results stitched in file order against detect_edges() run serially with the true carry.
+'''
+def serial(paths, debounce_n):
+    carry = np.zeros(len(SIGNALS), dtype=np.uint8)
+    out = []
+    for p in paths:
+        sig = read_signal_csv(p, SIGNALS, ENCODING, HEADER_ROW)
+        if sig is None:
+            out.append(None)
+            continue
+        ts, mat, present, _ = sig
+        rising, _, carry = detect_edges(mat, carry, debounce_n, present)
+        out.append((ts, rising))
+    return out
+
+def files(write_signal_csv, seed):
+    rng = np.random.default_rng(seed)
+    paths = []
+    for k, n in enumerate((40, 1, 2, 60, 5)):
+        paths.append(write_signal_csv(f'{k}.csv', random_rows(rng, n, t0=f'2026-03-05 08:{k:02d}:00')))
+    return paths
+
+def check(results, paths, debounce_n):
+    carry = np.zeros(len(SIGNALS), dtype=np.uint8)
+    for res, ref in zip(results, serial(paths, debounce_n)):
+        carry = stitch(res, carry, debounce_n)
+        assert np.array_equal(res['ts'], ref[0])
+        assert np.array_equal(res['rising'], ref[1])
+
+@pytest.mark.parametrize('debounce_n', [1, 2, 3])
+@pytest.mark.parametrize('fast_reader', [True, False])
+def test_stitch_matches_serial(write_signal_csv, debounce_n, fast_reader):
+    paths = files(write_signal_csv, debounce_n)
+    ctx = _context(SIGNALS, ENCODING, HEADER_ROW, debounce_n, fast_reader)
+    check([parse_edges(p, ctx) for p in paths], paths, debounce_n)
+
+def test_process_pool_keeps_order(write_signal_csv):
+    paths = files(write_signal_csv, 7)
+    results = list(iter_parsed(paths, 2, SIGNALS, ENCODING, HEADER_ROW, 3, window=2))
+    check(results, paths, 3)
@@ -0,0 +1,67 @@
+## Standard library
+import pytest                                       #
+from prefetch import Prefetcher                     # Under test.
+
+'''
+    Prefetcher: order, skipped files, and the byte reservations that bound the read-ahead.
+'''
+def files(tmp_path, sizes):
+    out = []
+    for i, n in enumerate(sizes):
+        p = tmp_path / f'{i:03d}.csv'
+        p.write_bytes(bytes([i % 256]) * n)
+        out.append(p)
+    return out
+
+def watch(p):
+    held = []       # reservations seen by each read as it starts
+    fetch = p._fetch
+    def spy(path):
+        held.append(p._held)
+        return fetch(path)
+    p._fetch = spy
+    return held
+
+@pytest.mark.parametrize('threads', [1, 4])
+def test_order_and_bytes(tmp_path, threads):
+    paths = files(tmp_path, [100] * 20)
+    p = Prefetcher(paths, threads=threads, max_files=8, max_bytes=250)
+    held = watch(p)
+    after = []
+    for i, (path, data) in enumerate(p):
+        assert path == paths[i] and data == path.read_bytes()
+        after.append(p._held)
+    assert p.files == 20 and p.bytes == 2000 and p._held == 0
+    assert max(held) <= 250 and max(after) <= 250 - 100       # two reads ahead at most
+
+def test_max_files(tmp_path):
+    p = Prefetcher(files(tmp_path, [10] * 10), max_files=3, max_bytes=10**6)
+    held = watch(p)
+    for _ in p:
+        assert p._held <= 2 * 10
+    assert max(held) <= 3 * 10
+
+def test_large_file_is_read_alone(tmp_path):
+    paths = files(tmp_path, [100, 1000, 100, 100])
+    p = Prefetcher(paths, max_bytes=250)
+    held = watch(p)
+    got = [(path, len(data)) for path, data in p]
+    assert got == [(paths[0], 100), (paths[1], 1000), (paths[2], 100), (paths[3], 100)]
+    assert max(held) == 1000                            # only when nothing else was reserved
+    assert all(h <= 250 for h in held if h != 1000)
+
+def test_skipped_files_reserve_nothing(tmp_path):
+    paths = files(tmp_path, [100, 5000, 100, 5000, 100])
+    p = Prefetcher(paths, max_bytes=250, skip=lambda path: path.stat().st_size > 1000)
+    held = watch(p)
+    got = [(path, data is None) for path, data in p]
+    assert got == [(path, path.stat().st_size > 1000) for path in paths]
+    assert p.files == 3 and max(held) <= 250
+
+def test_missing_file_raises_in_order(tmp_path):
+    paths = files(tmp_path, [10, 10])
+    paths.insert(1, tmp_path / 'gone.csv')
+    it = iter(Prefetcher(paths))
+    assert next(it)[0] == paths[0]
+    with pytest.raises(FileNotFoundError):
+        next(it)
@@ -0,0 +1,84 @@
+## Standard library
+import numpy as np                                  #
+import pytest                                       #
+from conftest import SIGNALS, HEADER_ROW, ENCODING, random_rows  # Test data.
+from signal_reader import SignalReader, read_signal_csv  # Reference readers.
+from signal_archive import ArchiveReader, convert_tree, encode, header_key  # Under test.
+from timeutil import NAT_NS                         #
+
+'''
+    The .sga archive replayed against the CSV it was made from.
+'''
+def same(got, ref):
+    assert np.array_equal(got[0], ref[0]) and np.array_equal(got[1], ref[1])
+    assert np.array_equal(got[2], ref[2])
+    assert {k: str(v) for k, v in got[3].iloc[0].items()} == {k: str(v) for k, v in ref[3].iloc[0].items()}
+
+@pytest.fixture
+def tree(tmp_path, write_signal_csv):
+    rng = np.random.default_rng(0)
+    write_signal_csv('src/D1/a.csv', random_rows(rng, 200))
+    write_signal_csv('src/D1/b.csv', random_rows(rng, 3, t0='2026-03-05 09:00:00', step_ms=1000), newline='\n')
+    write_signal_csv('src/D2/c.csv', [('2026/03/05 10:00:00', [1, 0, 1, 0]), ('2026/03/05 10:00:01', [0, 0, 1, 1])])
+    return tmp_path / 'src', tmp_path / 'sga'
+
+def test_round_trip(tree):
+    src, dst = tree
+    st = convert_tree(src, dst, workers=1)
+    assert (st['files'], st['converted'], st['kept_csv']) == (3, 3, 0)
+    csv_reader = SignalReader(SIGNALS, ENCODING, HEADER_ROW)
+    for f in src.rglob('*.csv'):
+        sga = dst / f.relative_to(src).with_suffix('.sga')
+        assert sga.stat().st_mtime_ns == f.stat().st_mtime_ns
+        ref = csv_reader.read(f)
+        same(ArchiveReader(SIGNALS).read(sga), ref)
+        same(read_signal_csv(sga, SIGNALS, ENCODING, HEADER_ROW), ref)
+        same(ArchiveReader(SIGNALS).read(sga, sga.read_bytes()), ref)
+
+def test_other_signal_lists(tree):
+    src, dst = tree
+    convert_tree(src, dst, workers=1)
+    signals = [SIGNALS[2], '無い信号', SIGNALS[0]]
+    f = src / 'D1' / 'a.csv'
+    same(ArchiveReader(signals).read(dst / 'D1' / 'a.sga'), read_signal_csv(f, signals, ENCODING, HEADER_ROW))
+
+@pytest.mark.parametrize('chunk_rows', [1, 16, 500])
+def test_chunks(tree, chunk_rows):
+    src, dst = tree
+    convert_tree(src, dst, workers=1)
+    reader = ArchiveReader(SIGNALS)
+    whole = reader.read(dst / 'D1' / 'a.sga')
+    chunks = list(reader.iter_chunks(dst / 'D1' / 'a.sga', chunk_rows))
+    assert np.array_equal(np.concatenate([c[0] for c in chunks]), whole[0])
+    assert np.array_equal(np.concatenate([c[1] for c in chunks]), whole[1])
+    assert str(chunks[-1][3]['TIME'].iloc[0]) == str(whole[3]['TIME'].iloc[0])
+
+def test_unpackable_files_are_copied(tmp_path, tree, write_signal_csv):
+    src, dst = tree
+    write_signal_csv('src/D2/multi.csv', [('2026/03/05 10:00:00.000', [2, 0, 1, 0])])
+    write_signal_csv('src/D2/notime.csv', [('2026/03/05 10:00:00.000', [1, 0, 1, 0]), ('', [0, 1, 1, 0])])
+    st = convert_tree(src, dst, workers=1)
+    assert (st['converted'], st['kept_csv']) == (3, 2)
+    for name in ('multi', 'notime'):
+        kept = dst / 'D2' / f'{name}.csv'
+        assert kept.read_bytes() == (src / 'D2' / f'{name}.csv').read_bytes()
+        assert kept.stat().st_mtime_ns == (src / 'D2' / f'{name}.csv').stat().st_mtime_ns
+        assert not (dst / 'D2' / f'{name}.sga').exists()
+    st = convert_tree(src, dst, workers=1)
+    assert (st['skipped'], st['converted'], st['kept_csv']) == (5, 0, 0)
+
+def test_refuses_dst_equal_to_src(tree):
+    src, _ = tree
+    with pytest.raises(ValueError):
+        convert_tree(src, src, workers=1)
+
+def test_encode_rejects_nat():
+    ts = np.array([0, NAT_NS], dtype=np.int64)
+    with pytest.raises(ValueError):
+        encode(ts, np.zeros((2, 3), dtype=np.uint8), header_key(['a', 'b', 'c']), '')
+
+def test_encode_wide_deltas():
+    # A gap of years needs 64-bit deltas even in ms units.
+    ts = np.array([0, 10**18], dtype=np.int64)
+    blob = encode(ts, np.zeros((2, 1), dtype=np.uint8), header_key(['a']), '')
+    assert b'"<i8"' in blob
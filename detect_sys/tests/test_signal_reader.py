@@ -0,0 +1,108 @@
+## Standard library
+import numpy as np                                  #
+import pytest                                       #
+from conftest import SIGNALS, HEADER_ROW, ENCODING, random_rows  # Test data.
+from signal_reader import SignalReader, read_signal_csv, iter_signal_csv  # Under test.
+
+'''
+    SignalReader (fixed-width fast path with pandas fallback) against read_signal_csv().
+'''
+def check(path, expect_fast=None):
+    reader = SignalReader(SIGNALS, ENCODING, HEADER_ROW)
+    got = reader.read(path)
+    ref = read_signal_csv(path, SIGNALS, ENCODING, HEADER_ROW)
+    if ref is None:
+        assert got is None
+        return reader
+    ts, mat, present, last_row = got
+    assert np.array_equal(ts, ref[0])
+    assert np.array_equal(mat, ref[1])
+    assert np.array_equal(present, ref[2])
+    # The snapshot row is used by column name, so only names and values must agree.
+    assert {k: str(v) for k, v in last_row.iloc[0].items()} == {k: str(v) for k, v in ref[3].iloc[0].items()}
+    if expect_fast is not None:
+        assert (reader.fallbacks == 0) == expect_fast
+    return reader
+
+@pytest.mark.parametrize('newline', ['\r\n', '\n'])
+def test_fast_path(write_signal_csv, newline):
+    rows = random_rows(np.random.default_rng(0), 300)
+    check(write_signal_csv('a.csv', rows, newline=newline), expect_fast=True)
+
+def test_missing_ms(write_signal_csv):
+    rows = [('2026/03/05 08:00:00', [0, 1, 0, 1]), ('2026/03/05 08:00:01', [1, 1, 0, 0])]
+    check(write_signal_csv('a.csv', rows), expect_fast=True)
+
+def test_mixed_time_widths(write_signal_csv):
+    rows = [('2026/03/05 08:00:00', [0, 1, 0, 1]), ('2026/03/05 08:00:00.5', [1, 1, 0, 0])]
+    check(write_signal_csv('a.csv', rows))
+
+def test_empty_cells_fall_back(write_signal_csv):
+    rows = [('2026/03/05 08:00:00.000', [0, '', 1, 1]), ('2026/03/05 08:00:00.250', [1, 1, '', 0])]
+    check(write_signal_csv('a.csv', rows), expect_fast=False)
+
+def test_multi_digit_values_fall_back(write_signal_csv):
+    rows = [('2026/03/05 08:00:00.000', [0, 10, 1, 1]), ('2026/03/05 08:00:00.250', [1, 1, 0, 0])]
+    check(write_signal_csv('a.csv', rows), expect_fast=False)
+
+def test_empty_time(write_signal_csv):
+    rows = [('2026/03/05 08:00:00.000', [0, 1, 1, 1]), ('', [1, 1, 0, 0])]
+    check(write_signal_csv('a.csv', rows))
+
+def test_invalid_time_is_nat(write_signal_csv):
+    rows = [('2026/02/30 08:00:00.000', [0, 1, 1, 1]), ('2026/03/05 08:00:00.250', [1, 1, 0, 0])]
+    check(write_signal_csv('a.csv', rows))
+
+def test_missing_and_extra_columns(write_signal_csv):
+    names = ['他', SIGNALS[2], SIGNALS[0]]
+    rows = [('2026/03/05 08:00:00.000', [1, 0, 1]), ('2026/03/05 08:00:00.250', [0, 1, 1])]
+    check(write_signal_csv('a.csv', rows, names), expect_fast=True)
+
+def test_no_rows(write_signal_csv):
+    assert SignalReader(SIGNALS, ENCODING, HEADER_ROW).read(write_signal_csv('a.csv', [])) is None
+
+def test_header_cache(write_signal_csv):
+    rng = np.random.default_rng(1)
+    reader = SignalReader(SIGNALS, ENCODING, HEADER_ROW)
+    for k in range(3):
+        reader.read(write_signal_csv(f'{k}.csv', random_rows(rng, 10)))
+    assert len(reader._cache) == 1
+
+def test_prefetched_bytes(write_signal_csv):
+    p = write_signal_csv('a.csv', random_rows(np.random.default_rng(2), 20))
+    reader = SignalReader(SIGNALS, ENCODING, HEADER_ROW)
+    a, b = reader.read(p), reader.read(p, p.read_bytes())
+    assert np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])
+
+'''
+    Chunked reads: the blocks put back together equal the whole-file read.
+'''
+def join_chunks(chunks):
+    chunks = list(chunks)
+    return (np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks]),
+            chunks[-1][2], chunks[-1][3])
+
+@pytest.mark.parametrize('newline', ['\r\n', '\n'])
+@pytest.mark.parametrize('chunk_rows', [1, 7, 64, 1000])
+def test_chunks_match_whole_file(write_signal_csv, newline, chunk_rows):
+    rows = random_rows(np.random.default_rng(3), 150)
+    p = write_signal_csv('a.csv', rows, newline=newline)
+    whole = read_signal_csv(p, SIGNALS, ENCODING, HEADER_ROW)
+    reader = SignalReader(SIGNALS, ENCODING, HEADER_ROW)
+    for chunks in (reader.iter_chunks(p, chunk_rows), iter_signal_csv(p, SIGNALS, ENCODING, HEADER_ROW, chunk_rows)):
+        ts, mat, present, last_row = join_chunks(chunks)
+        assert np.array_equal(ts, whole[0]) and np.array_equal(mat, whole[1])
+        assert np.array_equal(present, whole[2])
+        assert str(last_row['TIME'].iloc[0]) == str(whole[3]['TIME'].iloc[0])
+    assert reader.fallbacks == 0
+
+@pytest.mark.parametrize('chunk_rows', [5, 40])
+def test_chunks_fall_back_mid_file(write_signal_csv, chunk_rows):
+    rows = random_rows(np.random.default_rng(4), 100)
+    rows[57] = (rows[57][0], [1, '', 0, 1])
+    p = write_signal_csv('a.csv', rows)
+    whole = read_signal_csv(p, SIGNALS, ENCODING, HEADER_ROW)
+    reader = SignalReader(SIGNALS, ENCODING, HEADER_ROW)
+    ts, mat, _, _ = join_chunks(reader.iter_chunks(p, chunk_rows))
+    assert np.array_equal(ts, whole[0]) and np.array_equal(mat, whole[1])
+    assert reader.fallbacks == 1
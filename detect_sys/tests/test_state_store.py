@@ -0,0 +1,101 @@
+## Standard library
+import json                                         # For the legacy state.json.
+import sqlite3                                      # For looking into the databases.
+import pytest                                       #
+from state_store import StateStore, day_of          # Under test.
+
+'''
+    StateStore: day partitions, the archive database and the legacy import.
+'''
+RELS = [
+    'INPUT_M20260301/a.csv', 'INPUT_M20260301/sub/b.csv', 'INPUT_M20260302/c.csv',
+    'INPUT_M20260303/d.csv', 'loose.csv', 'other/e.csv',
+]
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(conn.execute('SELECT day, rel FROM processed').fetchall())
+    finally:
+        conn.close()
+
+def test_day_of():
+    assert day_of('INPUT_M20260301/x/20260302.csv') == '20260301'
+    assert day_of('loose.csv') == '' and day_of('1234567/a.csv') == ''
+
+def test_lookups_load_one_partition(tmp_path):
+    st = StateStore(tmp_path / 'state.db')
+    st.update(RELS)
+    st.close()
+    st = StateStore(tmp_path / 'state.db')
+    assert 'INPUT_M20260302/c.csv' in st and 'INPUT_M20260302/x.csv' not in st
+    assert list(st._days) == ['20260302']
+    assert all(r in st for r in RELS)
+    assert st.days() == {'20260301', '20260302', '20260303', ''}
+    assert st.processed_in('20260301') == {'INPUT_M20260301/a.csv', 'INPUT_M20260301/sub/b.csv'}
+    assert st.processed_in('') == {'loose.csv', 'other/e.csv'}
+
+def test_update_is_idempotent_and_keeps_the_cache(tmp_path):
+    st = StateStore(tmp_path / 'state.db')
+    assert 'INPUT_M20260301/a.csv' not in st            # partition cached empty
+    st.update(RELS[:2])
+    st.update(RELS[:2])
+    assert 'INPUT_M20260301/a.csv' in st
+    assert len(rows(tmp_path / 'state.db')) == 2
+
+def test_failed_hook_records_nothing(tmp_path):
+    st = StateStore(tmp_path / 'state.db')
+    def hook(conn):
+        raise RuntimeError('disk full')
+    with pytest.raises(RuntimeError):
+        st.update(RELS, hook)
+    assert rows(tmp_path / 'state.db') == []
+    assert not any(r in st for r in RELS)
+
+def test_archive(tmp_path):
+    st = StateStore(tmp_path / 'state.db')
+    st.update(RELS)
+    st.archive('20260303')
+    assert rows(tmp_path / 'state.db') == [('', 'loose.csv'), ('', 'other/e.csv'), ('20260303', 'INPUT_M20260303/d.csv')]
+    assert [r[1] for r in rows(tmp_path / 'state_archive.db')] == RELS[:3]
+    assert all(r in st for r in RELS) and st.days() == {'20260301', '20260302', '20260303', ''}
+    assert st.count_under('INPUT_M20260301') == 2 and st.count_under('other') == 1
+    st.close()
+
+    # Reopened: archived days are still found; a late file of an archived day goes to state.db.
+    st = StateStore(tmp_path / 'state.db')
+    assert all(r in st for r in RELS)
+    st.update(['INPUT_M20260301/late.csv'])
+    assert st.processed_in('20260301') == {'INPUT_M20260301/a.csv', 'INPUT_M20260301/sub/b.csv', 'INPUT_M20260301/late.csv'}
+    assert st.count_under('INPUT_M20260301') == 3
+    st.archive('20260303')                              # archive again: counts add up, nothing lost
+    conn = sqlite3.connect(tmp_path / 'state.db')
+    assert dict(conn.execute('SELECT day, count FROM archived_days')) == {'20260301': 3, '20260302': 1}
+    conn.close()
+    st.close()
+
+def test_retention_on_open(tmp_path):
+    st = StateStore(tmp_path / 'state.db')
+    st.update(['INPUT_M20000101/old.csv', 'INPUT_M29991231/new.csv'])
+    st.close()
+    st = StateStore(tmp_path / 'state.db', retention_days=30)
+    assert [r[1] for r in rows(tmp_path / 'state.db')] == ['INPUT_M29991231/new.csv']
+    assert 'INPUT_M20000101/old.csv' in st
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / 'state.json'
+    legacy.write_text(json.dumps({'processed_paths': RELS}), encoding='utf-8')
+    st = StateStore(tmp_path / 'state.db', legacy)
+    assert all(r in st for r in RELS)
+    assert not legacy.exists() and (tmp_path / 'state.json.migrated').exists()
+    st.close()
+    legacy.write_text('{broken', encoding='utf-8')
+    st = StateStore(tmp_path / 'state.db', legacy)      # unreadable: kept, nothing imported
+    assert legacy.exists() and len(rows(tmp_path / 'state.db')) == len(RELS)
+
+def test_store_id(tmp_path):
+    a = StateStore(tmp_path / 'state.db')
+    a_id = a.store_id
+    a.close()
+    assert StateStore(tmp_path / 'state.db').store_id == a_id
+    assert StateStore(tmp_path / 'other.db').store_id != a_id
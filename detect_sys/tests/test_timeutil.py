@@ -0,0 +1,86 @@
+## Standard library
+import numpy as np                                  #
+import pandas as pd                                 # Reference parser.
+import pytest                                       #
+from timeutil import NAT_NS, parse_time_ns, parse_time_bytes, format_ns  # Under test.
+
+'''
+    parse_time_ns() and format_ns() against pd.to_datetime() (each value parsed on its own) and strftime().
+'''
+def reference(values):
+    t = pd.to_datetime(pd.Series(values), format='mixed', errors='coerce')
+    t = t.where((t >= pd.Timestamp.min) & (t <= pd.Timestamp.max))  # pandas keeps other units.
+    return t.astype('datetime64[ns]').to_numpy().view(np.int64)
+
+def as_bytes(values):
+    b = np.asarray(values, dtype='S')
+    return b.view(np.uint8).reshape(len(b), -1)
+
+@pytest.mark.parametrize('values', [
+    ['2026/03/05 08:00:00.000', '2026/03/05 08:00:00.250', '2026/12/31 23:59:59.999'],
+    ['2026-03-05 08:00:00.123', '2026-03-05 08:00:01.000'],
+    ['2026/03/05 08:00:00', '2026/03/05 08:00:01'],
+    ['2026/03/05 08:00:00.5', '2026/03/05 08:00:01.7'],
+    ['2026/03/05 08:00:00.123456', '2026/03/05 08:00:01.000001'],
+    ['2026/03/05 08:00:00.123456789', '2024/02/29 00:00:00.000000001'],
+    ['2026/03/05 08:00:00.000', '2026/03/05 08:00:00'],
+    ['2026/03/05 08:00:00.000', ''],
+    ['2026/03/05 08:00:00.000', 'garbage'],
+    ['1970/01/01 00:00:00.000', '1969/12/31 23:59:59.999'],
+])
+def test_matches_pandas(values):
+    assert np.array_equal(parse_time_ns(values), reference(values))
+
+@pytest.mark.parametrize('bad', [
+    '2026/13/01 00:00:00.000', '2026/00/10 00:00:00.000', '2026/04/31 00:00:00.000',
+    '2026/02/29 00:00:00.000', '1900/02/29 00:00:00.000', '2026/01/00 00:00:00.000',
+    '2026/01/01 24:00:00.000', '2026/01/01 23:60:00.000',
+    '1600/01/01 00:00:00.000', '2300/01/01 00:00:00.000',
+])
+def test_out_of_range_fields_are_nat(bad):
+    values = ['2026/01/01 00:00:00.000', bad]
+    assert parse_time_bytes(as_bytes(values)) is None
+    got = parse_time_ns(values)
+    assert got[1] == NAT_NS
+    assert np.array_equal(got, reference(values))
+
+def test_leap_second_left_to_pandas():
+    values = ['2026/01/01 00:00:00.000', '2026/01/01 23:59:60.000']
+    assert parse_time_bytes(as_bytes(values)) is None
+    assert parse_time_ns(values)[1] == pd.Timestamp('2026-01-02').value   # pandas rolls it into the next minute
+
+def test_leap_days():
+    values = ['2024/02/29 12:00:00.000', '2000/02/29 12:00:00.000']
+    assert np.array_equal(parse_time_bytes(as_bytes(values)), reference(values))
+
+def test_not_the_format():
+    assert parse_time_bytes(as_bytes(['2026/03/05T08:00:00.000'])) is None
+    assert parse_time_bytes(as_bytes(['2026/03/05 08:00:00,000'])) is None
+    assert parse_time_bytes(as_bytes(['2026/03/05 08:00'])) is None
+
+def test_fallback_uses_fixed_formats():
+    values = ['2026/03/05 08:00:00', ' 2026-03-05 08:00:00.5', '05/03/2026 08:00:00', '2026/03/05']
+    got = parse_time_ns(values)
+    assert got[0] == pd.Timestamp('2026-03-05 08:00:00').value and got[1] == got[0] + 500_000_000
+    assert got[2] == NAT_NS and got[3] == NAT_NS          # no day-first or date-only guess
+
+def test_datetime_input():
+    t = pd.Series(pd.to_datetime(['2026-03-05 08:00:00.250', None]))
+    assert np.array_equal(parse_time_ns(t), reference(t))
+    t = pd.Series(np.array(['2026-03-05T08:00', '1500-01-01'], dtype='datetime64[s]'))
+    assert parse_time_ns(t)[1] == NAT_NS
+
+def test_empty():
+    assert parse_time_ns([]).dtype == np.int64 and len(parse_time_ns([])) == 0
+    assert len(format_ns(np.empty(0, dtype=np.int64))) == 0
+
+def test_format_round_trip():
+    rng = np.random.default_rng(0)
+    ns = pd.Timestamp('2026-03-05').value + rng.integers(0, 10**15, size=1000) // 1_000_000 * 1_000_000
+    s = format_ns(ns)
+    assert list(s) == [pd.Timestamp(v).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] for v in ns]
+    assert np.array_equal(parse_time_ns(s), ns)
+
+def test_format_truncates_to_ms_and_blanks_nat():
+    ns = np.array([pd.Timestamp('2026-03-05 08:00:00.123999').value, NAT_NS], dtype=np.int64)
+    assert list(format_ns(ns)) == ['2026-03-05 08:00:00.123', '']
@@ -0,0 +1,77 @@
+## Standard library
+import os                                           # For folder mtimes.
+from pathlib import Path                            # For filesystem path and operations.
+import pytest                                       #
+from watcher import DirWatcher                      # Under test.
+
+'''
+    DirWatcher in polling mode on a day-folder tree (INPUT_MYYYYMMDD sorts by date).
+'''
+def touch(path, text='TIME\n'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+def bump(folder, sec=10):
+    st = os.stat(folder)
+    os.utime(folder, ns=(st.st_atime_ns, st.st_mtime_ns + sec * 10**9))
+
+@pytest.fixture
+def tree(tmp_path):
+    touch(tmp_path / 'INPUT_M20260303' / 'a.csv')
+    touch(tmp_path / 'INPUT_M20260304' / 'b.csv')
+    touch(tmp_path / 'INPUT_M20260305' / 'c.csv')
+    return tmp_path
+
+def start(base, days=2):
+    return DirWatcher(base, '*.csv', interval=0, days=days, use_notify=False).start()
+
+def test_existing_files_are_not_reported(tree):
+    w = start(tree)
+    assert w.wait(0) == []
+
+def test_new_and_nested_files(tree):
+    w = start(tree)
+    new = touch(tree / 'INPUT_M20260305' / 'd.csv')
+    nested = touch(tree / 'INPUT_M20260305' / 'line2' / 'e.csv')
+    touch(tree / 'INPUT_M20260305' / 'skip.txt')
+    top = touch(tree / 'f.csv')
+    assert sorted(w.wait(0)) == sorted([new, nested, top])
+    assert w.wait(0) == []
+
+def test_new_day_folder(tree):
+    w = start(tree)
+    f = touch(tree / 'INPUT_M20260306' / 'g.csv')
+    assert w.wait(0) == [f]
+
+def test_modified_files_are_not_reported_again(tree):
+    w = start(tree)
+    f = touch(tree / 'INPUT_M20260305' / 'd.csv')
+    assert w.wait(0) == [f]
+    f.write_text('TIME\n2026/03/05 08:00:00,1\n')      # still being written
+    bump(f.parent)
+    assert w.wait(0) == []
+
+def test_older_folder_listed_when_its_mtime_changes(tree):
+    w = start(tree)
+    f = touch(tree / 'INPUT_M20260304' / 'late.csv')
+    bump(f.parent)
+    assert w.wait(0) == [f]
+    assert w.wait(0) == []
+
+def test_deleted_files_are_forgotten(tree):
+    w = start(tree)
+    (tree / 'INPUT_M20260305' / 'c.csv').unlink()
+    assert w.wait(0) == []
+    assert str(tree / 'INPUT_M20260305' / 'c.csv') not in w._seen[str(tree / 'INPUT_M20260305')]
+
+def test_memory_is_bounded_by_the_window(tree):
+    w = start(tree)
+    for k in range(6, 16):
+        touch(tree / f'INPUT_M202603{k:02d}' / 'x.csv')
+        assert len(w.wait(0)) == 1
+        window = {str(tree)} | {str(tree / f'INPUT_M202603{j:02d}') for j in (k - 1, k)}
+        assert set(w._seen) == window and set(w._dir_mtime) == window
+    assert sum(len(s) for s in w._seen.values()) == 2
+    assert w._folder(tree / 'INPUT_M20260315' / 'a' / 'b.csv') == str(tree / 'INPUT_M20260315')
+    assert w._folder(tree / 'top.csv') == str(tree)
@@ -0,0 +1,121 @@
+## Standard library
+import numpy as np                                  #
+import pandas as pd                                 # For the fallback parser.
+
+'''
+    Integer time helpers.
+    Every time inside detect_sys is int64 epoch nanoseconds (naive local time, as written by
+    the equipment). Strings are parsed once when a file is read and formatted once when
+    results are written.
+'''
+NAT_NS = np.iinfo(np.int64).min
+NS_PER_MS = 1_000_000
+
+'''
+    Fixed-format TIME parser on raw bytes.
+    arr:uint8 matrix (rows, width) holding "YYYY/MM/DD HH:MM:SS[.fff...]" (separators '/' or '-').
+    Return int64 epoch nanoseconds, or None if the bytes do not follow the format or a field is
+    out of range (bad month/day/hour/minute/second, or a year outside datetime64[ns]); the caller
+    then falls back to pandas, which turns impossible dates into NaT.
+'''
+def parse_time_bytes(arr):
+    n, w = arr.shape
+    if w < 19 or (w > 19 and (w == 20 or arr[0, 19] != ord('.'))):
+        return None
+    sep = arr[:, [4, 7, 10, 13, 16]]
+    if not (np.isin(sep[:, :2], (ord('/'), ord('-'))).all()
+            and (sep[:, 2] == ord(' ')).all() and (sep[:, 3:] == ord(':')).all()):
+        return None
+    digit_pos = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18] + list(range(20, w))
+    d = arr[:, digit_pos].astype(np.int64) - ord('0')
+    if d.size and (d.min() < 0 or d.max() > 9):
+        return None
+    if w > 19 and (arr[:, 19] != ord('.')).any():
+        return None
+
+    def num(a, b):
+        v = np.zeros(n, dtype=np.int64)
+        for k in range(a, b):
+            v = v * 10 + d[:, k]
+        return v
+
+    y, mo, dd = num(0, 4), num(4, 6), num(6, 8)
+    hh, mi, ss = num(8, 10), num(10, 12), num(12, 14)
+    leap = (y % 4 == 0) & ((y % 100 != 0) | (y % 400 == 0))
+    mdays = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+    if n and ((y < 1678) | (y > 2261) | (mo < 1) | (mo > 12) | (dd < 1)
+              | (dd > mdays[np.clip(mo, 0, 12)] + (leap & (mo == 2))) | (hh > 23) | (mi > 59) | (ss > 59)).any():
+        return None
+    frac_digits = w - 20 if w > 19 else 0
+    frac = num(14, 14 + frac_digits)
+    if frac_digits <= 9:
+        frac_ns = frac * 10 ** (9 - frac_digits)
+    else:
+        frac_ns = frac // 10 ** (frac_digits - 9)
+
+    # Days since 1970-01-01 (proleptic Gregorian, H. Hinnant's days_from_civil).
+    yy = y - (mo <= 2)
+    era = np.floor_divide(yy, 400)
+    yoe = yy - era * 400
+    doy = (153 * (mo + np.where(mo > 2, -3, 9)) + 2) // 5 + dd - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+    return ((days * 24 + hh) * 60 + mi) * 60 * 1_000_000_000 + ss * 1_000_000_000 + frac_ns
+
+'''
+    datetime Series of any unit to int64 epoch nanoseconds. Times outside datetime64[ns]
+    (years before 1677 or after 2262) become NAT_NS instead of raising.
+'''
+def _ns_values(t):
+    t = t.where((t >= pd.Timestamp.min) & (t <= pd.Timestamp.max))
+    return t.astype('datetime64[ns]').to_numpy().view(np.int64)
+
+'''
+    Formats of the pandas fallback: the equipment format and the output format, with and without
+    fractional seconds. Explicit formats keep year/month/day order fixed (no day-first guess).
+'''
+TIME_FORMATS = ('%Y/%m/%d %H:%M:%S.%f', '%Y/%m/%d %H:%M:%S', '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S')
+
+def _parse_formats(s):
+    s = s.astype(str).str.strip()
+    t = pd.to_datetime(s, format=TIME_FORMATS[0], errors='coerce')
+    for fmt in TIME_FORMATS[1:]:
+        left = t.isna()
+        if not left.any():
+            break
+        t = t.where(~left, pd.to_datetime(s.where(left), format=fmt, errors='coerce'))
+    return t
+
+'''
+    Parse time strings to int64 epoch nanoseconds in one vectorized step.
+    Same-width strings in the equipment or output format go through parse_time_bytes().
+    Anything else is parsed by pandas with TIME_FORMATS. Values that can't be parsed become NAT_NS.
+'''
+def parse_time_ns(values):
+    s = pd.Series(values)
+    if s.empty:
+        return np.empty(0, dtype=np.int64)
+    if s.dtype.kind == 'M':
+        return _ns_values(s)
+    try:
+        b = np.asarray(s.to_numpy(dtype=str), dtype='S')
+    except (UnicodeEncodeError, ValueError):
+        b = None
+    if b is not None and b.dtype.itemsize >= 19 and (np.char.str_len(b) == b.dtype.itemsize).all():
+        ns = parse_time_bytes(b.view(np.uint8).reshape(len(b), -1))
+        if ns is not None:
+            return ns
+    return _ns_values(_parse_formats(s))
+
+'''
+    Format int64 epoch nanoseconds as YYYY-MM-DD HH:MM:SS.fff in one vectorized step.
+    NAT_NS becomes an empty string.
+'''
+def format_ns(ns):
+    ns = np.asarray(ns, dtype=np.int64)
+    if ns.size == 0:
+        return np.empty(ns.shape, dtype='<U23')
+    ms = ns.view('datetime64[ns]').astype('datetime64[ms]')
+    out = np.char.replace(np.datetime_as_string(ms, unit='ms'), 'T', ' ')
+    out[ns == NAT_NS] = ''
+    return out
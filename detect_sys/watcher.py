@@ -0,0 +1,166 @@
+## Standard library
+import os                                           # For OS-dependent features.
+import time                                         # For polling intervals.
+import queue                                        # For passing notified paths between threads.
+import fnmatch                                      # For matching file names against glob_csv.
+import logging                                      #
+from pathlib import Path                            # For filesystem path and operations.
+
+## Optional: OS file notification (inotify / ReadDirectoryChangesW)
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+'''
+    Watch BASE_DIR for new CSV files.
+    With watchdog installed, OS notifications are used and a polling rescan runs as a safety net.
+    Without it (or on shares that do not deliver notifications), only the newest `days` sub folders
+    are polled, and a folder is listed again only when its mtime has changed.
+    What the watcher remembers (files reported, folder mtimes) is kept per folder and only for the
+    folders of that window, so a resident process does not grow with every new day folder.
+'''
+class DirWatcher:
+    def __init__(self, base, pattern='*.csv', interval=2.0, days=2, use_notify=True, rescan_sec=60.0):
+        self.base = Path(base)
+        self.patterns = [pattern] if isinstance(pattern, str) else list(pattern)     # one glob or a list
+        self.interval = float(interval)
+        self.days = max(int(days), 1)
+        self.rescan_sec = float(rescan_sec)
+        self.use_notify = bool(use_notify) and Observer is not None
+        self._seen = {}             # folder -> files already reported (folders of the window only)
+        self._dir_mtime = {}        # folder -> mtime at the last listing
+        self._q = queue.Queue()
+        self._observer = None
+        self._last_scan = 0.0
+
+    '''
+        Prime the seen set with the files that already exist and start the OS observer if enabled.
+    '''
+    def start(self):
+        self._scan()
+        if self.use_notify:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_Handler(self), str(self.base), recursive=True)
+                self._observer.start()
+                logging.info(f'watch:notify {self.base}')
+            except Exception as e:
+                logging.warning(f'watch:notify unavailable, fallback to polling ({e})')
+                self._observer = None
+        if self._observer is None:
+            logging.info(f'watch:polling {self.base} every {self.interval}s')
+        return self
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def match(self, path):
+        name = os.path.basename(path)
+        return any(fnmatch.fnmatch(name, p) for p in self.patterns)
+
+    '''
+        Return the newest `days` folders directly under base (by name, INPUT_MYYYYMMDD sorts by date)
+        plus base itself for files put directly under it.
+    '''
+    def _recent_dirs(self):
+        try:
+            with os.scandir(self.base) as it:
+                dirs = sorted(e.path for e in it if e.is_dir())
+        except OSError as e:
+            logging.warning(f'watch:cannot list {self.base} ({e})')
+            return []
+        return [str(self.base)] + dirs[-self.days:]
+
+    '''
+        Folder of the window a file belongs to: base itself, or the sub folder of base it is under.
+    '''
+    def _folder(self, path):
+        try:
+            parts = Path(path).relative_to(self.base).parts
+        except ValueError:
+            return str(Path(path).parent)
+        return str(self.base) if len(parts) <= 1 else str(self.base / parts[0])
+
+    '''
+        List the recent folders whose mtime changed and return the files not reported yet.
+        The newest folder is always listed, since folder mtimes on SMB can be coarse.
+        Folders that left the window are forgotten, and a listed folder keeps only the files it
+        still holds (files moved away or deleted are dropped).
+    '''
+    def _scan(self):
+        self._last_scan = time.monotonic()
+        new = []
+        dirs = self._recent_dirs()
+        if not dirs:
+            return new
+        for d in set(self._seen) | set(self._dir_mtime):
+            if d not in dirs:
+                self._seen.pop(d, None)
+                self._dir_mtime.pop(d, None)
+        for d in dirs:
+            try:
+                mt = os.stat(d).st_mtime
+            except OSError:
+                continue
+            if self._dir_mtime.get(d) == mt and d != dirs[-1]:
+                continue
+            self._dir_mtime[d] = mt
+            seen = self._seen.get(d, set())
+            listed = set()
+            for root, subdirs, names in os.walk(d):
+                if root == str(self.base):
+                    subdirs[:] = []  # Sub folders of base are handled by _recent_dirs.
+                for n in names:
+                    p = os.path.join(root, n)
+                    if self.match(n):
+                        listed.add(p)
+                        if p not in seen:
+                            new.append(Path(p))
+            self._seen[d] = listed
+        return new
+
+    '''
+        Block up to `timeout` seconds and return the new files found.
+    '''
+    def wait(self, timeout=None):
+        timeout = self.interval if timeout is None else timeout
+        if self._observer is None:
+            time.sleep(timeout)
+            return self._scan()
+
+        new = []
+        try:
+            p = self._q.get(timeout=timeout)
+            while True:
+                seen = self._seen.setdefault(self._folder(p), set())
+                if p not in seen:
+                    seen.add(p)
+                    new.append(Path(p))
+                p = self._q.get_nowait()
+        except queue.Empty:
+            pass
+        if time.monotonic() - self._last_scan >= self.rescan_sec:
+            new += self._scan()
+        return new
+
+'''
+    watchdog handler: push created/moved-in files that match the pattern.
+'''
+class _Handler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory and self.watcher.match(event.src_path):
+            self.watcher._q.put(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory and self.watcher.match(event.dest_path):
+            self.watcher._q.put(event.dest_path)